@@ -56,5 +56,7 @@ setup(
             "Shapely",
             "freegs @ git+https://github.com/bendudson/freegs.git",
         ],
+        "loky": "loky",
+        "parquet": "pyarrow",
     },
 )
@@ -62,6 +62,7 @@ class CGYRO:
         ]
 
         self.results = {}
+        self.streams = {}
 
     def prep(self, folder, inputgacode_file):
 
@@ -220,6 +221,21 @@ class CGYRO:
             for i in self.results[label].all_flags
         ]
 
+    def read_stream(self, label="cgyro1", folder=None):
+        """
+        Memory-mapped reader of the run (see CGYROstream), which can be called repeatedly while the
+        simulation is running to follow it without reading the full history again
+        """
+
+        folder = folder or self.folderCGYRO
+
+        if label not in self.streams or self.streams[label].folder != IOtools.expandPath(folder):
+            self.streams[label] = CGYROstream(folder)
+        else:
+            self.streams[label].update()
+
+        return self.streams[label]
+
     def plotLS(self, labels=["cgyro1"], fig=None):
         colors = GRAPHICStools.listColors()
 
@@ -647,6 +663,317 @@ class CGYRO:
             )
 
 
+class CGYROstream:
+    """
+    Memory-mapped reader of the binary outputs of a CGYRO simulation (also while it is still running).
+
+    CGYRO appends one time slice per output step to each bin.cgyro.* file (Fortran order, time last), so each
+    slice is a contiguous block of the file. Only complete slices that are also in out.cgyro.time are exposed,
+    and only the slices that are requested are actually read from disk.
+    Fluxes are reduced (summed over fields and ky) incrementally as the simulation advances, and the reduced
+    time traces are cached in the run folder (mitim_cgyro_stats.npz), so that time-averages over any window
+    do not require the full history to be read again.
+
+    Usage:
+            stream = CGYROstream(folder)
+            t, phi = stream.tail("bin.cgyro.kxky_phi", n=1)      # Latest time slice
+            Q, Q_std = stream.flux_average(moment="e", ispec=0, tmin=100.0)
+    """
+
+    cache_file = "mitim_cgyro_stats.npz"
+    moments = {"n": 0, "e": 1, "v": 2, "s": 3}
+    flux_moments = (3, 4)  # Possible number of moments in flux files (n, e, v and, if written, s)
+
+    def __init__(self, folder, precision="float32", use_cache=True):
+        self.folder = IOtools.expandPath(folder)
+        self.dtype = np.dtype(precision)
+        self.use_cache = use_cache
+
+        self.t = np.array([])
+        self.err = np.array([])
+        self._time_offset = 0
+        self._time_first = None  # First line of out.cgyro.time, to detect that the simulation was restarted
+        self.n_flux = None
+
+        self.grids = self._read_grids()
+
+        # Reduced fluxes, [species, moment, time]
+        self.fluxes = None
+        self.fluxes_file = None
+        if self.use_cache:
+            self._load_cache()
+
+        self.update()
+
+    def _read_grids(self):
+        data = np.fromfile(f"{self.folder}/out.cgyro.grids", sep=" ")
+        keys = [
+            "n_n",
+            "n_species",
+            "n_field",
+            "n_radial",
+            "n_theta",
+            "n_energy",
+            "n_xi",
+            "m_box",
+            "length",
+            "n_global",
+            "theta_plot",
+        ]
+        grids = {key: int(data[i]) for i, key in enumerate(keys) if key != "length"}
+        grids["length"] = float(data[8])
+        return grids
+
+    def shape(self, file):
+        """
+        Shape of one time slice of a bin.cgyro.* file (as in pygacode's cgyrodata)
+        """
+
+        g = self.grids
+        name = os.path.basename(file).split("bin.cgyro.")[-1]
+
+        if name == "freq":
+            return (2, g["n_n"])
+        elif name in ["ky_flux", "ky_cflux"]:
+            n_flux = self.n_flux if self.n_flux is not None else self._infer_n_flux(file)
+            return (g["n_species"], n_flux, g["n_field"], g["n_n"])
+        elif name in ["phib", "aparb", "bparb"]:
+            return (2, g["n_theta"] * g["n_radial"])
+        elif name in ["kxky_phi", "kxky_apar", "kxky_bpar"]:
+            return (2, g["n_radial"], g["theta_plot"], g["n_n"])
+        elif name in ["kxky_n", "kxky_e", "kxky_v"]:
+            return (2, g["n_radial"], g["theta_plot"], g["n_species"], g["n_n"])
+        else:
+            raise Exception(f"[MITIM] Shape of {name} is not known")
+
+    def _infer_n_flux(self, file):
+        """
+        Number of moments written in a flux file (not in out.cgyro.grids), from its length. Binary files may be
+        ahead of out.cgyro.time (by a slice, possibly incomplete), so the number is only kept (and cached) once
+        a single one is compatible with the times read. Until then, the most likely one is returned.
+        """
+
+        g = self.grids
+        block = g["n_species"] * g["n_field"] * g["n_n"]
+        size, n_time = self._elements(file), len(self.t)
+
+        if n_time == 0:
+            return self.flux_moments[0]
+
+        candidates = [
+            m for m in self.flux_moments if m * block * n_time <= size < m * block * (n_time + 2)
+        ]
+        if len(candidates) == 1:
+            self.n_flux = candidates[0]
+            return self.n_flux
+
+        # Not determined yet, prefer those for which the file only contains complete slices
+        complete = [m for m in candidates if size % (m * block) == 0]
+        return (complete or candidates or self.flux_moments)[0]
+
+    def _elements(self, file):
+        file = f"{self.folder}/{file}"
+        return os.path.getsize(file) // self.dtype.itemsize if os.path.exists(file) else 0
+
+    def update(self):
+        """
+        Read the new lines of out.cgyro.time (incomplete lines of a running simulation are left for later).
+        If out.cgyro.time was rewritten (simulation restarted from scratch in the same folder), everything
+        that was read or reduced is discarded and read again.
+        """
+
+        file = f"{self.folder}/out.cgyro.time"
+
+        if self._time_offset > 0 and (
+            (not os.path.exists(file)) or os.path.getsize(file) < self._time_offset
+        ):
+            self._restart()
+
+        if os.path.exists(file):
+            with open(file, "rb") as f:
+                if self._time_offset > 0 and f.readline() != self._time_first:
+                    self._restart()
+                f.seek(self._time_offset)
+                new = f.read()
+
+            complete = new[: new.rfind(b"\n") + 1]
+            if self._time_offset == 0 and len(complete) > 0:
+                self._time_first = complete[: complete.find(b"\n") + 1]
+            self._time_offset += len(complete)
+
+            rows = [np.array(line.split(), dtype=float) for line in complete.splitlines() if line.strip()]
+            if len(rows) > 0:
+                self.t = np.append(self.t, [row[0] for row in rows])
+                self.err = np.append(self.err, [row[1] for row in rows])
+
+        return len(self.t)
+
+    def _restart(self):
+        print(
+            f"\t- CGYRO simulation in {IOtools.clipstr(self.folder)} was restarted, reading it again",
+            typeMsg="w",
+        )
+
+        self.t, self.err = np.array([]), np.array([])
+        self._time_offset, self._time_first = 0, None
+        self.n_flux = None
+        self.fluxes, self.fluxes_file = None, None
+
+        if os.path.exists(f"{self.folder}/{self.cache_file}"):
+            os.remove(f"{self.folder}/{self.cache_file}")
+
+    def memmap(self, file):
+        """
+        Memory-mapped view of the complete time slices in a bin.cgyro.* file, with shape (..., time)
+        """
+
+        shape = self.shape(file)
+        size = int(np.prod(shape))
+        n_time = min(len(self.t), self._elements(file) // size)
+
+        if n_time == 0:
+            return np.zeros(shape + (0,), dtype=self.dtype)
+
+        data = np.memmap(
+            f"{self.folder}/{file}", dtype=self.dtype, mode="r", shape=(n_time,) + shape[::-1]
+        )
+
+        # Fortran order, time last
+        return data.transpose()
+
+    def window(self, file, tmin=None, tmax=None):
+        """
+        Time slices of a bin.cgyro.* file within [tmin,tmax], read into memory
+        """
+
+        data = self.memmap(file)
+        t = self.t[: data.shape[-1]]
+
+        it = np.ones(len(t), dtype=bool)
+        if tmin is not None:
+            it &= t >= tmin
+        if tmax is not None:
+            it &= t <= tmax
+        it = np.where(it)[0]
+
+        if len(it) == 0:
+            return t[it], np.zeros(data.shape[:-1] + (0,), dtype=self.dtype)
+
+        return t[it], np.array(data[..., it[0] : it[-1] + 1])
+
+    def tail(self, file, n=1):
+        """
+        Last n complete time slices of a bin.cgyro.* file (the file may still be growing)
+        """
+
+        self.update()
+        data = self.memmap(file)
+        n = min(n, data.shape[-1])
+
+        return self.t[data.shape[-1] - n : data.shape[-1]], np.array(data[..., data.shape[-1] - n :])
+
+    # ---------------------------------------------------------------------------------------------------------
+    # Reduced fluxes
+    # ---------------------------------------------------------------------------------------------------------
+
+    def update_fluxes(self, file=None):
+        """
+        Reduce (sum over fields and ky) only the time slices of the flux file that have not been reduced yet
+        """
+
+        self.update()
+
+        if file is None:
+            file = (
+                "bin.cgyro.ky_cflux"
+                if os.path.exists(f"{self.folder}/bin.cgyro.ky_cflux")
+                else "bin.cgyro.ky_flux"
+            )
+
+        if (self.fluxes is not None) and (self.fluxes_file != file):
+            self.fluxes = None
+
+        data = self.memmap(file)
+        if data.shape[-1] == 0:
+            return np.zeros(data.shape[:2] + (0,)) if self.fluxes is None else self.fluxes
+
+        # A restarted (or different) simulation invalidates the reduced traces
+        if (self.fluxes is not None) and (
+            (self.fluxes.shape[:2] != data.shape[:2])
+            or (self.fluxes.shape[-1] > data.shape[-1])
+            or (
+                self.fluxes.shape[-1] > 0
+                and not np.allclose(self.fluxes[..., 0], data[..., 0].sum(axis=(2, 3)))
+            )
+        ):
+            print(
+                f"\t- Cached CGYRO fluxes in {IOtools.clipstr(self.folder)} are not valid anymore, reducing again",
+                typeMsg="w",
+            )
+            self.fluxes = None
+
+        if self.fluxes is None:
+            self.fluxes = np.zeros(data.shape[:2] + (0,))
+        self.fluxes_file = file
+
+        n_done = self.fluxes.shape[-1]
+        if data.shape[-1] > n_done:
+            new = np.array(data[..., n_done:]).sum(axis=(2, 3), dtype=float)
+            self.fluxes = np.append(self.fluxes, new, axis=-1)
+
+            # Traces reduced with a number of moments that is not determined yet are not cached
+            if self.use_cache and self.n_flux is not None:
+                self._save_cache()
+
+        return self.fluxes
+
+    def flux_average(self, moment="e", ispec=0, tmin=None, tmax=None):
+        """
+        Time-average (and standard deviation) of the flux of a moment (n, e, v, s) over [tmin,tmax]
+        ispec can be a list of species, whose fluxes are added.
+        """
+
+        fluxes = self.update_fluxes()
+        t = self.t[: fluxes.shape[-1]]
+
+        ispecs = ispec if isinstance(ispec, (list, tuple, np.ndarray)) else [ispec]
+        y = fluxes[ispecs, self.moments[moment], :].sum(axis=0)
+
+        it = np.ones(len(t), dtype=bool)
+        if tmin is not None:
+            it &= t >= tmin
+        if tmax is not None:
+            it &= t <= tmax
+
+        if it.sum() == 0:
+            print(f"\t- No time slices in window [{tmin},{tmax}]", typeMsg="w")
+            return np.nan, np.nan
+
+        return y[it].mean(), y[it].std()
+
+    def _load_cache(self):
+        file = f"{self.folder}/{self.cache_file}"
+        if not os.path.exists(file):
+            return
+
+        try:
+            with np.load(file) as data:
+                self.fluxes = data["fluxes"]
+                self.fluxes_file = str(data["fluxes_file"])
+                self.n_flux = int(data["n_flux"])
+        except Exception:
+            print(f"\t- Cache file {IOtools.clipstr(file)} could not be read, ignoring it", typeMsg="w")
+            self.fluxes, self.fluxes_file, self.n_flux = None, None, None
+
+    def _save_cache(self):
+        file = f"{self.folder}/{self.cache_file}"
+
+        # Write to a temporary file first, so that a reader never sees a partial cache
+        with open(f"{file}.tmp", "wb") as f:
+            np.savez(f, fluxes=self.fluxes, fluxes_file=self.fluxes_file, n_flux=self.n_flux)
+        os.replace(f"{file}.tmp", file)
+
+
 class CGYROinput:
     def __init__(self, file=None):
         self.file = file
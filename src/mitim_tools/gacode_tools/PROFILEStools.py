@@ -3701,10 +3701,89 @@ class PROFILES_GACODE:
             ax.plot(self.profiles["rho(-)"], Ohmic_new, "g", lw=2)
             plt.show()
 
+    def to_TGLF_quantities(self):
+        """
+        Radial profiles (along rho) of the quantities that to_TGLF needs to interpolate
+        """
+
+        quantities = {
+            'aLne':         self.derived['aLne'],
+            'aLTe':         self.derived['aLTe'],
+            'vpar':         self.derived['vpar'],
+            'vpar_shear':   self.derived['vpar_shear'],
+            'aLni':         self.derived['aLni'],
+            'aLTi':         self.derived['aLTi'],
+            'tite_all':     self.derived['tite_all'],
+            'fi':           self.derived['fi'],
+            'vexb_shear':   self.derived['vexb_shear'],
+            'betae':        self.derived['betae'],
+            'xnue':         self.derived['xnue'],
+            'Zeff':         self.derived['Zeff'],
+            'debye':        self.derived['debye'],
+            'RMIN_LOC':     self.derived['roa'],
+            'RMAJ_LOC':     self.derived['Rmajoa'],
+            'ZMAJ_LOC':     self.derived["Zmagoa"],
+            'DRMINDX_LOC':  self.derived['drmin/dr'],
+            'DRMAJDX_LOC':  self.derived['dRmaj/dr'],
+            'DZMAJDX_LOC':  self.derived['dZmaj/dr'],
+            'Q_LOC':        self.profiles["q(-)"],
+            'KAPPA_LOC':    self.profiles["kappa(-)"],
+            'S_KAPPA_LOC':  self.derived['s_kappa'],
+            'DELTA_LOC':    self.profiles["delta(-)"],
+            'S_DELTA_LOC':  self.derived['s_delta'],
+            'ZETA_LOC':     self.profiles["zeta(-)"],
+            'S_ZETA_LOC':   self.derived['s_zeta'],
+            'P_PRIME_LOC':  self.derived['pprime'],
+            'Q_PRIME_LOC':  self.derived['s_q'],
+        }
+
+        for k in quantities:
+            quantities[k] = np.array(quantities[k], dtype=float)
+
+        # Geometry is protected against non-finite values
+        for k in quantities:
+            if k.endswith('_LOC'):
+                quantities[k] = np.nan_to_num(quantities[k], nan=0.0, posinf=1E10, neginf=-1E10)
+
+        return quantities
+
+    def to_TGLF_interpolate(self, rhos):
+        """
+        Values of the to_TGLF quantities at the requested rhos.
+        One spline per quantity (vectorized across species) is built and evaluated at all rhos at once.
+        Splines and interpolated values are kept in self.to_TGLF_cache and reused until the profiles change.
+        """
+
+        from scipy.interpolate import CubicSpline
+
+        x = np.array(self.profiles['rho(-)'], dtype=float)
+        quantities = self.to_TGLF_quantities()
+
+        # Is the cache still valid? (profiles may have been modified since)
+        cache = self.__dict__.get('to_TGLF_cache', None)
+        if (cache is None) or (not np.array_equal(cache['x'], x)) or any(
+            [not np.array_equal(cache['quantities'][k], quantities[k], equal_nan=True) for k in quantities]
+            ):
+            cache = {
+                'x': x,
+                'quantities': quantities,
+                'splines': {k: CubicSpline(x, quantities[k]) for k in quantities},
+                'values': {},
+                }
+            self.to_TGLF_cache = cache
+
+        rhos_new = [rho for rho in rhos if rho not in cache['values']]
+        if len(rhos_new) > 0:
+            values = {k: cache['splines'][k](np.array(rhos_new)) for k in cache['splines']}
+            for irho, rho in enumerate(rhos_new):
+                cache['values'][rho] = {k: values[k][irho] for k in values}
+
+        return {rho: cache['values'][rho] for rho in rhos}
+
     def to_TGLF(self, rhos=[0.5], TGLFsettings=0):
 
-        # <> Function to interpolate a curve <> 
-        from mitim_tools.misc_tools.MATHtools import extrapolateCubicSpline as interpolation_function
+        # <> Interpolate all quantities at all rhos at once <>
+        values_rhos = self.to_TGLF_interpolate(rhos)
 
         inputsTGLF = {}
         for rho in rhos:
@@ -3713,8 +3792,8 @@ class PROFILES_GACODE:
             # Define interpolator at this rho
             # ---------------------------------------------------------------------------------------------------------------------------------------
 
-            def interpolator(y):
-                return interpolation_function(rho, self.profiles['rho(-)'],y).item()
+            def interpolator(k, i=None):
+                return (values_rhos[rho][k] if i is None else values_rhos[rho][k][i]).item()
 
             TGLFinput, TGLFoptions, label = GACODEdefaults.addTGLFcontrol(TGLFsettings)
 
@@ -3737,12 +3816,12 @@ class PROFILES_GACODE:
                 1: {
                     'ZS': -1.0,
                     'MASS': mass_e/mass_ref,
-                    'RLNS': interpolator(self.derived['aLne']),
-                    'RLTS': interpolator(self.derived['aLTe']),
+                    'RLNS': interpolator('aLne'),
+                    'RLTS': interpolator('aLTe'),
                     'TAUS': 1.0,
                     'AS': 1.0,
-                    'VPAR': interpolator(self.derived['vpar']),
-                    'VPAR_SHEAR': interpolator(self.derived['vpar_shear']),
+                    'VPAR': interpolator('vpar'),
+                    'VPAR_SHEAR': interpolator('vpar_shear'),
                     'VNS_SHEAR': 0.0,
                     'VTS_SHEAR': 0.0},
             }
@@ -3751,12 +3830,12 @@ class PROFILES_GACODE:
                 species[i+2] = {
                     'ZS': self.Species[i]['Z'],
                     'MASS': self.Species[i]['A']/mass_ref,
-                    'RLNS': interpolator(self.derived['aLni'][:,i]),
-                    'RLTS': interpolator(self.derived['aLTi'][:,0] if self.Species[i]['S'] == 'therm' else self.derived["aLTi"][:,i]),
-                    'TAUS': interpolator(self.derived["tite_all"][:,i]),
-                    'AS': interpolator(self.derived['fi'][:,i]),
-                    'VPAR': interpolator(self.derived['vpar']),
-                    'VPAR_SHEAR': interpolator(self.derived['vpar_shear']),
+                    'RLNS': interpolator('aLni', i),
+                    'RLTS': interpolator('aLTi', 0 if self.Species[i]['S'] == 'therm' else i),
+                    'TAUS': interpolator('tite_all', i),
+                    'AS': interpolator('fi', i),
+                    'VPAR': interpolator('vpar'),
+                    'VPAR_SHEAR': interpolator('vpar_shear'),
                     'VNS_SHEAR': 0.0,
                     'VTS_SHEAR': 0.0
                     }
@@ -3770,39 +3849,21 @@ class PROFILES_GACODE:
                 'SIGN_BT': -1.0,
                 'SIGN_IT': -1.0,
                 'VEXB': 0.0,
-                'VEXB_SHEAR': interpolator(self.derived['vexb_shear']),
-                'BETAE': interpolator(self.derived['betae']),
-                'XNUE': interpolator(self.derived['xnue']),
-                'ZEFF': interpolator(self.derived['Zeff']),
-                'DEBYE': interpolator(self.derived['debye']),
+                'VEXB_SHEAR': interpolator('vexb_shear'),
+                'BETAE': interpolator('betae'),
+                'XNUE': interpolator('xnue'),
+                'ZEFF': interpolator('Zeff'),
+                'DEBYE': interpolator('debye'),
                 }
 
             # ---------------------------------------------------------------------------------------------------------------------------------------
             # Geometry comes from profiles
             # ---------------------------------------------------------------------------------------------------------------------------------------
 
-            parameters = {
-                'RMIN_LOC':     self.derived['roa'],
-                'RMAJ_LOC':     self.derived['Rmajoa'],
-                'ZMAJ_LOC':     self.derived["Zmagoa"],
-                'DRMINDX_LOC':  self.derived['drmin/dr'],
-                'DRMAJDX_LOC':  self.derived['dRmaj/dr'],
-                'DZMAJDX_LOC':  self.derived['dZmaj/dr'],
-                'Q_LOC':        self.profiles["q(-)"],
-                'KAPPA_LOC':    self.profiles["kappa(-)"],
-                'S_KAPPA_LOC':  self.derived['s_kappa'],
-                'DELTA_LOC':    self.profiles["delta(-)"],
-                'S_DELTA_LOC':  self.derived['s_delta'],
-                'ZETA_LOC':     self.profiles["zeta(-)"],
-                'S_ZETA_LOC':   self.derived['s_zeta'],
-                'P_PRIME_LOC':  self.derived['pprime'],
-                'Q_PRIME_LOC':  self.derived['s_q'],
-            }
-
             geom = {}
-            for k in parameters:
-                par = torch.nan_to_num(torch.from_numpy(parameters[k]) if type(parameters[k]) is np.ndarray else parameters[k], nan=0.0, posinf=1E10, neginf=-1E10)
-                geom[k] = interpolator(par)
+            for k in ['RMIN_LOC', 'RMAJ_LOC', 'ZMAJ_LOC', 'DRMINDX_LOC', 'DRMAJDX_LOC', 'DZMAJDX_LOC', 'Q_LOC', 'KAPPA_LOC', 'S_KAPPA_LOC',
+                      'DELTA_LOC', 'S_DELTA_LOC', 'ZETA_LOC', 'S_ZETA_LOC', 'P_PRIME_LOC', 'Q_PRIME_LOC']:
+                geom[k] = interpolator(k)
 
             geom['BETA_LOC'] = 0.0
             geom['KX0_LOC'] = 0.0
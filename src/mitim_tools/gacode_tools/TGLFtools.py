@@ -1,7 +1,9 @@
 import os
 import copy
 import pickle
+import itertools
 import numpy as np
+import xarray as xr
 import matplotlib.pyplot as plt
 from mitim_tools.gacode_tools import TGYROtools, PROFILEStools
 from mitim_tools.misc_tools import (
@@ -9,6 +11,7 @@ from mitim_tools.misc_tools import (
     GRAPHICStools,
     PLASMAtools,
     GUItools,
+    FARMINGtools,
 )
 from mitim_tools.gacode_tools.utils import (
     NORMtools,
@@ -609,6 +612,12 @@ class TGLF:
                     if "launchSlurm" in kwargs_TGLFrun
                     else True
                 ),
+                cores_todo_array=(
+                    kwargs_TGLFrun["slurm_setup"]["cores_todo_array"]
+                    if "slurm_setup" in kwargs_TGLFrun
+                    and "cores_todo_array" in kwargs_TGLFrun["slurm_setup"]
+                    else 1e6
+                ),
             )
         else:
             print(
@@ -645,6 +654,8 @@ class TGLF:
             "cores": 4,
             "minutes": 5,
         },  # Cores per TGLF call (so, when running nR radii -> nR*4)
+        inputs_array=None,  # TGLFinputArray already modified (e.g. all points of a scan), to only write this point
+        point=0,
         **kwargs):
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -654,8 +665,6 @@ class TGLF:
         if rhos is None:
             rhos = self.rhos
 
-        inputs = copy.deepcopy(self.inputsTGLF)
-
         FolderTGLF = IOtools.expandPath(self.FolderGACODE + subFolderTGLF + "/")
 
         ResultsFiles_new = []
@@ -686,13 +695,15 @@ class TGLF:
             latest_inputsFileTGLFDict,
         ) = changeANDwrite_TGLF(
             rhos,
-            inputs,
+            self.inputsTGLF,
             FolderTGLF,
             TGLFsettings=TGLFsettings,
             extraOptions=extraOptions,
             multipliers=multipliers,
             ApplyCorrections=ApplyCorrections,
             Quasineutral=Quasineutral,
+            inputs_array=inputs_array,
+            point=point,
         )
 
         tglf_executor_full[subFolderTGLF] = {}
@@ -741,6 +752,9 @@ class TGLF:
         self.FoldersTGLF_WF = {}
         if self.ky_single is not None:
 
+            # Results of the previous run, read only once per folder for all the ky requested
+            results_previous = {}
+
             tglf_executorWF = {}
             for ky_single0 in self.ky_single:
                 print(f"> Running TGLF waveform analysis, ky~{ky_single0}")
@@ -754,9 +768,13 @@ class TGLF:
                         list(tglf_executor[subFolderTGLF].keys())[0]
                     ]["folder"]
 
-                    self.ky_single = None
-                    self.read(label=f"ky{ky_single0}", folder=FolderTGLF_old, restartWF = False)
-                    self.ky_single = kys
+                    if FolderTGLF_old not in results_previous:
+                        self.ky_single = None
+                        self.read(label=f"ky{ky_single0}", folder=FolderTGLF_old, restartWF = False)
+                        self.ky_single = kys
+                        results_previous[FolderTGLF_old] = self.results[f"ky{ky_single0}"]
+                    else:
+                        self.results[f"ky{ky_single0}"] = results_previous[FolderTGLF_old]
 
                     self.FoldersTGLF_WF[f"ky{ky_single0}"][
                         FolderTGLF_old
@@ -833,7 +851,7 @@ class TGLF:
                         **kwargs_TGLFrun0,
                     )
 
-            # Run them all
+            # Run them all (those already calculated with the same inputs are taken from the TGLF cache, if enabled)
             self._run(
                 tglf_executorWF,
                 runWaveForms=[],
@@ -852,6 +870,7 @@ class TGLF:
         suffix=None,  # If None, search with my standard _0.55 suffixes corresponding to rho of this TGLF class
         d_perp_cm=None,  # It can be a dictionary with rhos. If None provided, use the last one employed
         restartWF = True, # If this is a "complete" read, I will assign a None
+        files=None,  # If None, read all out.tglf.* files. Otherwise, list of those to read (e.g. ["gbflux"])
     ):
         print("> Reading TGLF results")
 
@@ -901,6 +920,7 @@ class TGLF:
             convolution_fun_fluct=self.convolution_fun_fluct,
             factorTot_to_Perp=self.factorTot_to_Perp,
             suffix=suffix,
+            files=files,
         )
 
         self.results[label]["convolution_fun_fluct"] = self.convolution_fun_fluct
@@ -922,6 +942,7 @@ class TGLF:
 
         self.results[label]["wavefunction"] = {}
         if self.ky_single is not None:
+            files_WF = []
             for ky_single0 in self.ky_single:
                 if f"ky{ky_single0}" not in self.FoldersTGLF_WF:
                     continue
@@ -930,17 +951,29 @@ class TGLF:
                     print(f"\t - Results not found for ky={ky_single0}, likely due to a restart with no wavefunction option", typeMsg="w")
                     continue
 
-                self.results[label]["wavefunction"][f"ky{ky_single0}"] = {}
                 for ir in self.rhos:
                     suffix0 = f"_{ir:.4f}" if suffix is None else suffix
-
-                    self.results[label]["wavefunction"][f"ky{ky_single0}"][ir] = (
-                        GACODEinterpret.Waveform_read(
+                    files_WF.append(
+                        (
+                            ky_single0,
+                            ir,
                             f"{self.FoldersTGLF_WF[f'ky{ky_single0}'][folder]}/out.tglf.wavefunction{suffix0}",
                             f"{self.FoldersTGLF_WF[f'ky{ky_single0}'][folder]}/out.tglf.run{suffix0}",
                         )
                     )
 
+            # Parse all wavefunction files (all ky and radii) at once
+            waveforms = readWaveforms([(file, fileOut) for _, _, file, fileOut in files_WF])
+
+            for (ky_single0, ir, _, _), wf in zip(files_WF, waveforms):
+                if f"ky{ky_single0}" not in self.results[label]["wavefunction"]:
+                    self.results[label]["wavefunction"][f"ky{ky_single0}"] = {}
+                self.results[label]["wavefunction"][f"ky{ky_single0}"][ir] = wf
+
+            self.results[label]["wavefunction_array"] = arrayWaveforms(
+                self.results[label]["wavefunction"], self.rhos
+            )
+
         # After read, go back to no waveforms in case I want to read another case without it
         if restartWF:
             self.ky_single = None
@@ -2360,6 +2393,155 @@ class TGLF:
                 label=f"{self.subFolderTGLF_scan}_{name}", folder=folders[cont_mult], restartWF = False
             )
 
+    def runScanMultiple(
+        self,
+        subFolderTGLF,  # 'scanND1',
+        variables={},  # e.g. {"RLTS_1": [0.5, 1.0, 1.5], "RLNS_1": [0.5, 1.5]} -> Cartesian product
+        points=None,  # e.g. [{"RLTS_1": 0.5, "RLNS_1": 1.5}, ...] -> List of points (variables is not used)
+        multipliers={},
+        relativeChanges=True,
+        label=None,
+        **kwargs_TGLFrun,
+    ):
+        """
+        Scan of several variables at once (design of experiments), with all TGLF runs submitted together.
+        Results are read into self.scans[label]["dataset"], an xarray Dataset of fluxes with dimensions
+        (variable_1, ..., variable_N, rho) for the Cartesian product or (point, rho) for a list of points.
+
+        Set relativeChanges=False if the values are the exact values to change, not multipliers
+        """
+
+        subFolderTGLF_scan = subFolderTGLF
+        while subFolderTGLF_scan[-1] == "/":
+            subFolderTGLF_scan = subFolderTGLF_scan[:-1]
+
+        label = label if label is not None else subFolderTGLF_scan
+
+        cartesian = points is None
+        if cartesian:
+            points = [
+                dict(zip(variables.keys(), values))
+                for values in itertools.product(*variables.values())
+            ]
+            names = list(variables.keys())
+        else:
+            names = list(points[0].keys())
+
+        print(f"\n- Proceeding to scan {names} ({len(points)} points):")
+
+        # -------------------------------------
+        # Prepare all points, to be submitted together
+        # -------------------------------------
+
+        tglf_executor, tglf_executor_full, folders = {}, {}, []
+        multipliers_points, kwargs_points = [], []
+        for cont, point in enumerate(points):
+            print(
+                f"\n + Point #{cont}: {point} -----------------------------------------------------------------------------------------------------------"
+            )
+
+            multipliers_mod = copy.deepcopy(multipliers)
+            kwargs_TGLFrun_mod = copy.deepcopy(kwargs_TGLFrun)
+
+            for variable in point:
+                multipliers_mod[variable] = round(point[variable], 6)
+
+            species = self.inputsTGLF[self.rhos[0]]  # Any rho will do
+            multipliers_mod = completeVariation(multipliers_mod, species)
+
+            if not relativeChanges:
+                kwargs_TGLFrun_mod.setdefault("extraOptions", {})
+                for ikey in multipliers_mod:
+                    kwargs_TGLFrun_mod["extraOptions"][ikey] = multipliers_mod[ikey]
+                multipliers_mod = {}
+
+            if any([variable in ["AS_3", "AS_4", "AS_5", "AS_6"] for variable in point]):
+                kwargs_TGLFrun_mod["Quasineutral"] = True
+
+            # Only ask the restart in the first round
+            kwargs_TGLFrun_mod["forceIfRestart"] = cont > 0 or (
+                "forceIfRestart" in kwargs_TGLFrun and kwargs_TGLFrun["forceIfRestart"]
+            )
+
+            multipliers_points.append(multipliers_mod)
+            kwargs_points.append(kwargs_TGLFrun_mod)
+
+        # Modify the inputs of all points at once
+        inputs_array = self._prepare_inputs_points(multipliers_points, kwargs_points)
+
+        for cont in range(len(points)):
+            tglf_executor, tglf_executor_full, folderlast = self._prepare_run_radii(
+                f"{subFolderTGLF_scan}_point{cont}",
+                tglf_executor=tglf_executor,
+                tglf_executor_full=tglf_executor_full,
+                multipliers=multipliers_points[cont],
+                inputs_array=inputs_array,
+                point=cont,
+                **kwargs_points[cont],
+            )
+
+            folders.append(copy.deepcopy(folderlast))
+
+        # -------------------------------------
+        # Run them all
+        # -------------------------------------
+
+        self._run(
+            tglf_executor,
+            tglf_executor_full=tglf_executor_full,
+            **kwargs_TGLFrun,
+        )
+
+        # -------------------------------------
+        # Read results
+        # -------------------------------------
+
+        for cont in range(len(points)):
+            self.read(
+                label=f"{subFolderTGLF_scan}_point{cont}",
+                folder=folders[cont],
+                restartWF=False,
+            )
+
+        quantities = ["Qe", "Qi", "Ge", "Gi"]
+        data = {quantity: np.zeros((len(points), len(self.rhos))) for quantity in quantities}
+        for cont in range(len(points)):
+            results = self.results[f"{subFolderTGLF_scan}_point{cont}"]
+            for irho_cont in range(len(self.rhos)):
+                irho = np.where(results["x"] == self.rhos[irho_cont])[0][0]
+                for quantity in quantities:
+                    data[quantity][cont, irho_cont] = getattr(results["TGLFout"][irho], quantity)
+
+        if cartesian:
+            dims = names + ["rho"]
+            shape = [len(variables[variable]) for variable in names] + [len(self.rhos)]
+            coords = {variable: np.array(variables[variable]) for variable in names}
+        else:
+            dims = ["point", "rho"]
+            shape = [len(points), len(self.rhos)]
+            coords = {"point": np.arange(len(points))}
+            for variable in names:
+                coords[variable] = ("point", np.array([point[variable] for point in points]))
+        coords["rho"] = np.array(self.rhos)
+
+        dataset = xr.Dataset(
+            {quantity: (dims, data[quantity].reshape(shape)) for quantity in quantities},
+            coords=coords,
+            attrs={
+                "relativeChanges": int(relativeChanges),
+                "units": "GB",
+            },
+        )
+
+        self.scans[label] = {
+            "variables": names,
+            "points": points,
+            "results_tags": [f"{subFolderTGLF_scan}_point{cont}" for cont in range(len(points))],
+            "dataset": dataset,
+        }
+
+        return dataset
+
     def _prepare_scan(
         self,
         subFolderTGLF,  # 'scan1',
@@ -2367,6 +2549,8 @@ class TGLF:
         variable="RLTS_1",
         varUpDown=[0.5, 1.0, 1.5],
         relativeChanges=True,
+        tglf_executor=None,
+        tglf_executor_full=None,
         **kwargs_TGLFrun,
     ):
         """
@@ -2374,6 +2558,8 @@ class TGLF:
         multipliers, as they may be passed to the next scan
 
         Set relativeChanges=False if varUpDown contains the exact values to change, not multipleiers
+
+        tglf_executor and tglf_executor_full can be provided to add this scan to other runs (to submit all together)
         """
         multipliers_mod = copy.deepcopy(multipliers)
 
@@ -2405,9 +2591,9 @@ class TGLF:
                 varUpDown_new[i] = round(varUpDown_new[i], 3)
 
         print(f"\n- Proceeding to scan {variable}:")
-        tglf_executor = {}
-        tglf_executor_full = {}
-        folders = []
+        tglf_executor = {} if tglf_executor is None else tglf_executor
+        tglf_executor_full = {} if tglf_executor_full is None else tglf_executor_full
+        folders, names, multipliers_points, kwargs_points = [], [], [], []
         for cont_mult, mult in enumerate(varUpDown_new):
             mult = round(mult, 6)
 
@@ -2441,18 +2627,50 @@ class TGLF:
                 "forceIfRestart" in kwargs_TGLFrun and kwargs_TGLFrun["forceIfRestart"]
             )
 
+            names.append(name)
+            multipliers_points.append(copy.deepcopy(multipliers_mod))
+            kwargs_points.append(copy.deepcopy(kwargs_TGLFrun))
+
+        # Modify the inputs of all points at once
+        inputs_array = self._prepare_inputs_points(multipliers_points, kwargs_points)
+
+        for cont_mult, name in enumerate(names):
             tglf_executor, tglf_executor_full, folderlast = self._prepare_run_radii(
                 f"{self.subFolderTGLF_scan}_{name}",
                 tglf_executor=tglf_executor,
                 tglf_executor_full=tglf_executor_full,
-                multipliers=multipliers_mod,
-                **kwargs_TGLFrun,
+                multipliers=multipliers_points[cont_mult],
+                inputs_array=inputs_array,
+                point=cont_mult,
+                **kwargs_points[cont_mult],
             )
 
             folders.append(copy.deepcopy(folderlast))
 
         return tglf_executor, tglf_executor_full, folders, varUpDown_new
 
+    def _prepare_inputs_points(self, multipliers_points, kwargs_points):
+        """
+        Modify at once the inputs of all points (e.g. of a scan), with the multipliers and keyword arguments
+        (TGLFsettings, extraOptions, ApplyCorrections, Quasineutral) that each point will use in _prepare_run_radii
+        """
+
+        rhos = kwargs_points[0].get("rhos", None)
+        inputs_array = TGLFinputArray.from_inputs(
+            self.inputsTGLF,
+            rhos=self.rhos if rhos is None else rhos,
+            points=len(multipliers_points),
+        )
+        inputs_array.modify(
+            TGLFsettings=kwargs_points[0].get("TGLFsettings", None),
+            extraOptions=[kwargs.get("extraOptions", {}) for kwargs in kwargs_points],
+            multipliers=multipliers_points,
+            ApplyCorrections=kwargs_points[0].get("ApplyCorrections", True),
+            Quasineutral=kwargs_points[0].get("Quasineutral", False),
+        )
+
+        return inputs_array
+
     def readScan(
         self, label="scan1", subFolderTGLF=None, variable="RLTS_1", positionIon=2
     ):
@@ -3154,21 +3372,44 @@ class TGLF:
 
         varUpDown = np.linspace(1 - variation, 1 + variation, resolutionPoints)
 
+        # Prepare all scans, to be submitted together
+        tglf_executor, tglf_executor_full, folders, varUpDowns = {}, {}, {}, {}
         for cont, variable in enumerate(self.variablesDrives):
             # Only ask the restart in the first round
             kwargs_TGLFrun["forceIfRestart"] = cont > 0 or (
                 "forceIfRestart" in kwargs_TGLFrun and kwargs_TGLFrun["forceIfRestart"]
             )
 
-            scan_name = f"{subFolderTGLF}_{variable}"  # e.g. turbDrives_RLTS_1
-
-            self.runScan(
-                subFolderTGLF=subFolderTGLF,
+            (
+                tglf_executor,
+                tglf_executor_full,
+                folders[variable],
+                varUpDowns[variable],
+            ) = self._prepare_scan(
+                subFolderTGLF,
                 variable=variable,
-                varUpDown=varUpDown,
+                varUpDown=copy.deepcopy(varUpDown),
+                tglf_executor=tglf_executor,
+                tglf_executor_full=tglf_executor_full,
                 **kwargs_TGLFrun,
             )
 
+        # Run them all
+        self._run(
+            tglf_executor,
+            tglf_executor_full=tglf_executor_full,
+            **kwargs_TGLFrun,
+        )
+
+        # Read results
+        for variable in self.variablesDrives:
+            for cont_mult, mult in enumerate(varUpDowns[variable]):
+                self.read(
+                    label=f"{self.subFolderTGLF_scan}_{variable}_{mult}",
+                    folder=folders[variable][cont_mult],
+                    restartWF=False,
+                )
+
             self.readScan(label=f"{subFolderTGLF}_{variable}", variable=variable)
 
     def plotScanTurbulenceDrives(
@@ -3777,50 +4018,34 @@ def changeANDwrite_TGLF(
     multipliers={},
     ApplyCorrections=True,
     Quasineutral=False,
+    inputs_array=None,
+    point=0,
 ):
     """
     Received inputs classes and gives text.
     ApplyCorrections refer to removing ions with too low density and that are fast species
-    """
 
-    inputs = copy.deepcopy(inputs0)
+    Modifications are done to all radii at once (TGLFinputArray). If inputs_array is provided, it is assumed
+    to be already modified (e.g. for all points of a scan) and only the files of this point are written.
+    """
 
-    modInputTGLF = {}
-    ns_max = []
-    for i, rho in enumerate(rhos):
-        print(f"\t- Changing input file for rho={rho:.4f}")
-        NS = inputs[rho].plasma["NS"]
-        inputTGLF_rho = GACODErun.modifyInputs(
-            inputs[rho],
-            Settings=TGLFsettings,
+    if inputs_array is None:
+        print(f"\t- Changing input files for rho={', '.join([f'{rho:.4f}' for rho in rhos])}")
+        inputs_array = TGLFinputArray.from_inputs(inputs0, rhos=rhos)
+        inputs_array.modify(
+            TGLFsettings=TGLFsettings,
             extraOptions=extraOptions,
             multipliers=multipliers,
-            position_change=i,
-            addControlFunction=GACODEdefaults.addTGLFcontrol,
-            NS=NS,
+            ApplyCorrections=ApplyCorrections,
+            Quasineutral=Quasineutral,
         )
+        point = 0
 
-        newfile = f"{FolderTGLF}/input.tglf_{rho:.4f}"
-
-        # Apply corrections
-        if ApplyCorrections:
-            print("\t- Applying corrections")
-            inputTGLF_rho.removeLowDensitySpecie()
-            inputTGLF_rho.removeFast()
-
-        # Ensure that plasma to run is quasineutral
-        if Quasineutral:
-            inputTGLF_rho.ensureQuasineutrality()
-
-        inputTGLF_rho.writeCurrentStatus(file=newfile)
-
-        modInputTGLF[rho] = inputTGLF_rho
-
-        ns_max.append(inputs[rho].plasma["NS"])
-
-    # Convert back to a string because that's how runTGLFproduction operates
-    inputFileTGLF = inputToVariable(FolderTGLF, rhos)
+    # Text is kept because that's how runTGLFproduction operates
+    inputFileTGLF = inputs_array.write(FolderTGLF, point=point)
+    modInputTGLF = inputs_array.to_TGLFinput(point=point)
 
+    ns_max = [modInputTGLF[rho].plasma["NS"] for rho in rhos]
     if (np.diff(ns_max) > 0).any():
         print(
             "> Each radial location has its own number of species... probably because of removal of fast or low density...",
@@ -4402,6 +4627,446 @@ class TGLFinput:
         ax.set_ylabel("Control Value")
 
 
+class TGLFinputArray:
+    """
+    TGLF inputs for several radii (and scan points) stored in stacked arrays, so that modifications are applied
+    at once to all of them and input files are written in a single pass, without text round-trips.
+
+        controls[var], plasma[var], geom[var]   -> [points, rhos]
+        species[var]                            -> [points, rhos, species] (species[var][...,0] are electrons)
+        num_species                             -> [points, rhos], number of species actually recorded
+
+    Variables whose values are all floats are stored in float arrays, and the rest (integers, booleans, strings)
+    in object arrays, so that values are written exactly as TGLFinput.writeCurrentStatus would do.
+    """
+
+    maxSpeciesTGLF = 6  # TGLF cannot handle more than 6 species
+
+    def __init__(self, rhos, points, controls, plasma, geom, species, species_vars, num_species):
+        self.rhos, self.points = list(rhos), points
+        self.controls, self.plasma, self.geom = controls, plasma, geom
+        self.species, self.species_vars = species, species_vars
+        self.num_species = num_species
+
+        self.text = None
+
+    @classmethod
+    def from_inputs(cls, inputs, rhos=None, points=1):
+        """
+        inputs is a dictionary of TGLFinput classes (one per rho), which are repeated for all scan points
+        """
+
+        if rhos is None:
+            rhos = list(inputs.keys())
+
+        def stack(values):
+            if np.all([type(value) is float for value in values]):
+                array = np.array(values, dtype=float)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            return np.repeat(array[np.newaxis, :], points, axis=0)
+
+        def stack_dicts(dicts):
+            keys = []
+            for d in dicts:
+                keys += [key for key in d if key not in keys]
+            return {key: stack([d.get(key, None) for d in dicts]) for key in keys}
+
+        controls = stack_dicts([inputs[rho].controls for rho in rhos])
+        plasma = stack_dicts([inputs[rho].plasma for rho in rhos])
+        geom = stack_dicts([inputs[rho].geom for rho in rhos])
+
+        num_species = np.repeat(
+            np.array([[len(inputs[rho].species) for rho in rhos]]), points, axis=0
+        )
+        species_max = int(num_species.max()) if num_species.size > 0 else 0
+
+        species_vars = []
+        for rho in rhos:
+            for ikey in inputs[rho].species:
+                species_vars += [var for var in inputs[rho].species[ikey] if var not in species_vars]
+
+        species = {}
+        for var in species_vars:
+            species[var] = np.stack(
+                [
+                    stack([inputs[rho].species.get(i + 1, {}).get(var, 0.0) for rho in rhos])
+                    for i in range(species_max)
+                ],
+                axis=-1,
+            ) if species_max > 0 else np.zeros((points, len(rhos), 0))
+
+        return cls(rhos, points, controls, plasma, geom, species, species_vars, num_species)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # Modifications (all radii and points at once)
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def _points(self, points):
+        return np.arange(self.points) if points is None else np.atleast_1d(points)
+
+    def _broadcast(self, value, points):
+        """
+        Scalar values apply to all points and radii, 1D values are per radius (as extraOptions in TGLF runs)
+        and 2D values are per point and radius
+        """
+        shape = (len(points), len(self.rhos))
+        if isinstance(value, (list, tuple, np.ndarray)):
+            value = np.array(value)
+            if value.ndim == 1:
+                value = value[np.newaxis, :]
+            return np.broadcast_to(value, shape)
+        else:
+            return np.full(shape, value, dtype=float if type(value) is float else object)
+
+    def _locate(self, ikey):
+        """
+        Where is this variable stored? Returns (dictionary, variable, species index or None)
+        """
+        if ikey.split("_")[0] in self.species:
+            return self.species, "_".join(ikey.split("_")[:-1]), int(ikey.split("_")[-1]) - 1
+        for group in [self.controls, self.geom, self.plasma]:
+            if ikey in group:
+                return group, ikey, None
+        return None, ikey, None
+
+    @staticmethod
+    def _get(group, var, points, ispecie=None):
+        return group[var][points] if ispecie is None else group[var][points, :, ispecie]
+
+    @staticmethod
+    def _assign(group, var, values, points, ispecie=None):
+        values = np.asarray(values)
+        if (group[var].dtype != object) and (values.dtype != float):
+            group[var] = group[var].astype(object)
+        if ispecie is None:
+            group[var][points] = values
+        else:
+            group[var][points, :, ispecie] = values
+
+    def apply_settings(self, TGLFsettings):
+        """
+        Controls are substituted by the preset TGLFsettings (they depend on the number of species of each run)
+        """
+
+        if TGLFsettings is None:
+            print(
+                "\t- Input file was not modified by Settings, using what was there before",
+                typeMsg="w",
+            )
+            return
+
+        NS = self.plasma["NS"]
+        options, labels = {}, {}
+        for value in set(NS.flatten().tolist()):
+            _, options[value], labels[value] = GACODEdefaults.addTGLFcontrol(TGLFsettings, NS=value)
+
+        print(f" \t- Using presets Settings = {TGLFsettings} ({labels[NS.flatten().tolist()[0]]})", typeMsg="i")
+
+        controls = {}
+        for value in options:
+            for ikey in options[value]:
+                if ikey not in controls:
+                    controls[ikey] = np.empty(NS.shape, dtype=object)
+        for ikey in controls:
+            for value in options:
+                controls[ikey][np.array(NS == value, dtype=bool)] = options[value].get(ikey, None)
+            if np.all([type(i) is float for i in controls[ikey].flatten()]):
+                controls[ikey] = controls[ikey].astype(float)
+        self.controls = controls
+        self.text = None
+
+    def apply_extraOptions(self, extraOptions, points=None):
+        """
+        Change variables to the values provided (values may be per radius or per point and radius),
+        for all points or only those indicated
+        """
+
+        GACODEdefaults.review_controls(extraOptions)
+        extraOptions = {ikey.upper(): value for ikey, value in extraOptions.items()}
+        points = self._points(points)
+
+        if len(extraOptions) > 0:
+            print("\t- External options:")
+        for ikey in extraOptions:
+            group, var, ispecie = self._locate(ikey)
+            values = self._broadcast(extraOptions[ikey], points)
+            if group is None:
+                # If the variable in extraOptions wasn't in there, consider it a control param
+                print(
+                    "\t\t- Variable to change did not exist previously, creating now",
+                    typeMsg="i",
+                )
+                self.controls[ikey] = np.empty((self.points, len(self.rhos)), dtype=object)
+                group = self.controls
+            self._assign(group, var, values, points, ispecie=ispecie)
+            print(f"\t\t- Changing {ikey} to {extraOptions[ikey]}", typeMsg="i")
+        self.text = None
+
+    def apply_multipliers(self, multipliers, points=None):
+        """
+        Multiply variables (multipliers may be scalars, per radius or per point and radius),
+        for all points or only those indicated
+        """
+
+        GACODEdefaults.review_controls(multipliers)
+        points = self._points(points)
+
+        if len(multipliers) > 0:
+            print("\t\t- Variables change:")
+        for ikey in multipliers:
+            group, var, ispecie = self._locate(ikey)
+            if group is None:
+                print(
+                    "\t- Variable to scan did not exist in original file, add it as extraOptions first",
+                    typeMsg="w",
+                )
+                continue
+            current = self._get(group, var, points, ispecie=ispecie)
+            self._assign(
+                group, var, current * self._broadcast(multipliers[ikey], points), points, ispecie=ispecie
+            )
+            print(f"\t\t\t- Changing {ikey} (x{multipliers[ikey]})", typeMsg="i")
+        self.text = None
+
+    def removeSpecies(self, remove, reason=""):
+        """
+        remove is a boolean array [points, rhos, species] with the species to remove, which are removed
+        from each run (reducing NS and NMODES) and the rest are shifted to keep them in order
+        """
+
+        remove = remove & (np.arange(remove.shape[-1]) < self.num_species[..., np.newaxis])
+        removed = remove.sum(axis=-1)
+        if removed.sum() == 0:
+            return
+
+        print(f"\t\t\t* {removed.sum()} species removed{reason}", typeMsg="w")
+
+        order = np.argsort(remove, axis=-1, kind="stable")
+        for var in self.species:
+            self.species[var] = np.take_along_axis(self.species[var], order, axis=-1)
+
+        self.num_species = self.num_species - removed
+        self.plasma["NS"] = self.plasma["NS"] - removed
+        if "NMODES" in self.controls:
+            self.controls["NMODES"] = self.controls["NMODES"] - removed
+        print(
+            f"\t\t\t* Total species to run TGLF reduced to {sorted(set(self.plasma['NS'].flatten().tolist()))}"
+        )
+        self.text = None
+
+    def fast_species(self, MinMultiplierToBeFast=2.0):
+        """
+        As in TGLFinput.processSpecies: beyond the main ion, species with MinMultiplierToBeFast times its temperature
+        """
+        TAUS = self.species["TAUS"].astype(float)
+        if TAUS.shape[-1] < 2:
+            return np.zeros(TAUS.shape, dtype=bool)
+        fast = TAUS >= MinMultiplierToBeFast * TAUS[..., 1:2]
+        fast[..., :2] = False
+        return fast
+
+    def removeLowDensitySpecie(self, minRelativeDensity=1e-8):
+        self.removeSpecies(
+            self.species["AS"].astype(float) < minRelativeDensity,
+            reason=" because too low density",
+        )
+
+    def removeFast(self):
+        self.removeSpecies(self.fast_species(), reason=" because they are not thermal species")
+
+    def ensureQuasineutrality(self):
+        MASS, ZS = self.species["MASS"], self.species["ZS"]
+
+        # First two ions are D and T?
+        mrat = np.zeros(self.num_species.shape)
+        if MASS.shape[-1] > 2:
+            m2, m3 = MASS[..., 1].astype(float), MASS[..., 2].astype(float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mrat = np.where(m2 > m3, m2 / m3, m3 / m2)
+        DT = (np.abs(mrat - 1.5) < 0.01) & (self.num_species > 2)
+        numMod = np.where(DT, 2, 1)
+
+        diff = self.calcualteQuasineutralityError()
+        print(f"\t- Oiriginal quasineutrality error (max): {np.abs(diff).max():.1e}", typeMsg="i")
+
+        AS, points = self.species["AS"], self._points(None)
+        self._assign(self.species, "AS", AS[..., 1] - diff / ZS[..., 1] / numMod, points, ispecie=1)
+        if MASS.shape[-1] > 2:
+            self._assign(
+                self.species,
+                "AS",
+                np.where(DT, AS[..., 2] - diff / ZS[..., 2] / numMod, AS[..., 2]),
+                points,
+                ispecie=2,
+            )
+
+        print(
+            f"\t- New quasineutrality error (max): {np.abs(self.calcualteQuasineutralityError()).max():.1e}",
+            typeMsg="i",
+        )
+        self.text = None
+
+    def calcualteQuasineutralityError(self):
+        fiZi = 0
+        for i in range(self.species["AS"].shape[-1]):
+            fiZi = fiZi + np.where(
+                i < self.num_species,
+                self.species["ZS"][..., i] * self.species["AS"][..., i],
+                0.0,
+            )
+        return fiZi
+
+    def modify(
+        self,
+        TGLFsettings=None,
+        extraOptions={},
+        multipliers={},
+        ApplyCorrections=True,
+        Quasineutral=False,
+    ):
+        """
+        Same modifications, and in the same order, as GACODErun.modifyInputs and changeANDwrite_TGLF,
+        for all radii and points at once.
+        extraOptions and multipliers can also be lists (one dictionary per point)
+        """
+
+        self.apply_settings(TGLFsettings)
+
+        for options, apply in zip(
+            [extraOptions, multipliers], [self.apply_extraOptions, self.apply_multipliers]
+        ):
+            if isinstance(options, dict):
+                apply(options)
+                continue
+
+            # Group the points that change each variable, to change them at once
+            keys = []
+            for options_point in options:
+                keys += [ikey for ikey in options_point if ikey not in keys]
+            for ikey in keys:
+                points = [p for p in range(len(options)) if ikey in options[p]]
+                values = [
+                    np.broadcast_to(options[p][ikey], (len(self.rhos),)) for p in points
+                ]
+                values = np.array(values, dtype=float if np.all([type(options[p][ikey]) is float for p in points]) else object)
+                apply({ikey: values}, points=points)
+
+        if ApplyCorrections:
+            print("\t- Applying corrections")
+            self.removeLowDensitySpecie()
+            self.removeFast()
+
+        # Ensure that plasma to run is quasineutral
+        if Quasineutral:
+            self.ensureQuasineutrality()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    # Output
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    def to_text(self):
+        """
+        Text of all input.tglf files, as text[point][rho] (same format as TGLFinput.writeCurrentStatus)
+        """
+
+        if self.text is not None:
+            return self.text
+
+        def lines(group, width=23):
+            return {
+                ikey: [[None if v is None else f"{ikey.ljust(width)} = {v}\n" for v in row] for row in group[ikey].tolist()]
+                for ikey in group
+            }
+
+        NS = [[np.min([v, self.maxSpeciesTGLF]) for v in row] for row in self.plasma["NS"].tolist()] if "NS" in self.plasma else None
+
+        controls, geom, plasma = lines(self.controls), lines(self.geom), lines(self.plasma)
+        species = {var: self.species[var].tolist() for var in self.species_vars}
+        fast = self.fast_species().tolist()
+
+        if self.num_species.max() > self.maxSpeciesTGLF:
+            print(
+                "\t- Maximum number of species in TGLF reached, not considering after {0} species".format(
+                    self.maxSpeciesTGLF
+                ),
+                typeMsg="w",
+            )
+
+        self.text = []
+        for p in range(self.points):
+            self.text.append({})
+            for r, rho in enumerate(self.rhos):
+                txt = [
+                    "#-------------------------------------------------------------------------\n",
+                    "# TGLF input file modified by MITIM framework (Rodriguez-Fernandez, 2020)\n",
+                    "#-------------------------------------------------------------------------",
+                    "\n\n# Control parameters\n",
+                    "# ------------------\n\n",
+                ]
+                txt += [controls[ikey][p][r] for ikey in controls if controls[ikey][p][r] is not None]
+                txt += ["\n\n# Geometry parameters\n", "# ------------------\n\n"]
+                txt += [geom[ikey][p][r] for ikey in geom if geom[ikey][p][r] is not None]
+                txt += ["\n\n# Plasma parameters\n", "# ------------------\n\n"]
+                for ikey in plasma:
+                    if plasma[ikey][p][r] is None:
+                        continue
+                    if ikey == "NS":
+                        txt.append(f"{ikey.ljust(23)} = {NS[p][r]}\n")
+                    else:
+                        txt.append(plasma[ikey][p][r])
+                txt += ["\n\n# Species\n", "# -------\n"]
+                for i in range(min(self.num_species[p, r], self.maxSpeciesTGLF)):
+                    if i == 0:
+                        extralab = " (electrons)"
+                    elif fast[p][r][i]:
+                        extralab = " (fast ion)"
+                    else:
+                        extralab = " (thermal ion)"
+                    txt.append(f"\n# Specie #{i+1}{extralab}\n")
+                    for var in self.species_vars:
+                        ikar = f"{var}_{i+1}"
+                        txt.append(f"{ikar.ljust(12)} = {species[var][p][r][i]}\n")
+
+                self.text[p][rho] = "".join(txt)
+
+        return self.text
+
+    def write(self, folder, point=0):
+        """
+        Write input.tglf_{rho} files of this point in folder and return the texts as dictionary with rhos
+        """
+
+        text = self.to_text()[point]
+        for rho in text:
+            with open(f"{folder}/input.tglf_{rho:.4f}", "w") as f:
+                f.write(text[rho])
+        print(f"\t\t~ {len(text)} files written in {IOtools.clipstr(folder)}", verbose=verbose_level)
+
+        return text
+
+    def to_TGLFinput(self, point=0):
+        """
+        TGLFinput classes of this point, as dictionary with rhos
+        """
+
+        inputs = {}
+        for r, rho in enumerate(self.rhos):
+            input_dict = {}
+            for group in [self.controls, self.geom, self.plasma]:
+                for ikey in group:
+                    if group[ikey][point, r] is not None:
+                        input_dict[ikey] = group[ikey][point, r].item() if group[ikey].dtype != object else group[ikey][point, r]
+            for i in range(self.num_species[point, r]):
+                for var in self.species_vars:
+                    value = self.species[var][point, r, i]
+                    input_dict[f"{var}_{i+1}"] = value.item() if self.species[var].dtype != object else value
+            inputs[rho] = TGLFinput.initialize_in_memory(input_dict)
+
+        return inputs
+
+
 def identifySpecie(dict_species, dict_find):
     found_index = None
     for ikey in dict_species:
@@ -4446,13 +5111,16 @@ def readTGLFresults(
     convolution_fun_fluct=None,
     factorTot_to_Perp=1.0,
     suffix=None,
+    files=None,
 ):
     TGLFstd_TGLFout, inputclasses, parsed = [], [], []
 
     for rho in rhos:
         # Read full folder
         TGLFout = TGLFoutput(
-            FolderGACODE_tmp, suffix=f"_{rho:.4f}" if suffix is None else suffix
+            FolderGACODE_tmp,
+            suffix=f"_{rho:.4f}" if suffix is None else suffix,
+            files=files,
         )
 
         # Unnormalize
@@ -4480,8 +5148,30 @@ def readTGLFresults(
 
 
 class TGLFoutput:
-    def __init__(self, FolderGACODE, suffix=""):
+    # Files (out.tglf.*) that must be read before each one, to know its dimensions or to process it
+    files_dependencies = {
+        "gbflux": [],
+        "ky_spectrum": [],
+        "eigenvalue_spectrum": ["ky_spectrum"],
+        "width_spectrum": [],
+        "spectral_shift_spectrum": [],
+        "ave_p0_spectrum": [],
+        "temperature_spectrum": ["ky_spectrum", "density_spectrum"],
+        "density_spectrum": ["ky_spectrum", "temperature_spectrum"],
+        "nsts_crossphase_spectrum": ["temperature_spectrum"],
+        "field_spectrum": ["eigenvalue_spectrum"],
+        "sum_flux_spectrum": ["temperature_spectrum", "field_spectrum"],
+        "QL_flux_spectrum": ["temperature_spectrum", "field_spectrum"],
+        "intensity_spectrum": ["temperature_spectrum", "eigenvalue_spectrum"],
+    }
+
+    def __init__(self, FolderGACODE, suffix="", files=None):
+        """
+        files can be a list with the out.tglf.* files to read (e.g. ["gbflux"] to read only fluxes), together
+        with those they depend on. If None, read all of them
+        """
         self.FolderGACODE, self.suffix = FolderGACODE, suffix
+        self.files = self.resolve_files(files)
 
         if suffix == "":
             print(
@@ -4498,28 +5188,48 @@ class TGLFoutput:
         self.read()
         self.postprocess()
 
-        print(
-            f"\t- TGLF was run with {self.num_species} species, {self.num_nmodes} modes, {self.num_fields} field(s) ({', '.join(self.fields)}), {self.num_ky} wavenumbers",
-        )
+        if {"temperature_spectrum", "field_spectrum"}.issubset(self.files):
+            print(
+                f"\t- TGLF was run with {self.num_species} species, {self.num_nmodes} modes, {self.num_fields} field(s) ({', '.join(self.fields)}), {self.num_ky} wavenumbers",
+            )
+
+    @classmethod
+    def resolve_files(cls, files=None):
+        if files is None:
+            return set(cls.files_dependencies.keys())
+
+        files_resolved = set()
+        files_pending = list(files)
+        while len(files_pending) > 0:
+            file = files_pending.pop()
+            if file not in cls.files_dependencies:
+                raise Exception(f"[MITIM] TGLF output file out.tglf.{file} cannot be read")
+            if file not in files_resolved:
+                files_resolved.add(file)
+                files_pending.extend(cls.files_dependencies[file])
+
+        return files_resolved
 
     def postprocess(self):
-        coeff, klow = 0.0, 0.8
-        self.etas = processGrowthRates(
-            self.ky,
-            self.g[0, :],
-            self.f[0, :],
-            self.g[1:, :].transpose((1, 0)),
-            self.f[1:, :].transpose((1, 0)),
-            klow=klow,
-            coeff=coeff,
-        )
+        if "eigenvalue_spectrum" in self.files:
+            coeff, klow = 0.0, 0.8
+            self.etas = processGrowthRates(
+                self.ky,
+                self.g[0, :],
+                self.f[0, :],
+                self.g[1:, :].transpose((1, 0)),
+                self.f[1:, :].transpose((1, 0)),
+                klow=klow,
+                coeff=coeff,
+            )
 
-        self.QeES = np.sum(self.SumFlux_Qe_phi)
-        self.QeEM = np.sum(self.SumFlux_Qe_a)
-        self.QiES = np.sum(self.SumFlux_Qi_phi)
-        self.QiEM = np.sum(self.SumFlux_Qi_a)
-        self.GeES = np.sum(self.SumFlux_Ge_phi)
-        self.GeEM = np.sum(self.SumFlux_Ge_a)
+        if "sum_flux_spectrum" in self.files:
+            self.QeES = np.sum(self.SumFlux_Qe_phi)
+            self.QeEM = np.sum(self.SumFlux_Qe_a)
+            self.QiES = np.sum(self.SumFlux_Qi_phi)
+            self.QiEM = np.sum(self.SumFlux_Qi_a)
+            self.GeES = np.sum(self.SumFlux_Ge_phi)
+            self.GeEM = np.sum(self.SumFlux_Ge_a)
 
     def read(self):
         # --------------------------------------------------------------------------------
@@ -4532,372 +5242,367 @@ class TGLFoutput:
             else []
         )
         self.ions_included = (1,) + tuple(IncludeExtraIonsInQi)
+        sum_ions = tuple([i - 1 for i in self.ions_included])
+
+        num_quantities = (
+            5  # particle flux,energy flux,toroidal stress,parallel stress,exchange
+        )
 
         # ------------------------------------------------------------------------
         # Fluxes
         # ------------------------------------------------------------------------
 
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.gbflux" + self.suffix,
-            blocks=1,
-            columns=1,
-            numky=None,
-        )
+        if "gbflux" in self.files:
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.gbflux" + self.suffix,
+                blocks=1,
+                columns=1,
+                numky=None,
+            )
 
-        data = np.reshape(data, (4, data.shape[1] // 4))  # [quantiy=G,Q,P,S; specie]
+            data = np.reshape(data, (4, data.shape[1] // 4))  # [quantiy=G,Q,P,S; specie]
 
-        self.Ge = data[0, 0]
-        self.Qe = data[1, 0]
+            self.Ge = data[0, 0]
+            self.Qe = data[1, 0]
 
-        self.GiAll = data[0, 1:]
-        self.QiAll = data[1, 1:]
+            self.GiAll = data[0, 1:]
+            self.QiAll = data[1, 1:]
 
-        print(
-            f"\t\t- For Qi, summing contributions from ions {self.ions_included} (#0 is e-)",
-            typeMsg="i",
-        )
-        self.Gi = data[0, self.ions_included].sum()
-        self.Qi = data[1, self.ions_included].sum()
+            print(
+                f"\t\t- For Qi, summing contributions from ions {self.ions_included} (#0 is e-)",
+                typeMsg="i",
+            )
+            self.Gi = data[0, self.ions_included].sum()
+            self.Qi = data[1, self.ions_included].sum()
 
         # ------------------------------------------------------------------------
         # Growth rates
         # ------------------------------------------------------------------------
 
-        # Wavenumber grid
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.ky_spectrum" + self.suffix,
-            blocks=1,
-            columns=1,
-            numky=None,
-        )
-        self.ky = data[0, :, 0]
+        if "ky_spectrum" in self.files:
+            # Wavenumber grid
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.ky_spectrum" + self.suffix,
+                blocks=1,
+                columns=1,
+                numky=None,
+            )
+            self.ky = data[0, :, 0]
 
-        self.num_ky = self.ky.shape[0]
+            self.num_ky = self.ky.shape[0]
 
-        # Linear stability
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.eigenvalue_spectrum" + self.suffix,
-            blocks=1,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "eigenvalue_spectrum" in self.files:
+            # Linear stability
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.eigenvalue_spectrum" + self.suffix,
+                blocks=1,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        self.num_nmodes = int(data.shape[-1] / 2)
+            self.num_nmodes = int(data.shape[-1] / 2)
 
-        # Using my convention of [quantity=g,f,nmode,ky]
-        self.Eigenvalues = (
-            data[0, :, :]
-            .reshape((self.num_ky, self.num_nmodes, 2))
-            .transpose((2, 1, 0))
-        )
+            # Using my convention of [quantity=g,f,nmode,ky]
+            self.Eigenvalues = (
+                data[0, :, :]
+                .reshape((self.num_ky, self.num_nmodes, 2))
+                .transpose((2, 1, 0))
+            )
 
-        self.g = self.Eigenvalues[0, :, :]
-        self.f = self.Eigenvalues[1, :, :]
+            self.g = self.Eigenvalues[0, :, :]
+            self.f = self.Eigenvalues[1, :, :]
 
         # ------------------------------------------------------------------------
         # TGLF model
         # ------------------------------------------------------------------------
 
-        width = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.width_spectrum" + self.suffix,
-            blocks=1,
-            columns=1,
-            numky=None,
-        )
-        spectral_shift = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.spectral_shift_spectrum" + self.suffix,
-            blocks=1,
-            columns=1,
-            numky=None,
-        )
-        ave_p0 = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.ave_p0_spectrum" + self.suffix,
-            blocks=1,
-            columns=1,
-            numky=None,
-        )
-
-        self.tglf_model = {
-            "width": width[0, :, 0],
-            "spectral_shift": spectral_shift[0, :, 0],
-            "ave_p0": ave_p0[0, :, 0],
-        }
+        self.tglf_model = {}
+        for quantity in ["width", "spectral_shift", "ave_p0"]:
+            if f"{quantity}_spectrum" in self.files:
+                data = GACODEinterpret.TGLFreader(
+                    self.FolderGACODE + f"out.tglf.{quantity}_spectrum" + self.suffix,
+                    blocks=1,
+                    columns=1,
+                    numky=None,
+                )
+                self.tglf_model[quantity] = data[0, :, 0]
 
         # ------------------------------------------------------------------------
         # Fluctuation Spectrum
         # ------------------------------------------------------------------------
 
-        dataT = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.temperature_spectrum" + self.suffix,
-            blocks=1,
-            columns=None,
-            numky=self.num_ky,
-        )
-        datan = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.density_spectrum" + self.suffix,
-            blocks=1,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "temperature_spectrum" in self.files:
+            dataT = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.temperature_spectrum" + self.suffix,
+                blocks=1,
+                columns=None,
+                numky=self.num_ky,
+            )
+            datan = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.density_spectrum" + self.suffix,
+                blocks=1,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        # Using my convention of [quantity=(T,n,nT),species,ky]
-        self.AmplitudeSpectrum = np.append(dataT, datan, axis=0).transpose((0, 2, 1))
+            # Using my convention of [quantity=(T,n,nT),species,ky]
+            self.AmplitudeSpectrum = np.append(dataT, datan, axis=0).transpose((0, 2, 1))
 
-        self.num_species = self.AmplitudeSpectrum.shape[1]
+            self.num_species = self.AmplitudeSpectrum.shape[1]
 
-        self.AmplitudeSpectrum_Te = self.AmplitudeSpectrum[0, 0, :]
-        self.AmplitudeSpectrum_Ti = self.AmplitudeSpectrum[0, 1:, :]
+            self.AmplitudeSpectrum_Te = self.AmplitudeSpectrum[0, 0, :]
+            self.AmplitudeSpectrum_Ti = self.AmplitudeSpectrum[0, 1:, :]
 
-        self.AmplitudeSpectrum_ne = self.AmplitudeSpectrum[1, 0, :]
-        self.AmplitudeSpectrum_ni = self.AmplitudeSpectrum[1, 1:, :]
+            self.AmplitudeSpectrum_ne = self.AmplitudeSpectrum[1, 0, :]
+            self.AmplitudeSpectrum_ni = self.AmplitudeSpectrum[1, 1:, :]
 
         # ------------------------------------------------------------------------
         # Cross Phase Spectrum
         # ------------------------------------------------------------------------
 
-        datanT = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.nsts_crossphase_spectrum" + self.suffix,
-            blocks=self.num_species,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "nsts_crossphase_spectrum" in self.files:
+            datanT = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.nsts_crossphase_spectrum" + self.suffix,
+                blocks=self.num_species,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        # Using my convention of [species,nmode,ky]
-        self.nTSpectrum = datanT.transpose((0, 2, 1)) * 180 / (np.pi)
+            # Using my convention of [species,nmode,ky]
+            self.nTSpectrum = datanT.transpose((0, 2, 1)) * 180 / (np.pi)
 
-        self.neTeSpectrum = self.nTSpectrum[0, :, :]
-        self.niTiSpectrum = self.nTSpectrum[1:, :, :]
+            self.neTeSpectrum = self.nTSpectrum[0, :, :]
+            self.niTiSpectrum = self.nTSpectrum[1:, :, :]
 
         # ----------------------------------------------------------------------------------------
         # Field Spectrum (gyro-bohm normalized field fluctuation intensity spectra per mode)
         # ----------------------------------------------------------------------------------------
 
-        # phi*nmodes, apar*nmods, aper*nmodes
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.field_spectrum" + self.suffix,
-            blocks=1,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "field_spectrum" in self.files:
+            # phi*nmodes, apar*nmods, aper*nmodes
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.field_spectrum" + self.suffix,
+                blocks=1,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        # Using my convention of [quantity,nmode,ky]
-        self.FieldSpectrum = np.zeros((4, self.num_nmodes, self.num_ky))
-        for i in range(self.num_nmodes):
-            self.FieldSpectrum[0, i] = data[0, :, 4 * i + 0]
-            self.FieldSpectrum[1, i] = data[0, :, 4 * i + 1]
-            self.FieldSpectrum[2, i] = data[0, :, 4 * i + 2]
-            self.FieldSpectrum[3, i] = data[0, :, 4 * i + 3]
-        # *************************************************
-
-        self.v_spectrum = self.FieldSpectrum[0, :, :]
-        self.phi_spectrum = self.FieldSpectrum[1, :, :]
-        self.a_par_spectrum = self.FieldSpectrum[2, :, :]
-        self.a_per_spectrum = self.FieldSpectrum[3, :, :]
-
-        with open(
-            self.FolderGACODE + "out.tglf.field_spectrum" + self.suffix, "r"
-        ) as f:
-            aux = f.readlines()
-        self.fields = ["phi"]
-        if aux[4].split()[0].split("_")[-1] == "yes":
-            self.fields.append("a_par")
-        if aux[5].split()[0].split("_")[-1] == "yes":
-            self.fields.append("a_per")
-
-        # Because if APAR is False and APER is True, it still conserves the spot for APAR, but not the opposite
-        self.num_fields = len(self.fields)
+            # Using my convention of [quantity,nmode,ky]
+            self.FieldSpectrum = np.zeros((4, self.num_nmodes, self.num_ky))
+            for i in range(self.num_nmodes):
+                self.FieldSpectrum[0, i] = data[0, :, 4 * i + 0]
+                self.FieldSpectrum[1, i] = data[0, :, 4 * i + 1]
+                self.FieldSpectrum[2, i] = data[0, :, 4 * i + 2]
+                self.FieldSpectrum[3, i] = data[0, :, 4 * i + 3]
+            # *************************************************
+
+            self.v_spectrum = self.FieldSpectrum[0, :, :]
+            self.phi_spectrum = self.FieldSpectrum[1, :, :]
+            self.a_par_spectrum = self.FieldSpectrum[2, :, :]
+            self.a_per_spectrum = self.FieldSpectrum[3, :, :]
+
+            with open(
+                self.FolderGACODE + "out.tglf.field_spectrum" + self.suffix, "r"
+            ) as f:
+                aux = f.readlines()
+            self.fields = ["phi"]
+            if aux[4].split()[0].split("_")[-1] == "yes":
+                self.fields.append("a_par")
+            if aux[5].split()[0].split("_")[-1] == "yes":
+                self.fields.append("a_per")
+
+            # Because if APAR is False and APER is True, it still conserves the spot for APAR, but not the opposite
+            self.num_fields = len(self.fields)
 
         # ------------------------------------------------------------------------
         # Flux Spectrum  -   SumFluxSpectrum [quantity,species,field,ky]
         # ------------------------------------------------------------------------
 
-        # data [specie*field, ky, quantity]
-        num_quantities = (
-            5  # particle flux,energy flux,toroidal stress,parallel stress,exchange
-        )
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.sum_flux_spectrum" + self.suffix,
-            blocks=None,
-            columns=num_quantities,
-            numky=self.num_ky,
-        )
-
-        # self.num_fields = int(data.shape[0]/self.num_species)
+        if "sum_flux_spectrum" in self.files:
+            # data [specie*field, ky, quantity]
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.sum_flux_spectrum" + self.suffix,
+                blocks=None,
+                columns=num_quantities,
+                numky=self.num_ky,
+            )
 
-        # Re-arrange to separa specie and field [species, field, ky, quantity]
-        data_re = np.reshape(
-            data, (self.num_species, self.num_fields, self.num_ky, num_quantities)
-        )
+            # self.num_fields = int(data.shape[0]/self.num_species)
 
-        # Using my convention of [quantity,species,field,ky]
-        self.SumFluxSpectrum = data_re.transpose((3, 0, 1, 2))
-        # *************************************************
+            # Re-arrange to separa specie and field [species, field, ky, quantity]
+            data_re = np.reshape(
+                data, (self.num_species, self.num_fields, self.num_ky, num_quantities)
+            )
 
-        self.SumFlux_Qe_phi = self.SumFluxSpectrum[1, 0, 0, :]
-        self.SumFlux_Ge_phi = self.SumFluxSpectrum[0, 0, 0, :]
-        self.SumFlux_QiAll_phi = self.SumFluxSpectrum[1, 1:, 0, :]
+            # Using my convention of [quantity,species,field,ky]
+            self.SumFluxSpectrum = data_re.transpose((3, 0, 1, 2))
+            # *************************************************
 
-        contF = 0
-        if "a_par" in self.fields:
-            self.SumFlux_Qe_a_par = self.SumFluxSpectrum[1, 0, 1 + contF, :]
-            self.SumFlux_Ge_a_par = self.SumFluxSpectrum[0, 0, 1 + contF, :]
-            self.SumFlux_QiAll_a_par = self.SumFluxSpectrum[1, 1:, 1 + contF, :]
-            contF += 1
-        else:
-            self.SumFlux_Qe_a_par = self.SumFlux_Qe_phi * 0.0
-            self.SumFlux_Ge_a_par = self.SumFlux_Ge_phi * 0.0
-            self.SumFlux_QiAll_a_par = self.SumFlux_QiAll_phi * 0.0
-
-        if "a_per" in self.fields:
-            self.SumFlux_Qe_a_per = self.SumFluxSpectrum[1, 0, 1 + contF, :]
-            self.SumFlux_Ge_a_per = self.SumFluxSpectrum[0, 0, 1 + contF, :]
-            self.SumFlux_QiAll_a_per = self.SumFluxSpectrum[1, 1:, 1 + contF, :]
-            contF += 1
-        else:
-            self.SumFlux_Qe_a_per = self.SumFlux_Qe_phi * 0.0
-            self.SumFlux_Ge_a_per = self.SumFlux_Ge_phi * 0.0
-            self.SumFlux_QiAll_a_per = self.SumFlux_QiAll_phi * 0.0
+            self.SumFlux_Qe_phi = self.SumFluxSpectrum[1, 0, 0, :]
+            self.SumFlux_Ge_phi = self.SumFluxSpectrum[0, 0, 0, :]
+            self.SumFlux_QiAll_phi = self.SumFluxSpectrum[1, 1:, 0, :]
 
-        self.SumFlux_Qe_a = self.SumFlux_Qe_a_par + self.SumFlux_Qe_a_per
-        self.SumFlux_Ge_a = self.SumFlux_Ge_a_par + self.SumFlux_Ge_a_per
-        self.SumFlux_QiAll_a = self.SumFlux_QiAll_a_par + self.SumFlux_QiAll_a_per
+            contF = 0
+            if "a_par" in self.fields:
+                self.SumFlux_Qe_a_par = self.SumFluxSpectrum[1, 0, 1 + contF, :]
+                self.SumFlux_Ge_a_par = self.SumFluxSpectrum[0, 0, 1 + contF, :]
+                self.SumFlux_QiAll_a_par = self.SumFluxSpectrum[1, 1:, 1 + contF, :]
+                contF += 1
+            else:
+                self.SumFlux_Qe_a_par = self.SumFlux_Qe_phi * 0.0
+                self.SumFlux_Ge_a_par = self.SumFlux_Ge_phi * 0.0
+                self.SumFlux_QiAll_a_par = self.SumFlux_QiAll_phi * 0.0
+
+            if "a_per" in self.fields:
+                self.SumFlux_Qe_a_per = self.SumFluxSpectrum[1, 0, 1 + contF, :]
+                self.SumFlux_Ge_a_per = self.SumFluxSpectrum[0, 0, 1 + contF, :]
+                self.SumFlux_QiAll_a_per = self.SumFluxSpectrum[1, 1:, 1 + contF, :]
+                contF += 1
+            else:
+                self.SumFlux_Qe_a_per = self.SumFlux_Qe_phi * 0.0
+                self.SumFlux_Ge_a_per = self.SumFlux_Ge_phi * 0.0
+                self.SumFlux_QiAll_a_per = self.SumFlux_QiAll_phi * 0.0
 
-        self.SumFlux_Qe = self.SumFlux_Qe_phi + self.SumFlux_Qe_a
-        self.SumFlux_Ge = self.SumFlux_Ge_phi + self.SumFlux_Ge_a
-        self.SumFlux_QiAll = self.SumFlux_QiAll_phi + self.SumFlux_QiAll_a
+            self.SumFlux_Qe_a = self.SumFlux_Qe_a_par + self.SumFlux_Qe_a_per
+            self.SumFlux_Ge_a = self.SumFlux_Ge_a_par + self.SumFlux_Ge_a_per
+            self.SumFlux_QiAll_a = self.SumFlux_QiAll_a_par + self.SumFlux_QiAll_a_per
 
-        # Sum ion contributions
+            self.SumFlux_Qe = self.SumFlux_Qe_phi + self.SumFlux_Qe_a
+            self.SumFlux_Ge = self.SumFlux_Ge_phi + self.SumFlux_Ge_a
+            self.SumFlux_QiAll = self.SumFlux_QiAll_phi + self.SumFlux_QiAll_a
 
-        print(
-            f"\t\t- For Qi spectrum, summing contributions from ions {self.ions_included} (#0 is e-)",
-            typeMsg="i",
-        )
-        sum_ions = tuple([i - 1 for i in self.ions_included])
+            # Sum ion contributions
 
-        self.SumFlux_Qi_phi = self.SumFlux_QiAll_phi[sum_ions, :].sum(axis=0)
-        self.SumFlux_Qi_a = self.SumFlux_QiAll_a[sum_ions, :].sum(axis=0)
-        self.SumFlux_Qi = self.SumFlux_Qi_phi + self.SumFlux_Qi_a
+            print(
+                f"\t\t- For Qi spectrum, summing contributions from ions {self.ions_included} (#0 is e-)",
+                typeMsg="i",
+            )
+            self.SumFlux_Qi_phi = self.SumFlux_QiAll_phi[sum_ions, :].sum(axis=0)
+            self.SumFlux_Qi_a = self.SumFlux_QiAll_a[sum_ions, :].sum(axis=0)
+            self.SumFlux_Qi = self.SumFlux_Qi_phi + self.SumFlux_Qi_a
 
         # ------------------------------------------------------------------------
         # QL Flux Spectrum (QL weights per mode)
         # ------------------------------------------------------------------------
 
-        # particle flux,energy flux,toroidal stress,parallel stress,exchange (?)
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.QL_flux_spectrum" + self.suffix,
-            blocks=self.num_species * self.num_fields * self.num_nmodes,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "QL_flux_spectrum" in self.files:
+            # particle flux,energy flux,toroidal stress,parallel stress,exchange (?)
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.QL_flux_spectrum" + self.suffix,
+                blocks=self.num_species * self.num_fields * self.num_nmodes,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        # Re-arrange to separa specie and field
+            # Re-arrange to separa specie and field
 
-        data_re = np.reshape(
-            data,
-            (
-                self.num_species,
-                self.num_fields,
-                self.num_nmodes,
-                self.num_ky,
-                num_quantities,
-            ),
-            order="C",
-        )
+            data_re = np.reshape(
+                data,
+                (
+                    self.num_species,
+                    self.num_fields,
+                    self.num_nmodes,
+                    self.num_ky,
+                    num_quantities,
+                ),
+                order="C",
+            )
 
-        # Using my convention of [quantity,species,field,nmode,ky]
-        self.QLFluxSpectrum = data_re.transpose((4, 0, 1, 2, 3))
-        # *************************************************
-
-        self.QLFluxSpectrum_Ge_phi = self.QLFluxSpectrum[0, 0, 0, :, :]
-        self.QLFluxSpectrum_Qe_phi = self.QLFluxSpectrum[1, 0, 0, :, :]
-
-        self.QLFluxSpectrum_GiAll_phi = self.QLFluxSpectrum[0, 1:, 0, :, :]
-        self.QLFluxSpectrum_Gi_phi = self.QLFluxSpectrum_GiAll_phi[sum_ions, :].sum(
-            axis=0
-        )  # Sum over ions
-        self.QLFluxSpectrum_QiAll_phi = self.QLFluxSpectrum[1, 1:, 0, :, :]
-        self.QLFluxSpectrum_Qi_phi = self.QLFluxSpectrum_QiAll_phi[sum_ions, :].sum(
-            axis=0
-        )  # Sum over ions
-
-        contF = 1
-        if "a_par" in self.fields:
-            self.QLFluxSpectrum_Ge_a_par = self.QLFluxSpectrum[0, 0, 1, :, :]
-            self.QLFluxSpectrum_Qe_a_par = self.QLFluxSpectrum[1, 0, 1, :, :]
-
-            self.QLFluxSpectrum_GiAll_a_par = self.QLFluxSpectrum[0, 1:, 1, :, :]
-            self.QLFluxSpectrum_Gi_a_par = self.QLFluxSpectrum_GiAll_a_par[
-                sum_ions, :
-            ].sum(
-                axis=0
-            )  # Sum over ions
-            self.QLFluxSpectrum_QiAll_a_par = self.QLFluxSpectrum[1, 1:, 1, :, :]
-            self.QLFluxSpectrum_Qi_a_par = self.QLFluxSpectrum_QiAll_a_par[
-                sum_ions, :
-            ].sum(
-                axis=0
-            )  # Sum over ions
-            contF += 1
-        else:
-            self.QLFluxSpectrum_Ge_a_par = self.QLFluxSpectrum_Ge_phi * 0.0
-            self.QLFluxSpectrum_Qe_a_par = self.QLFluxSpectrum_Qe_phi * 0.0
-
-            self.QLFluxSpectrum_GiAll_a_par = self.QLFluxSpectrum_QiAll_phi * 0.0
-            self.QLFluxSpectrum_Gi_a_par = self.QLFluxSpectrum_Qi_phi * 0.0
-            self.QLFluxSpectrum_QiAll_a_par = self.QLFluxSpectrum_QiAll_phi * 0.0
-            self.QLFluxSpectrum_Qi_a_par = self.QLFluxSpectrum_Qi_phi * 0.0
-
-        if "a_per" in self.fields:
-            self.QLFluxSpectrum_Ge_a_per = self.QLFluxSpectrum[0, 0, 2, :, :]
-            self.QLFluxSpectrum_Qe_a_per = self.QLFluxSpectrum[1, 0, 2, :, :]
-
-            self.QLFluxSpectrum_GiAll_a_per = self.QLFluxSpectrum[0, 1:, 2, :, :]
-            self.QLFluxSpectrum_Gi_a_per = self.QLFluxSpectrum_GiAll_a_per[
-                sum_ions, :
-            ].sum(
+            # Using my convention of [quantity,species,field,nmode,ky]
+            self.QLFluxSpectrum = data_re.transpose((4, 0, 1, 2, 3))
+            # *************************************************
+
+            self.QLFluxSpectrum_Ge_phi = self.QLFluxSpectrum[0, 0, 0, :, :]
+            self.QLFluxSpectrum_Qe_phi = self.QLFluxSpectrum[1, 0, 0, :, :]
+
+            self.QLFluxSpectrum_GiAll_phi = self.QLFluxSpectrum[0, 1:, 0, :, :]
+            self.QLFluxSpectrum_Gi_phi = self.QLFluxSpectrum_GiAll_phi[sum_ions, :].sum(
                 axis=0
             )  # Sum over ions
-            self.QLFluxSpectrum_QiAll_a_per = self.QLFluxSpectrum[1, 1:, 2, :, :]
-            self.QLFluxSpectrum_Qi_a_per = self.QLFluxSpectrum_QiAll_a_per[
-                sum_ions, :
-            ].sum(
+            self.QLFluxSpectrum_QiAll_phi = self.QLFluxSpectrum[1, 1:, 0, :, :]
+            self.QLFluxSpectrum_Qi_phi = self.QLFluxSpectrum_QiAll_phi[sum_ions, :].sum(
                 axis=0
             )  # Sum over ions
-            contF += 1
-        else:
-            self.QLFluxSpectrum_Ge_a_per = self.QLFluxSpectrum_Ge_phi * 0.0
-            self.QLFluxSpectrum_Qe_a_per = self.QLFluxSpectrum_Qe_phi * 0.0
 
-            self.QLFluxSpectrum_GiAll_a_per = self.QLFluxSpectrum_GiAll_phi * 0.0
-            self.QLFluxSpectrum_Gi_a_per = self.QLFluxSpectrum_Gi_phi * 0.0
-            self.QLFluxSpectrum_QiAll_a_per = self.QLFluxSpectrum_QiAll_phi * 0.0
-            self.QLFluxSpectrum_Qi_a_per = self.QLFluxSpectrum_Qi_phi * 0.0
+            contF = 1
+            if "a_par" in self.fields:
+                self.QLFluxSpectrum_Ge_a_par = self.QLFluxSpectrum[0, 0, 1, :, :]
+                self.QLFluxSpectrum_Qe_a_par = self.QLFluxSpectrum[1, 0, 1, :, :]
+
+                self.QLFluxSpectrum_GiAll_a_par = self.QLFluxSpectrum[0, 1:, 1, :, :]
+                self.QLFluxSpectrum_Gi_a_par = self.QLFluxSpectrum_GiAll_a_par[
+                    sum_ions, :
+                ].sum(
+                    axis=0
+                )  # Sum over ions
+                self.QLFluxSpectrum_QiAll_a_par = self.QLFluxSpectrum[1, 1:, 1, :, :]
+                self.QLFluxSpectrum_Qi_a_par = self.QLFluxSpectrum_QiAll_a_par[
+                    sum_ions, :
+                ].sum(
+                    axis=0
+                )  # Sum over ions
+                contF += 1
+            else:
+                self.QLFluxSpectrum_Ge_a_par = self.QLFluxSpectrum_Ge_phi * 0.0
+                self.QLFluxSpectrum_Qe_a_par = self.QLFluxSpectrum_Qe_phi * 0.0
+
+                self.QLFluxSpectrum_GiAll_a_par = self.QLFluxSpectrum_QiAll_phi * 0.0
+                self.QLFluxSpectrum_Gi_a_par = self.QLFluxSpectrum_Qi_phi * 0.0
+                self.QLFluxSpectrum_QiAll_a_par = self.QLFluxSpectrum_QiAll_phi * 0.0
+                self.QLFluxSpectrum_Qi_a_par = self.QLFluxSpectrum_Qi_phi * 0.0
+
+            if "a_per" in self.fields:
+                self.QLFluxSpectrum_Ge_a_per = self.QLFluxSpectrum[0, 0, 2, :, :]
+                self.QLFluxSpectrum_Qe_a_per = self.QLFluxSpectrum[1, 0, 2, :, :]
+
+                self.QLFluxSpectrum_GiAll_a_per = self.QLFluxSpectrum[0, 1:, 2, :, :]
+                self.QLFluxSpectrum_Gi_a_per = self.QLFluxSpectrum_GiAll_a_per[
+                    sum_ions, :
+                ].sum(
+                    axis=0
+                )  # Sum over ions
+                self.QLFluxSpectrum_QiAll_a_per = self.QLFluxSpectrum[1, 1:, 2, :, :]
+                self.QLFluxSpectrum_Qi_a_per = self.QLFluxSpectrum_QiAll_a_per[
+                    sum_ions, :
+                ].sum(
+                    axis=0
+                )  # Sum over ions
+                contF += 1
+            else:
+                self.QLFluxSpectrum_Ge_a_per = self.QLFluxSpectrum_Ge_phi * 0.0
+                self.QLFluxSpectrum_Qe_a_per = self.QLFluxSpectrum_Qe_phi * 0.0
+
+                self.QLFluxSpectrum_GiAll_a_per = self.QLFluxSpectrum_GiAll_phi * 0.0
+                self.QLFluxSpectrum_Gi_a_per = self.QLFluxSpectrum_Gi_phi * 0.0
+                self.QLFluxSpectrum_QiAll_a_per = self.QLFluxSpectrum_QiAll_phi * 0.0
+                self.QLFluxSpectrum_Qi_a_per = self.QLFluxSpectrum_Qi_phi * 0.0
 
         # ------------------------------------------------------------------------
         # Intensity Spectrum
         # ------------------------------------------------------------------------
 
-        data = GACODEinterpret.TGLFreader(
-            self.FolderGACODE + "out.tglf.intensity_spectrum" + self.suffix,
-            blocks=1,
-            columns=None,
-            numky=self.num_ky,
-        )
+        if "intensity_spectrum" in self.files:
+            data = GACODEinterpret.TGLFreader(
+                self.FolderGACODE + "out.tglf.intensity_spectrum" + self.suffix,
+                blocks=1,
+                columns=None,
+                numky=self.num_ky,
+            )
 
-        data_re = np.reshape(
-            data[0, :, :],
-            (self.num_species, self.num_nmodes, self.num_ky, 4),
-            order="C",
-        )
+            data_re = np.reshape(
+                data[0, :, :],
+                (self.num_species, self.num_nmodes, self.num_ky, 4),
+                order="C",
+            )
 
-        # Using my convention of [quantity=(density,temperature,parallel velocity,parallel energy),species,nmode,ky]
-        self.IntensitySpectrum = data_re.transpose((3, 0, 1, 2))
+            # Using my convention of [quantity=(density,temperature,parallel velocity,parallel energy),species,nmode,ky]
+            self.IntensitySpectrum = data_re.transpose((3, 0, 1, 2))
 
-        self.IntensitySpectrum_ne = self.IntensitySpectrum[0, 0, :, :]
-        self.IntensitySpectrum_Te = self.IntensitySpectrum[1, 0, :, :]
+            self.IntensitySpectrum_ne = self.IntensitySpectrum[0, 0, :, :]
+            self.IntensitySpectrum_Te = self.IntensitySpectrum[1, 0, :, :]
 
-        self.IntensitySpectrum_ni = self.IntensitySpectrum[0, 1:, :, :]
-        self.IntensitySpectrum_Ti = self.IntensitySpectrum[1, 1:, :, :]
+            self.IntensitySpectrum_ni = self.IntensitySpectrum[0, 1:, :, :]
+            self.IntensitySpectrum_Ti = self.IntensitySpectrum[1, 1:, :, :]
 
         # ------------------------------------------------------------------------
         # TGLF input file
@@ -4929,10 +5634,15 @@ class TGLFoutput:
                 ir = np.argmin(np.abs(rho_x - rho))
                 rho_eval = rho
 
-            self.Qe_unn = self.Qe * q_gb[ir]
-            self.Qi_unn = self.Qi * q_gb[ir]
-            self.Ge_unn = self.Ge * g_gb[ir]
-            self.GiAll_unn = self.GiAll * g_gb[ir]
+            if "gbflux" in self.files:
+                self.Qe_unn = self.Qe * q_gb[ir]
+                self.Qi_unn = self.Qi * q_gb[ir]
+                self.Ge_unn = self.Ge * g_gb[ir]
+                self.GiAll_unn = self.GiAll * g_gb[ir]
+
+            if not {"temperature_spectrum", "nsts_crossphase_spectrum"}.issubset(self.files):
+                self.unnormalization_successful = True
+                return
 
             self.AmplitudeSpectrum_Te_level = GACODErun.obtainFluctuationLevel(
                 self.ky,
@@ -6185,6 +6895,64 @@ def createCombinedRuns(tglfs=(), new_names=(), results_names=(), isItScan=False)
     return tglf, normalizations
 
 
+def _readWaveform(Params, cont):
+    file, fileOut = Params["files"][cont]
+    return GACODEinterpret.Waveform_read(file, fileOut)
+
+
+def readWaveforms(files, parallel=8):
+    """
+    Read a list of (out.tglf.wavefunction, out.tglf.run) files, in parallel if there are many of them
+    """
+
+    if len(files) < 2 * parallel:
+        return [GACODEinterpret.Waveform_read(file, fileOut) for file, fileOut in files]
+
+    return FARMINGtools.ParallelProcedure(
+        _readWaveform,
+        {"files": files},
+        parallel=parallel,
+        howmany=len(files),
+        array=False,
+    )
+
+
+def arrayWaveforms(wavefunctions, rhos):
+    """
+    From the wavefunction dictionary [f"ky{ky}"][rho], build per radius a single array with the leading
+    mode of each ky run:
+            [rho]["values"][ky, theta, field], with fields in [rho]["fields"]
+    Runs with a different number of theta points are padded with nan.
+    """
+
+    fields = ["RE(phi)", "IM(phi)", "RE(Bper)", "IM(Bper)", "RE(Bpar)", "IM(Bpar)"]
+
+    arrays = {}
+    kys = list(wavefunctions.keys())
+    for rho in rhos:
+        wfs = [wavefunctions[ky][rho] for ky in kys if rho in wavefunctions[ky]]
+        if len(wfs) == 0:
+            continue
+
+        ntheta = np.max([len(wf["theta"]) for wf in wfs])
+
+        values = np.full((len(wfs), ntheta, len(fields)), np.nan)
+        theta = np.full((len(wfs), ntheta), np.nan)
+        for i, wf in enumerate(wfs):
+            theta[i, : len(wf["theta"])] = wf["theta"]
+            for j, field in enumerate(fields):
+                values[i, : len(wf["theta"]), j] = wf[field][0, :]
+
+        arrays[rho] = {
+            "ky": np.array([float(ky.split("ky")[-1]) for ky in kys if rho in wavefunctions[ky]]),
+            "theta": theta,
+            "fields": fields,
+            "values": values,
+        }
+
+    return arrays
+
+
 def restart_checker(
     rhos,
     ResultsFiles,
@@ -1,11 +1,14 @@
 import os
 import copy
+import json
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 from mitim_tools.misc_tools import (
     IOtools,
     GRAPHICStools,
     PLASMAtools,
+    FARMINGtools,
 )
 from mitim_tools.gacode_tools import TGLFtools, PROFILEStools
 from mitim_tools.gacode_tools.utils import GACODEinterpret, GACODEdefaults, GACODErun
@@ -537,7 +540,7 @@ class TGYRO:
         else:
             print(" ~~~ Not running TGYRO", typeMsg="f")
 
-    def read(self, label="tgyro1", folder=None, file_input_profiles=None):
+    def read(self, label="tgyro1", folder=None, file_input_profiles=None, use_cache=False):
         # If no specified folder, check the last one
         if folder is None:
             folder = self.FolderTGYRO
@@ -553,7 +556,7 @@ class TGYRO:
         else:
             prof = PROFILEStools.PROFILES_GACODE(file_input_profiles)
 
-        self.results[label] = TGYROoutput(folder, profiles=prof)
+        self.results[label] = TGYROoutput(folder, profiles=prof, use_cache=use_cache)
 
     def converge(
         self,
@@ -1200,8 +1203,15 @@ class TGYRO:
 
 
 class TGYROoutput:
-    def __init__(self, FolderTGYRO, profiles=None):
+    def __init__(self, FolderTGYRO, profiles=None, use_cache=False):
+        """
+        use_cache = True stores the parsed out.tgyro.* files in a binary file in the folder (TGYROoutput_cache),
+        so that the next time the folder is read the text files do not need to be parsed again. It is off by
+        default because the first read is slower (files are hashed and the cache written), so it only pays off
+        for folders that are read repeatedly.
+        """
         self.FolderTGYRO = FolderTGYRO
+        self.cache = TGYROoutput_cache(FolderTGYRO) if use_cache else None
 
         if (profiles is None) and os.path.exists(FolderTGYRO + "input.gacode"):
             profiles = PROFILEStools.PROFILES_GACODE(
@@ -1232,9 +1242,30 @@ class TGYROoutput:
 
         self.readResidualManuals()
 
+        # Store new parsed files and do not keep the cache (so that the class can be pickled)
+        if self.cache is not None:
+            self.cache.save()
+        del self.cache
+
     def maskp(self, var):
         return var[self.norepeats, :]
 
+    def readGeneral(self, file, numcols=3):
+        """
+        As GACODEinterpret.readGeneral (masking repeated iterations), but taking the parsed file from the cache if possible
+        """
+
+        if self.cache is None:
+            return GACODEinterpret.readGeneral(file, numcols=numcols, maskfun=self.maskp)
+
+        vecTarr = self.cache.read(
+            file,
+            f"numcols{numcols}",
+            lambda file: GACODEinterpret.readGeneral(file, numcols=numcols),
+        )
+
+        return np.array([self.maskp(vecTarr[j, :, :]) for j in range(vecTarr.shape[0])])
+
     def readResidual(self):
         file = f"{self.FolderTGYRO}/out.tgyro.residual"
         with open(file, "r") as f:
@@ -1294,32 +1325,32 @@ class TGYROoutput:
 
         file = f"{self.FolderTGYRO}/out.tgyro.evo_te"
         if os.path.exists(file):
-            self.roa, self.QeGB_sim, self.QeGB_tar = GACODEinterpret.readGeneral(
-                file, numcols=3, maskfun=self.maskp
+            self.roa, self.QeGB_sim, self.QeGB_tar = self.readGeneral(
+                file, numcols=3
             )
         else:
             self.QeGB_sim, self.QeGB_tar = None, None
 
         file = f"{self.FolderTGYRO}/out.tgyro.evo_ti"
         if os.path.exists(file):
-            self.roa, self.QiGB_sim, self.QiGB_tar = GACODEinterpret.readGeneral(
-                file, numcols=3, maskfun=self.maskp
+            self.roa, self.QiGB_sim, self.QiGB_tar = self.readGeneral(
+                file, numcols=3
             )
         else:
             self.QiGB_sim, self.QiGB_tar = None, None
 
         file = f"{self.FolderTGYRO}/out.tgyro.evo_ne"
         if os.path.exists(file):
-            self.roa, self.GeGB_sim, self.GeGB_tar = GACODEinterpret.readGeneral(
-                file, numcols=3, maskfun=self.maskp
+            self.roa, self.GeGB_sim, self.GeGB_tar = self.readGeneral(
+                file, numcols=3
             )
         else:
             self.GeGB_sim, self.GeGB_tar = None, None
 
         file = f"{self.FolderTGYRO}/out.tgyro.evo_er"
         if os.path.exists(file):
-            self.roa, self.MtGB_sim, self.MtGB_tar = GACODEinterpret.readGeneral(
-                file, numcols=3, maskfun=self.maskp
+            self.roa, self.MtGB_sim, self.MtGB_tar = self.readGeneral(
+                file, numcols=3
             )
         else:
             self.MtGB_sim, self.MtGB_tar = None, None
@@ -1329,8 +1360,8 @@ class TGYROoutput:
         for i in range(10):
             file = f"{self.FolderTGYRO}/out.tgyro.evo_n{i + 1}"
             if os.path.exists(file):
-                _, GiGB_sim, GiGB_tar = GACODEinterpret.readGeneral(
-                    file, numcols=3, maskfun=self.maskp
+                _, GiGB_sim, GiGB_tar = self.readGeneral(
+                    file, numcols=3
                 )
 
                 self.GiGB_sim.append(GiGB_sim)
@@ -1375,7 +1406,7 @@ class TGYROoutput:
             self.MeGB_sim_neo,
             self.MeGB_sim_turb,
             self.EXeGB_sim_turb,
-        ) = GACODEinterpret.readGeneral(file, numcols=8, maskfun=self.maskp)
+        ) = self.readGeneral(file, numcols=8)
 
         self.EXeGB_sim = self.EXeGB_sim_turb
 
@@ -1403,7 +1434,7 @@ class TGYROoutput:
                     MiGB_sim_neo,
                     MiGB_sim_turb,
                     EXiGB_sim_turb,
-                ) = GACODEinterpret.readGeneral(file, numcols=8, maskfun=self.maskp)
+                ) = self.readGeneral(file, numcols=8)
 
                 self.GiGB_sim_neo.append(GiGB_sim_neo)
                 self.GiGB_sim_turb.append(GiGB_sim_turb)
@@ -1449,7 +1480,7 @@ class TGYROoutput:
                 self.MeGB_sim_neo_stds,
                 self.MeGB_sim_turb_stds,
                 self.EXeGB_sim_turb_stds,
-            ) = GACODEinterpret.readGeneral(file, numcols=8, maskfun=self.maskp)
+            ) = self.readGeneral(file, numcols=8)
 
             self.EXeGB_sim_stds = self.EXeGB_sim_turb_stds
 
@@ -1477,7 +1508,7 @@ class TGYROoutput:
                         MiGB_sim_neo,
                         MiGB_sim_turb,
                         EXiGB_sim_turb,
-                    ) = GACODEinterpret.readGeneral(file, numcols=8, maskfun=self.maskp)
+                    ) = self.readGeneral(file, numcols=8)
 
                     self.GiGB_sim_neo_stds.append(GiGB_sim_neo)
                     self.GiGB_sim_turb_stds.append(GiGB_sim_turb)
@@ -1509,32 +1540,32 @@ class TGYROoutput:
             # Targets
             file = f"{self.FolderTGYRO}/out.tgyro.evo_te_stds"
             if os.path.exists(file):
-                _, _, self.QeGB_tar_stds = GACODEinterpret.readGeneral(
-                    file, numcols=3, maskfun=self.maskp
+                _, _, self.QeGB_tar_stds = self.readGeneral(
+                    file, numcols=3
                 )
             else:
                 self.QeGB_tar_stds = None
 
             file = f"{self.FolderTGYRO}/out.tgyro.evo_ti_stds"
             if os.path.exists(file):
-                _, _, self.QiGB_tar_stds = GACODEinterpret.readGeneral(
-                    file, numcols=3, maskfun=self.maskp
+                _, _, self.QiGB_tar_stds = self.readGeneral(
+                    file, numcols=3
                 )
             else:
                 self.QiGB_tar_stds = None
 
             file = f"{self.FolderTGYRO}/out.tgyro.evo_ne_stds"
             if os.path.exists(file):
-                _, _, self.GeGB_tar_stds = GACODEinterpret.readGeneral(
-                    file, numcols=3, maskfun=self.maskp
+                _, _, self.GeGB_tar_stds = self.readGeneral(
+                    file, numcols=3
                 )
             else:
                 self.GeGB_tar_stds = None
 
             file = f"{self.FolderTGYRO}/out.tgyro.evo_er_stds"
             if os.path.exists(file):
-                _, _, self.MtGB_tar_stds = GACODEinterpret.readGeneral(
-                    file, numcols=3, maskfun=self.maskp
+                _, _, self.MtGB_tar_stds = self.readGeneral(
+                    file, numcols=3
                 )
             else:
                 self.MtGB_tar_stds = None
@@ -1543,8 +1574,8 @@ class TGYROoutput:
             for i in range(10):
                 file = f"{self.FolderTGYRO}/out.tgyro.evo_n{i + 1}_stds"
                 if os.path.exists(file):
-                    _, _, GiGB_tar = GACODEinterpret.readGeneral(
-                        file, numcols=3, maskfun=self.maskp
+                    _, _, GiGB_tar = self.readGeneral(
+                        file, numcols=3
                     )
                     self.GiGB_tar_stds.append(GiGB_tar)
                 else:
@@ -1568,7 +1599,7 @@ class TGYROoutput:
                 self.Qe_tarMW_exch,
                 self.Qe_tarMW_expwd,
                 self.Qe_tarMW_tot,
-            ) = GACODEinterpret.readGeneral(file, numcols=10, maskfun=self.maskp)
+            ) = self.readGeneral(file, numcols=10)
 
             # ADD OHMIC TO AUX
             self.Qe_tarMW_aux += Qe_tarMW_ohm
@@ -1589,7 +1620,7 @@ class TGYROoutput:
                 self.Qe_tarMW_exch,
                 self.Qe_tarMW_expwd,
                 self.Qe_tarMW_tot,
-            ) = GACODEinterpret.readGeneral(file, numcols=9, maskfun=self.maskp)
+            ) = self.readGeneral(file, numcols=9)
 
         self.Qe_tarMW_rad = self.Qe_tarMW_brem + self.Qe_tarMW_sync + self.Qe_tarMW_line
 
@@ -1601,7 +1632,7 @@ class TGYROoutput:
             self.Qi_tarMW_exch,
             self.Qi_tarMW_expwd,
             self.Qi_tarMW_tot,
-        ) = GACODEinterpret.readGeneral(file, numcols=6, maskfun=self.maskp)
+        ) = self.readGeneral(file, numcols=6)
 
     def readNormalization(self):
         file = f"{self.FolderTGYRO}/out.tgyro.gyrobohm"
@@ -1614,7 +1645,7 @@ class TGYROoutput:
             self.Pi_GB,
             self.S_GB,
             self.c_s,
-        ) = GACODEinterpret.readGeneral(file, numcols=7, maskfun=self.maskp)
+        ) = self.readGeneral(file, numcols=7)
 
         # Q is MW/m^2
         # Pi in J/m^2
@@ -1693,7 +1724,7 @@ class TGYROoutput:
             self.Te,
             self.aLte,
             self.betae_unit,
-        ) = GACODEinterpret.readGeneral(file, numcols=6, maskfun=self.maskp)
+        ) = self.readGeneral(file, numcols=6)
         self.ne = self.ne * 1e6 * 1e-20
 
         self.ni, self.aLni, self.Ti, self.aLti, self.betai_unit = [], [], [], [], []
@@ -1701,8 +1732,8 @@ class TGYROoutput:
         cont = 1
         file = f"{self.FolderTGYRO}/out.tgyro.profile_i{cont}"
         while os.path.exists(file):
-            _, ni, aLni, Ti, aLti, betai_unit = GACODEinterpret.readGeneral(
-                file, numcols=6, maskfun=self.maskp
+            _, ni, aLni, Ti, aLti, betai_unit = self.readGeneral(
+                file, numcols=6
             )
             cont += 1
             file = f"{self.FolderTGYRO}/out.tgyro.profile_i{cont}"
@@ -1738,7 +1769,7 @@ class TGYROoutput:
             self.shift,
             self.rmajoa,
             self.bunit,
-        ) = GACODEinterpret.readGeneral(file1, numcols=11, maskfun=self.maskp)
+        ) = self.readGeneral(file1, numcols=11)
         (
             _,
             self.zmagoa,
@@ -1749,7 +1780,7 @@ class TGYROoutput:
             self.dvoldr,
             self.gradr,
             self.rmin,
-        ) = GACODEinterpret.readGeneral(file2, numcols=9, maskfun=self.maskp)
+        ) = self.readGeneral(file2, numcols=9)
 
     def readNu(self):
         file1 = f"{self.FolderTGYRO}/out.tgyro.nu_rho"
@@ -1762,7 +1793,7 @@ class TGYROoutput:
             self.rhoia,
             self.rhosa,
             self.fracae,
-        ) = GACODEinterpret.readGeneral(file1, numcols=8, maskfun=self.maskp)
+        ) = self.readGeneral(file1, numcols=8)
 
     def readprocess(self):
         file = f"{self.FolderTGYRO}/input.tgyro.gen"
@@ -4560,6 +4591,120 @@ class TGYROoutput:
         # GRAPHICStools.autoscale_y(ax)
 
 
+class TGYROoutput_cache:
+    """
+    Parsed out.tgyro.* files of a TGYRO folder, stored in a single binary file (numpy .npz) in the folder.
+    Each entry records the modification time, size and content hash of the file it was parsed from:
+        - If modification time and size are unchanged, the entry is used directly
+        - If not, the file content hash is checked, and the file is parsed again only if its content changed
+    Entries are loaded lazily (only when requested), and new ones are written when calling save()
+    """
+
+    file_cache = "mitim_tgyro_cache.npz"
+
+    def __init__(self, FolderTGYRO):
+        self.file = f"{FolderTGYRO}/{self.file_cache}"
+        self.index, self.arrays, self.modified = {}, {}, False
+
+        self.npz = None
+        if os.path.exists(self.file):
+            try:
+                self.npz = np.load(self.file, allow_pickle=False)
+                self.index = json.loads(str(self.npz["index"]))
+            except:
+                print(f"\t- TGYRO cache {IOtools.clipstr(self.file)} could not be read, ignoring it", typeMsg="w")
+                self.npz, self.index = None, {}
+
+    @staticmethod
+    def hash_file(file):
+        with open(file, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def read(self, file, label, parser):
+        """
+        Array parsed from file with parser(file), taken from the cache if the file did not change
+        """
+
+        key = f"{os.path.basename(file)}_{label}"
+        stat = os.stat(file)
+        entry = self.index.get(key, None)
+
+        if entry is not None:
+            valid = (entry["mtime"] == stat.st_mtime_ns) and (entry["size"] == stat.st_size)
+            if not valid:
+                hash_file = self.hash_file(file)
+                valid = entry["hash"] == hash_file
+                if valid:
+                    entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+                    self.modified = True
+            if valid:
+                if key not in self.arrays:
+                    self.arrays[key] = self.npz[key]
+                return self.arrays[key]
+
+        self.arrays[key] = np.array(parser(file))
+        self.index[key] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": self.hash_file(file),
+        }
+        self.modified = True
+
+        return self.arrays[key]
+
+    def save(self):
+        if self.modified:
+            # Entries that were not requested this time are kept
+            for key in self.index:
+                if key not in self.arrays:
+                    self.arrays[key] = self.npz[key]
+
+            file_tmp = f"{self.file}_{os.getpid()}.tmp"
+            try:
+                with open(file_tmp, "wb") as f:
+                    np.savez(f, index=np.array(json.dumps(self.index)), **self.arrays)
+                os.replace(file_tmp, self.file)
+            except:
+                print(f"\t- TGYRO cache {IOtools.clipstr(self.file)} could not be written", typeMsg="w")
+                if os.path.exists(file_tmp):
+                    os.remove(file_tmp)
+
+        if self.npz is not None:
+            self.npz.close()
+        self.npz, self.arrays, self.modified = None, {}, False
+
+
+def _readTGYROoutput(Params, cont):
+    return TGYROoutput(
+        Params["folders"][cont],
+        profiles=Params["profiles"][cont],
+        use_cache=Params["use_cache"],
+    )
+
+
+def readTGYROoutputs(folders, profiles=None, use_cache=False, parallel=8):
+    """
+    Read several TGYRO folders at once, in parallel processes. Returns list of TGYROoutput classes
+    profiles can be a single PROFILES_GACODE class (for all folders) or a list with one per folder
+    """
+
+    if not isinstance(profiles, list):
+        profiles = [profiles] * len(folders)
+
+    Params = {"folders": folders, "profiles": profiles, "use_cache": use_cache}
+
+    if parallel > 1 and len(folders) > 1:
+        return FARMINGtools.ParallelProcedure(
+            _readTGYROoutput,
+            Params,
+            parallel=min(parallel, len(folders)),
+            howmany=len(folders),
+            array=False,
+        )
+    else:
+        return [_readTGYROoutput(Params, cont) for cont in range(len(folders))]
+
+
 def plotAll(TGYROoutputs, labels=None, fn=None):
     if fn is None:
         from mitim_tools.misc_tools.GUItools import FigureNotebook
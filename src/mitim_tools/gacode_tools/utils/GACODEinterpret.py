@@ -14,11 +14,7 @@ def Waveform_read(file, fileOut):
     with open(file, "r") as f:
         aux = f.readlines()
 
-    results = []
-    for i in range(len(aux) - 3):
-        line = aux[i + 3].split()
-        for i in line:
-            results.append(float(i))
+    results = np.array(" ".join(aux[3:]).split(), dtype=float)
 
     line1 = aux[0].split()
     nmodes = int(line1[0])
@@ -99,16 +95,23 @@ def string_is_float(element):
 def TGLFreader(file, blocks=3, columns=5, numky=None):
     """
     Only one of them can be None
+
+    The numeric lines of the file (those starting with a float) are gathered and converted in a single pass,
+    into an array preallocated to the number of values found (instead of growing it line by line)
     """
 
     with open(file, "r") as f:
         aux = f.readlines()
 
+    # Gather values of all numeric lines
+    values = []
+    for line in aux:
+        line_split = line.split()
+        if len(line_split) > 0 and string_is_float(line_split[0]):
+            values.extend(line_split)
+
     # Read full file in a single array
-    aux_array = np.array([])
-    for line_cont in range(len(aux)):
-        if string_is_float(aux[line_cont].split()[0]):
-            aux_array = np.append(aux_array, [float(i) for i in aux[line_cont].split()])
+    aux_array = np.fromiter(map(float, values), dtype=float, count=len(values))
 
     # Reshape
     if numky is None:
@@ -1,4 +1,6 @@
 import os
+import shutil
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import interp1d
@@ -6,6 +8,7 @@ from mitim_tools.gacode_tools.utils import GACODEdefaults
 from mitim_tools.transp_tools.tools import PLASMASTATEtools
 from mitim_tools.misc_tools import FARMINGtools, IOtools, MATHtools, GRAPHICStools
 from mitim_tools.misc_tools.IOtools import printMsg as print
+from mitim_tools.misc_tools import CONFIGread
 from mitim_tools.misc_tools.CONFIGread import read_verbose_level
 from IPython import embed
 verbose_level = read_verbose_level()
@@ -927,14 +930,21 @@ def runTGLF(
     name="",
     launchSlurm=True,
     cores_todo_array=1e6,  # 32,
+    use_cache=True,
+    retries=1,
 ):
     """
     launchSlurm = True -> Launch as a batch job in the machine chosen
     launchSlurm = False -> Launch locally as a bash script
+    use_cache = True -> If a TGLF cache is defined in the user config, grab from there the runs with identical inputs
+    retries = 1 -> Run again (only them) the radii whose output files were not retrieved, up to this number of times
     """
 
+    # ---------------------------------------------
+    # Grab from cache those that were already run
+    # ---------------------------------------------
+
     tmpFolder = f"{FolderGACODE}/tmp_tglf/"
-    IOtools.askNewFolder(tmpFolder, force=True)
 
     tglf_job = FARMINGtools.mitim_job(tmpFolder)
 
@@ -943,7 +953,19 @@ def runTGLF(
         f"mitim_{name}/",
     )
 
-    folders, folders_red = [], []
+    cache = TGLFcache.from_config(job=tglf_job) if use_cache else None
+
+    if cache is not None:
+        tglf_executor = cache.retrieve_executor(tglf_executor, filesToRetrieve, extraFlag=extraFlag)
+
+        if sum([len(tglf_executor[subFolderTGLF]) for subFolderTGLF in tglf_executor]) == 0:
+            print("\t- All TGLF runs were found in cache, not running TGLF", typeMsg="f")
+            return
+        tglf_executor = {subFolderTGLF: tglf_executor[subFolderTGLF] for subFolderTGLF in tglf_executor if len(tglf_executor[subFolderTGLF]) > 0}
+
+    IOtools.askNewFolder(tmpFolder, force=True)
+
+    folders_red, inputs = [], {}
     for subFolderTGLF in tglf_executor:
 
         rhos = list(tglf_executor[subFolderTGLF].keys())
@@ -956,87 +978,164 @@ def runTGLF(
             print(f"\t- Preparing TGLF ({subFolderTGLF}) at rho={rho:.4f}")
 
             folderTGLF_this = f"{tmpFolder}/{subFolderTGLF}/rho_{rho:.4f}"
-            folders.append(folderTGLF_this)
             folders_red.append(f"{subFolderTGLF}/rho_{rho:.4f}")
 
             if not os.path.exists(folderTGLF_this):
                 os.system(f"mkdir -p {folderTGLF_this}")
 
+            inputs[folders_red[-1]] = tglf_executor[subFolderTGLF][rho]["inputs"]
+
             fileTGLF = f"{folderTGLF_this}/input.tglf"
             with open(fileTGLF, "w") as f:
-                f.write(tglf_executor[subFolderTGLF][rho]["inputs"])
+                f.write(inputs[folders_red[-1]])
 
     # ---------------------------------------------
-    # Prepare command
+    # Execute, running again those that failed
     # ---------------------------------------------
 
-    total_tglf_cores = int(cores_tglf * len(rhos) * len(tglf_executor))
+    folders_run, exit_status = folders_red, {}
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            # Folders that were not retrieved (or partially) lost their input.tglf locally
+            for folder in folders_run:
+                os.system(f"mkdir -p {tmpFolder}/{folder}")
+                with open(f"{tmpFolder}/{folder}/input.tglf", "w") as f:
+                    f.write(inputs[folder])
 
-    if launchSlurm and ("partition" in tglf_job.machineSettings["slurm"]):
-        typeRun = "job" if total_tglf_cores <= cores_todo_array else "array"
-    else:
-        typeRun = "bash"
+        # ---------------------------------------------
+        # Prepare command
+        # ---------------------------------------------
+
+        total_tglf_cores = int(cores_tglf * len(folders_run))
+
+        inputFiles, outputFiles = [], []
+
+        if launchSlurm and ("partition" in tglf_job.machineSettings["slurm"]):
+            typeRun = "job" if total_tglf_cores <= cores_todo_array else "array"
+        else:
+            typeRun = "bash"
+
+        if typeRun in ["bash"]:
+            # Queue of runs packed onto the cores of the machine, cores_tglf each
+            TGLFcommand = FARMINGtools.create_scheduled_commands(
+                [f"tglf -e {folder}/ -n {cores_tglf} -p {tglf_job.folderExecution}/" for folder in folders_run],
+                cores_tglf,
+                labels=folders_run,
+            )
+            outputFiles.append("mitim_scheduler.log")
+            rho_array = None
+
+            ntasks = len(folders_run)
+            cpuspertask = cores_tglf
+
+        elif typeRun in ["job"]:
+            TGLFcommand = ""
+            for folder in folders_run:
+                TGLFcommand += (
+                    f"(tglf -e {folder}/ -n {cores_tglf} -p {tglf_job.folderExecution}/; echo $? > {folder}/mitim_status) &\n"
+                )
 
-    if typeRun in ["bash", "job"]:
-        TGLFcommand = ""
-        for folder in folders_red:
             TGLFcommand += (
-                f"tglf -e {folder}/ -n {cores_tglf} -p {tglf_job.folderExecution}/ &\n"
+                "\nwait"  # This is needed so that the script doesn't end before each job
             )
+            rho_array = None
 
-        TGLFcommand += (
-            "\nwait"  # This is needed so that the script doesn't end before each job
-        )
-        rho_array = None
+            ntasks = len(folders_run)
+            cpuspertask = cores_tglf
 
-        ntasks = len(rhos)
-        cpuspertask = cores_tglf
+        elif typeRun in ["array"]:
+            print(
+                f"\t- TGLF will be executed in SLURM as job array due to its size (cpus: {total_tglf_cores})",
+                typeMsg="i",
+            )
 
-    elif typeRun in ["array"]:
-        raise Exception("TGLF array not implemented yet")
-        print(
-            f"\t- TGLF will be executed in SLURM as job array due to its size (cpus: {total_tglf_cores})",
-            typeMsg="i",
+            # Each array task runs one folder (radius of a given scan), mapping provided in a file
+            fileMap = f"{tmpFolder}/mitim_array_map.txt"
+            with open(fileMap, "w") as f:
+                f.write("\n".join([f"{i} {folder}" for i, folder in enumerate(folders_run)]) + "\n")
+            inputFiles.append(fileMap)
+
+            rho_array = f"0-{len(folders_run)-1}"
+
+            TGLFcommand = (
+                'folder=$(awk -v id="$SLURM_ARRAY_TASK_ID" \'$1==id {print $2}\' mitim_array_map.txt)\n'
+                f'tglf -e "$folder"/ -n {cores_tglf} -p {tglf_job.folderExecution}/ 1> "$folder"/slurm_output.dat 2> "$folder"/slurm_error.dat\n'
+                'echo $? > "$folder"/mitim_status\n'
+            )
+
+            ntasks = 1
+            cpuspertask = cores_tglf
+
+        # ---------------------------------------------
+        # Execute
+        # ---------------------------------------------
+
+        tglf_job.define_machine(
+            "tglf",
+            f"mitim_{name}/",
+            launchSlurm=launchSlurm,
+            slurm_settings={
+                "minutes": minutes,
+                "ntasks": ntasks,
+                "name": name,
+                "cpuspertask": cpuspertask,
+                "job_array": rho_array,
+                "nodes": 1,
+            },
         )
 
-        rho_array = ",".join([f"{int(rho*1E4)}" for rho in rhos])
-        TGLFcommand = f'tglf -e rho_0."$SLURM_ARRAY_TASK_ID"/ -n {cores_tglf} -p {tglf_job.folderExecution}/ 1> {tglf_job.folderExecution}/rho_0."$SLURM_ARRAY_TASK_ID"/slurm_output.dat 2> {tglf_job.folderExecution}/rho_0."$SLURM_ARRAY_TASK_ID"/slurm_error.dat\n'
+        # I would like the mitim_job to check if the retrieved folders were complete
+        check_files_in_folder = {}
+        for folder in folders_run:
+            check_files_in_folder[folder] = filesToRetrieve
+        # ---------------------------------------------
 
-        ntasks = 1
-        cpuspertask = cores_tglf
+        tglf_job.prep(
+            TGLFcommand,
+            input_files=inputFiles,
+            input_folders=[f"{tmpFolder}/{folder}" for folder in folders_run],
+            output_files=outputFiles,
+            output_folders=folders_run,
+            check_files_in_folder=check_files_in_folder,
+        )
 
-    # ---------------------------------------------
-    # Execute
-    # ---------------------------------------------
+        # Missing outputs only stop the process (as usual) in the last attempt
+        tglf_job.run(removeScratchFolders=False, partial=attempt < retries)
 
-    tglf_job.define_machine(
-        "tglf",
-        f"mitim_{name}/",
-        launchSlurm=launchSlurm,
-        slurm_settings={
-            "minutes": minutes,
-            "ntasks": ntasks,
-            "name": name,
-            "cpuspertask": cpuspertask,
-            "job_array": rho_array,
-            "nodes": 1,
-        },
-    )
+        if typeRun in ["bash"]:
+            runs = FARMINGtools.read_scheduler_log(f"{tmpFolder}/mitim_scheduler.log")
+            exit_status.update({folder: runs[folder][0] for folder in runs})
+            for folder in folders_run:
+                if folder in runs:
+                    print(
+                        f"\t\t- {folder} took {runs[folder][1]:.1f}s{'' if runs[folder][0] == 0 else f' (exit status {runs[folder][0]})'}",
+                        verbose=verbose_level,
+                    )
+            if len(runs) > 0:
+                print(
+                    f"\t- {len(runs)} TGLF runs completed, with total time of {sum([runs[i][1] for i in runs]):.1f}s (longest {max([runs[i][1] for i in runs]):.1f}s)"
+                )
 
-    # I would like the mitim_job to check if the retrieved folders were complete
-    check_files_in_folder = {}
-    for folder in folders_red:
-        check_files_in_folder[folder] = filesToRetrieve
-    # ---------------------------------------------
+        if typeRun in ["array"]:
+            incomplete = [
+                i
+                for i, folder in enumerate(folders_run)
+                if not all([os.path.exists(f"{tmpFolder}/{folder}/{file}") for file in filesToRetrieve])
+            ]
+            if len(incomplete) > 0:
+                print(
+                    f"\t- Array tasks {incomplete} ({[folders_run[i] for i in incomplete]}) did not produce all files, check their slurm_error.dat (and slurm_output_<task>.dat)",
+                    typeMsg="w",
+                )
 
-    tglf_job.prep(
-        TGLFcommand,
-        input_folders=folders,
-        output_folders=folders_red,
-        check_files_in_folder=check_files_in_folder,
-    )
+        folders_run = [folder for folder in folders_run if not tglf_job.received[folder]]
+        if len(folders_run) == 0 or attempt == retries:
+            break
 
-    tglf_job.run(removeScratchFolders=False)
+        print(
+            f"\t- {len(folders_run)} TGLF runs did not produce all files, running again only those ({folders_run})",
+            typeMsg="w",
+        )
 
     # ---------------------------------------------
     # Organize
@@ -1073,3 +1172,214 @@ def runTGLF(
         print("\t\t- All files were successfully retrieved")
     else:
         print("\t\t- Some files were not retrieved", typeMsg="w")
+
+    # ---------------------------------------------
+    # Populate cache (only with runs that finished successfully)
+    # ---------------------------------------------
+
+    if cache is not None:
+        for folder in folders_red:
+            if os.path.exists(f"{tmpFolder}/{folder}/mitim_status"):
+                with open(f"{tmpFolder}/{folder}/mitim_status", "r") as f:
+                    exit_status[folder] = int(f.read().strip() or -1)
+
+        tglf_executor_success = {
+            subFolderTGLF: {
+                rho: tglf_executor[subFolderTGLF][rho]
+                for rho in tglf_executor[subFolderTGLF]
+                if exit_status.get(f"{subFolderTGLF}/rho_{rho:.4f}") == 0
+            }
+            for subFolderTGLF in tglf_executor
+        }
+        cache.store_executor(tglf_executor_success, filesToRetrieve, extraFlag=extraFlag)
+
+
+# Identity (hash of the executables) of TGLF in each machine, keyed on (machine, modules)
+tglf_identities = {}
+
+
+def tglf_identity(job):
+    """
+    Hash of the TGLF executables (wrapper and binary in $GACODE_ROOT) that the machine of job will run, so that
+    results of different TGLF versions or builds are never mixed. Empty if they could not be found.
+    """
+
+    key = (job.machineSettings["machine"], job.machineSettings["modules"])
+
+    if key not in tglf_identities:
+        job.connect()
+        output, _ = job.execute(
+            f"{job.machineSettings['modules'] or ''}\nsha256sum $(command -v tglf) $GACODE_ROOT/tglf/src/tglf 2>/dev/null"
+        )
+        job.close()
+
+        hashes = [line.split()[0] for line in (output or b"").decode(errors="ignore").splitlines() if len(line.split()) == 2]
+        if len(hashes) == 0:
+            print("\t- TGLF executables could not be hashed, cache entries only identified by machine and modules", typeMsg="w")
+
+        tglf_identities[key] = "|".join(hashes)
+
+    return tglf_identities[key]
+
+
+class TGLFcache:
+    """
+    Local cache of TGLF results, content-addressed by the (normalized) input.tglf and the identity of the
+    TGLF executable (machine and modules that will be loaded to run it, and hash of the executables).
+    Each entry is a folder named by the hash, containing the output files. When the cache exceeds its maximum
+    size, the least recently used entries are removed.
+    """
+
+    def __init__(self, folder, max_size_gb=5.0, identity=""):
+        self.folder = folder
+        self.max_size_gb = max_size_gb
+        self.identity = identity
+
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, code="tglf", job=None):
+        """
+        job (mitim_job with the machine defined) is used to hash the TGLF executables (see tglf_identity)
+        """
+        folder, max_size_gb = CONFIGread.read_tglf_cache()
+
+        if folder is None:
+            return None
+
+        s = CONFIGread.load_settings()
+        machine = s["preferences"][code]
+        identity = f"{machine}|{s[machine].get('machine', '')}|{s[machine].get('modules', '')}"
+        if job is not None:
+            identity += f"|{tglf_identity(job)}"
+
+        return cls(folder, max_size_gb=max_size_gb, identity=identity)
+
+    def key(self, inputs):
+        return hashlib.sha256(
+            f"{self.identity}\n{normalize_tglf_input(inputs)}".encode()
+        ).hexdigest()
+
+    def retrieve(self, inputs, files, folder, rho, extraFlag=""):
+        """
+        If all files are in the cache for these inputs, place them in folder as {file}_{rho:.4f}{extraFlag}
+        """
+
+        entry = f"{self.folder}/{self.key(inputs)}"
+
+        if not all([os.path.exists(f"{entry}/{file}") for file in files]):
+            return False
+
+        for file in files:
+            shutil.copy2(f"{entry}/{file}", f"{folder}/{file}_{rho:.4f}{extraFlag}")
+
+        # Mark as recently used
+        os.utime(entry)
+
+        return True
+
+    def store(self, inputs, files, folder, rho, extraFlag=""):
+        """
+        Store in the cache the files {file}_{rho:.4f}{extraFlag} of folder that were produced by these inputs
+        (only if all of them exist)
+        """
+
+        entry = f"{self.folder}/{self.key(inputs)}"
+
+        if not all([os.path.exists(f"{folder}/{file}_{rho:.4f}{extraFlag}") for file in files]):
+            return
+
+        # Write into a temporary folder first, so that a half-written entry is never visible
+        entry_tmp = f"{entry}.tmp{os.getpid()}"
+        os.makedirs(entry_tmp, exist_ok=True)
+        if os.path.exists(entry):
+            for file in os.listdir(entry):
+                shutil.copy2(f"{entry}/{file}", f"{entry_tmp}/{file}")
+        for file in files:
+            shutil.copy2(f"{folder}/{file}_{rho:.4f}{extraFlag}", f"{entry_tmp}/{file}")
+
+        if os.path.exists(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(entry_tmp, entry)
+        except OSError:
+            # Entry created meanwhile by another process (same inputs and executable, so same results)
+            shutil.rmtree(entry_tmp, ignore_errors=True)
+
+    def retrieve_executor(self, tglf_executor, files, extraFlag=""):
+        """
+        Returns tglf_executor without the runs that could be grabbed from the cache
+        """
+
+        tglf_executor_new, hits = {}, 0
+        for subFolderTGLF in tglf_executor:
+            tglf_executor_new[subFolderTGLF] = {}
+            for rho in tglf_executor[subFolderTGLF]:
+                run = tglf_executor[subFolderTGLF][rho]
+                if self.retrieve(run["inputs"], files, run["folder"], rho, extraFlag=extraFlag):
+                    hits += 1
+                    print(f"\t- TGLF ({subFolderTGLF}) at rho={rho:.4f} found in cache", verbose=verbose_level)
+                else:
+                    tglf_executor_new[subFolderTGLF][rho] = run
+
+        if hits > 0:
+            print(f"\t- {hits} TGLF runs were grabbed from cache ({self.folder})", typeMsg="i")
+
+        return tglf_executor_new
+
+    def store_executor(self, tglf_executor, files, extraFlag=""):
+        for subFolderTGLF in tglf_executor:
+            for rho in tglf_executor[subFolderTGLF]:
+                run = tglf_executor[subFolderTGLF][rho]
+                self.store(run["inputs"], files, run["folder"], rho, extraFlag=extraFlag)
+
+        self.enforce_size()
+
+    def enforce_size(self):
+        entries = []
+        for entry in os.listdir(self.folder):
+            path = f"{self.folder}/{entry}"
+            if os.path.isdir(path) and (".tmp" not in entry):
+                size = sum([os.path.getsize(f"{path}/{file}") for file in os.listdir(path)])
+                entries.append((os.path.getmtime(path), size, path))
+
+        total = sum([entry[1] for entry in entries])
+        max_size = self.max_size_gb * 1e9
+
+        if total <= max_size:
+            return
+
+        # Remove least recently used first
+        removed = 0
+        for _, size, path in sorted(entries):
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+            if total <= max_size:
+                break
+
+        print(f"\t- {removed} entries removed from TGLF cache to keep it below {self.max_size_gb}GB", verbose=verbose_level)
+
+
+def normalize_tglf_input(inputs):
+    """
+    Normalized version of the input.tglf text (no comments or spacing, upper-case keys, numeric values
+    in a unique format, sorted), so that equivalent inputs produce the same cache key
+    """
+
+    lines = []
+    for line in inputs.split("\n"):
+        line = line.split("#")[0].strip()
+        if "=" not in line:
+            continue
+
+        key, value = [i.strip() for i in line.split("=", 1)]
+        try:
+            value = repr(float(value.replace("d", "e").replace("D", "E")))
+        except ValueError:
+            value = value.upper()
+
+        lines.append(f"{key.upper()}={value}")
+
+    return "\n".join(sorted(lines))
@@ -47,6 +47,20 @@ def read_dpi():
     return dpi
 
 
+def read_tglf_cache():
+    """
+    Folder and maximum size (in GB) of the local cache of TGLF results. If not in preferences, cache is disabled
+    """
+    s = load_settings()
+    if "tglf_cache" in s["preferences"] and s["preferences"]["tglf_cache"] not in [None, ""]:
+        folder = IOtools.expandPath(s["preferences"]["tglf_cache"])
+        size_gb = float(s["preferences"]["tglf_cache_gb"]) if "tglf_cache_gb" in s["preferences"] else 5.0
+    else:
+        folder, size_gb = None, None
+
+    return folder, size_gb
+
+
 def ignoreWarnings(module=None):
     if module is None:
         warnings.filterwarnings("ignore")
@@ -120,11 +134,13 @@ def machineSettings(
     This script uses the config json file and completes the information required to run each code
 
     forceUsername is used to override the json file (for TRANSP PRF), adding also an identity and scratch
+
+    code can also be directly the name of a machine in the config file (e.g. "loopback", for tests)
     """
 
     # Determine where to run this code, depending on config file
     s = load_settings()
-    machine = s["preferences"][code]
+    machine = s["preferences"][code] if code in s["preferences"] else code
 
     """
     Set-up per code and machine
@@ -147,6 +163,7 @@ def machineSettings(
         "modules": "source $MITIM_PATH/config/mitim.bashrc",
         "folderWork": scratch,
         "slurm": {},
+        "transfer": {},
         "isTunnelSameMachine": (
             bool(s[machine]["isTunnelSameMachine"])
             if "isTunnelSameMachine" in s[machine]
@@ -164,7 +181,7 @@ def machineSettings(
             f'{machineSettings["modules"]}\n{s[machine]["modules"]}'
         )
 
-    checkers = ["slurm", "identity", "tunnel", "port"]
+    checkers = ["slurm", "identity", "tunnel", "port", "transfer"]
     for i in checkers:
         if i in s[machine]:
             machineSettings[i] = s[machine][i]
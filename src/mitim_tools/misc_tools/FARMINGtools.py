@@ -7,14 +7,27 @@ import os
 import time
 import sys
 import subprocess
+import shlex
 import socket
 import signal
+import atexit
+import threading
+import traceback
+import collections
+import functools
+import concurrent.futures
 import datetime
 import torch
 import copy
+import types
 import paramiko
 import tarfile
+import hashlib
+import gzip
+import bz2
+import lzma
 import numpy as np
+from multiprocessing import shared_memory, resource_tracker
 from contextlib import contextmanager
 from mitim_tools.misc_tools import IOtools, CONFIGread
 from mitim_tools.misc_tools.IOtools import printMsg as print
@@ -61,13 +74,25 @@ New handling of jobs in remote or local clusters. Example use:
     # Run job
     job.run()
 
+To run many jobs concurrently (e.g. to several machines), pass them to a mitim_job_manager instead (see below).
+
+Parallel evaluations of python functions (ParallelProcedure) run in reusable executors (see mitim_executor).
+
 """
 
 
 class mitim_job:
-    def __init__(self, folder_local):
+    def __init__(self, folder_local, use_pool=True):
+        """
+        use_pool: share the SSH connection to the machine with other jobs (see SSHpool) instead of opening
+            and closing a connection for every job
+        """
         self.folder_local = folder_local
         self.jobid = None
+        self.use_pool = use_pool
+        self.connection = None
+        self.sftp = None
+        self.label_log_files = ""
 
     def define_machine(
         self,
@@ -120,6 +145,25 @@ class mitim_job:
         )
         self.folderExecution = self.machineSettings["folderWork"]
 
+        # How files are sent and retrieved (see send and retrieve), can be set per machine in config_user.json
+        self.transfer = {
+            "stream": False,
+            "compression": "gz",
+            "level": 6,
+            "sync": False,
+            "hardlink": False,
+            "cache": None,
+            "retries": 3,
+            "retry_wait": 1,
+        }
+        self.transfer.update(self.machineSettings.get("transfer", {}))
+
+        if self.transfer["cache"] is None:
+            # Next to the scratch folders of the jobs
+            self.transfer["cache"] = os.path.join(
+                os.path.dirname(os.path.normpath(self.folderExecution)), "mitim_sync_cache"
+            )
+
     def prep(
         self,
         command,
@@ -142,19 +186,24 @@ class mitim_job:
 
         """
 
-        # Pass to class
+        # Pass to class (copies, as run() modifies them)
         self.command = command
-        self.input_files = input_files
-        self.input_folders = input_folders
-        self.output_files = output_files
-        self.output_folders = output_folders
+        self.input_files = list(input_files)
+        self.input_folders = list(input_folders)
+        self.output_files = list(output_files)
+        self.output_folders = list(output_folders)
         self.check_files_in_folder = check_files_in_folder
 
         self.shellPreCommands = shellPreCommands
         self.shellPostCommands = shellPostCommands
         self.label_log_files = label_log_files
 
-    def run(self, waitYN=True, timeoutSecs=1e6, removeScratchFolders=True):
+    def run(self, waitYN=True, timeoutSecs=1e6, removeScratchFolders=True, partial=False):
+        """
+        If partial, missing outputs do not stop the process: which ones were received is in self.received
+        (see retrieve), so that the caller can run again only what failed
+        """
+
         if not waitYN:
             removeScratchFolders = False
 
@@ -187,6 +236,10 @@ class mitim_job:
         if fileSHELL not in self.input_files:
             self.input_files.append(fileSHELL)
 
+        # Logs of each task of a job array (slurm_output{label}_%a.dat), to know what happened to each of them
+        if self.launchSlurm and self.slurm_settings["job_array"] is not None:
+            self.output_files.extend(slurm_log_files(self.slurm_settings["job_array"], self.label_log_files))
+
         self.output_files = curateOutFiles(self.output_files)
 
         # Relative paths TO FIX
@@ -204,6 +257,7 @@ class mitim_job:
             timeoutSecs=timeoutSecs,
             check_if_files_received=waitYN,
             check_files_in_folder=self.check_files_in_folder,
+            partial=partial,
         )
 
         # Get jobid
@@ -227,6 +281,7 @@ class mitim_job:
         removeScratchFolders=True,
         check_if_files_received=True,
         check_files_in_folder={},
+        partial=False,
     ):
         """
         My philosophy is to always wait for the execution of all commands. If I need
@@ -257,6 +312,7 @@ class mitim_job:
             wait_for_all_commands=wait_for_all_commands,
             printYN=True,
             timeoutSecs=timeoutSecs if timeoutSecs < 1e6 else None,
+            retry=False,
         )
 
         # ~~~~~~ Retrieve
@@ -269,6 +325,11 @@ class mitim_job:
         if received:
             if wait_for_all_commands and removeScratchFolders:
                 self.remove_scratch_folder()
+        elif partial:
+            print(
+                f"\t* Not all expected files received ({sum(self.received.values())}/{len(self.received)} outputs complete), not removing scratch folder",
+                typeMsg="w",
+            )
         else:
             cont = print(
                 "\t* Not all expected files received, not removing scratch folder",
@@ -309,17 +370,61 @@ class mitim_job:
         if log_file is not None:
             paramiko.util.log_to_file(log_file)
 
+        if getattr(self, "use_pool", True):
+            self.pool_key = (
+                self.target_host,
+                self.target_user,
+                self.machineSettings["port"],
+                self.jump_host,
+                self.jump_user,
+                self.machineSettings["identity"],
+            )
+            self.connection = ssh_pool.get(
+                self.pool_key, lambda: self.open_connection(open_sftp=False)
+            )
+            self.ssh, self.jump_client = self.connection.ssh, self.connection.jump_client
+            self.sftp = None  # Opened when a transfer needs it (get_sftp)
+        else:
+            self.connection = None
+            self.open_connection()
+
+    def open_connection(self, open_sftp=True):
         try:
             self.define_jump()
-            self.define_server()
+            self.define_server(open_sftp=open_sftp)
         except paramiko.ssh_exception.AuthenticationException:
             # If it fails, try to disable rsa-sha2-512 and rsa-sha2-256 (e.g. for iris.gat.com)
             self.define_jump()
             self.define_server(
-                disabled_algorithms={"pubkeys": ["rsa-sha2-512", "rsa-sha2-256"]}
+                disabled_algorithms={"pubkeys": ["rsa-sha2-512", "rsa-sha2-256"]},
+                open_sftp=open_sftp,
             )
 
-    def define_server(self, disabled_algorithms=None):
+        return self.ssh, self.jump_client
+
+    def reconnect(self):
+        """
+        After a dropped connection. The pooled one is only closed when its other users release it too (they
+        get the same errors), and a new one is handed out by the pool
+        """
+        print("\t* Connection lost, reconnecting", typeMsg="w")
+        self.close_ssh()
+        self.connect_ssh()
+
+    def get_sftp(self):
+        if self.sftp is None:
+            if self.connection is not None:
+                self.sftp = self.connection.open_sftp()
+            else:
+                try:
+                    self.sftp = self.ssh.open_sftp()
+                except paramiko.sftp.SFTPError:
+                    raise Exception(
+                        "[mitim] SFTPError: Your bashrc on the server likely contains print statements"
+                    )
+        return self.sftp
+
+    def define_server(self, disabled_algorithms=None, open_sftp=True):
         # Create a new SSH client for the target machine
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -335,6 +440,9 @@ class mitim_job:
             allow_agent=True,
         )
 
+        if not open_sftp:
+            return
+
         try:
             self.sftp = self.ssh.open_sftp()
         except paramiko.sftp.SFTPError:
@@ -427,6 +535,12 @@ class mitim_job:
             f'\t* Sending files{" to remote server" if self.ssh is not None else ""}:'
         )
 
+        if self.transfer["sync"] and self.ssh is not None:
+            return self.send_sync()
+
+        if self.transfer["stream"]:
+            return self.send_stream()
+
         # Create a tarball of the local directory
         print("\t\t- Tarballing")
         with tarfile.open(
@@ -446,7 +560,7 @@ class mitim_job:
                 bar_format=" " * 20
                 + "{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{rate_fmt}{postfix}]",
             ) as t:
-                self.sftp.put(
+                self.get_sftp().put(
                     os.path.join(self.folder_local, "mitim_send.tar.gz"),
                     os.path.join(self.folderExecution, "mitim_send.tar.gz"),
                     callback=lambda sent, total_size: t.update_to(sent, total_size),
@@ -486,8 +600,16 @@ class mitim_job:
         printYN=False,
         timeoutSecs=None,
         wait_for_all_commands=True,
+        retry=True,
         **kwargs,
     ):
+        """
+        If retry, the command is run again if the connection drops (only for commands that can be repeated,
+        e.g. mkdir or squeue, not for the execution of the job itself, which would then run twice).
+        A channel refused by the server (too many sessions) means that the command did not start, so it is
+        always tried again, after a while and without touching the connection (other jobs are using it)
+        """
+
         if printYN:
             print("\t* Executing (remote):", typeMsg="i")
             print(f"\t\t{command_str}")
@@ -495,17 +617,39 @@ class mitim_job:
         output = None
         error = None
 
-        try:
-            stdin, stdout, stderr = self.ssh.exec_command(
-                command_str, timeout=timeoutSecs
-            )
-            # Wait for the command to complete and read the output
-            if wait_for_all_commands:
-                stdin.close()
-                output = stdout.read()
-                error = stderr.read()
-        except socket.timeout:
-            print("\t> Command timed out!", typeMsg="w")
+        attempt, wait_seconds = 0, 1
+        while True:
+            try:
+                stdin, stdout, stderr = self.ssh.exec_command(
+                    command_str, timeout=timeoutSecs
+                )
+                # Wait for the command to complete and read the output
+                if wait_for_all_commands:
+                    stdin.close()
+                    output = stdout.read()
+                    error = stderr.read()
+            except socket.timeout:
+                print("\t> Command timed out!", typeMsg="w")
+            except paramiko.ssh_exception.ChannelException:
+                if wait_seconds > 60:
+                    raise
+                print(f"\t> Server refused a new channel, trying again in {wait_seconds}s", typeMsg="w")
+                time.sleep(wait_seconds)
+                wait_seconds *= 2
+                continue
+            except (paramiko.ssh_exception.SSHException, EOFError, ConnectionError):
+                # Dropped connection (e.g. pooled one that went stale), try once more with a new one
+                if attempt > 0:
+                    raise
+                attempt += 1
+                self.reconnect()
+                if retry:
+                    continue
+                print(
+                    "\t> Connection dropped while executing the command, it is not executed again",
+                    typeMsg="w",
+                )
+            break
 
         return output, error
 
@@ -520,12 +664,21 @@ class mitim_job:
 
         return output, error
 
-    def retrieve(self, check_if_files_received=True, check_files_in_folder={}):
+    def retrieve(self, check_if_files_received=True, check_files_in_folder={}, partial=False):
+        """
+        Retrieve output files and folders. If some of them are not received, only those are retrieved again
+        (the ones that exist in the remote side right away, the others after waiting with exponential backoff,
+        in case they are still being written), up to transfer["retries"] times.
+
+        Returns True if all were received, or, if partial, a dictionary with whether each output file and
+        folder was received (a folder, only if it has all the files of check_files_in_folder). This is also
+        stored in self.received.
+        """
+
         print(
             f'\t* Retrieving files{" from remote server" if self.ssh is not None else ""}:'
         )
 
-        # Create a tarball of the output files & folders on the remote machine
         print(
             "\t\t- Removing local output files & folders that potentially exist from previous runs"
         )
@@ -536,6 +689,84 @@ class mitim_job:
             if os.path.exists(os.path.join(self.folder_local, folder)):
                 os.system(f"rm -rf {os.path.join(self.folder_local, folder)}")
 
+        self.retrieve_items(self.output_files + self.output_folders)
+
+        if not check_if_files_received:
+            self.received = {item: True for item in self.output_files + self.output_folders}
+            return self.received if partial else True
+
+        received = self.check_all_received(check_files_in_folder=check_files_in_folder)
+
+        wait_seconds = self.transfer["retry_wait"]
+        for attempt in range(self.transfer["retries"]):
+            if received:
+                break
+
+            missing = self.missing_outputs(check_files_in_folder=check_files_in_folder)
+
+            # Missing items that are already in the remote side failed in the transfer, retrieve them now
+            available = self.remote_existing(missing)
+            if len(available) == 0:
+                print(
+                    f"\t* Not all received, and not found remotely, trying again in {wait_seconds}s",
+                    typeMsg="w",
+                )
+                time.sleep(wait_seconds)
+                wait_seconds *= 2
+                available = self.remote_existing(missing)
+
+            if len(available) == 0:
+                continue
+
+            print(
+                f"\t* Not all received, retrieving again {len(available)} of the {len(missing)} missing (attempt {attempt + 1}/{self.transfer['retries']})",
+                typeMsg="w",
+            )
+            self.retrieve_items(available)
+            received = self.check_all_received(check_files_in_folder=check_files_in_folder)
+
+        if received:
+            print("\t\t- All correct")
+
+        return self.received if partial else received
+
+    def retrieve_items(self, items):
+        """
+        Transfer the given output files, folders or files inside output folders (relative to the execution folder).
+        A dropped connection does not stop the retrieval, the missing items are then found by the checks
+        """
+
+        try:
+            if self.transfer["stream"]:
+                self.retrieve_stream(items)
+            else:
+                self.retrieve_tarball(items)
+        except (paramiko.ssh_exception.SSHException, EOFError, ConnectionError, tarfile.TarError) as e:
+            print(f"\t\t- Transfer was interrupted ({e.__class__.__name__}: {e})", typeMsg="w")
+            if self.ssh is not None and not isinstance(e, paramiko.ssh_exception.ChannelException):
+                self.reconnect()
+
+    def remote_existing(self, items):
+        """
+        Which of the items exist in the execution folder (in one command)
+        """
+
+        if self.ssh is None:
+            return [
+                item for item in items if os.path.exists(os.path.join(self.folderExecution, item))
+            ]
+
+        output, _ = self.execute(
+            f"cd {self.folderExecution} && for item in {' '.join(items)}; do [ -e $item ] && echo $item; done"
+        )
+        existing = output.decode(errors="ignore").split() if output is not None else []
+
+        return [item for item in items if item in existing]
+
+    def retrieve_tarball(self, items=None):
+        if items is None:
+            items = self.output_files + self.output_folders
+
         # Create a tarball of the output files & folders on the remote machine
         print("\t\t- Tarballing")
         self.execute(
@@ -544,25 +775,18 @@ class mitim_job:
             + " -C "
             + self.folderExecution
             + " "
-            + " ".join(self.output_files + self.output_folders)
+            + " ".join(items)
         )
 
         # Download the tarball
         print("\t\t- Downloading")
+        if os.path.exists(os.path.join(self.folder_local, "mitim_receive.tar.gz")):
+            os.remove(os.path.join(self.folder_local, "mitim_receive.tar.gz"))
         if self.ssh is not None:
-            with TqdmUpTo(
-                unit="B",
-                unit_scale=True,
-                miniters=1,
-                desc="mitim_receive.tar.gz",
-                bar_format=" " * 20
-                + "{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{rate_fmt}{postfix}]",
-            ) as t:
-                self.sftp.get(
-                    os.path.join(self.folderExecution, "mitim_receive.tar.gz"),
-                    os.path.join(self.folder_local, "mitim_receive.tar.gz"),
-                    callback=lambda sent, total_size: t.update_to(sent, total_size),
-                )
+            self.download(
+                os.path.join(self.folderExecution, "mitim_receive.tar.gz"),
+                os.path.join(self.folder_local, "mitim_receive.tar.gz"),
+            )
         else:
             os.system(
                 "cp "
@@ -583,24 +807,213 @@ class mitim_job:
         os.remove(os.path.join(self.folder_local, "mitim_receive.tar.gz"))
         self.execute("rm " + os.path.join(self.folderExecution, "mitim_receive.tar.gz"))
 
-        # Check if all files were received
-        if check_if_files_received:
-            received = self.check_all_received(
-                check_files_in_folder=check_files_in_folder
-            )
-            if received:
-                print("\t\t- All correct")
-            else:
-                print("\t* Not all received, trying once again", typeMsg="w")
-                time.sleep(10)
-                _ = self.retrieve(check_if_files_received=False)
-                received = self.check_all_received(
-                    check_files_in_folder=check_files_in_folder
+    def download(self, file_remote, file_local):
+        """
+        Download a file with SFTP. If the connection drops, it reconnects and resumes from the bytes that were
+        already downloaded (up to transfer["retries"] times, with exponential backoff)
+        """
+
+        wait_seconds = self.transfer["retry_wait"]
+        for attempt in range(self.transfer["retries"] + 1):
+            try:
+                total_size = self.get_sftp().stat(file_remote).st_size
+                offset = os.path.getsize(file_local) if os.path.exists(file_local) else 0
+
+                with TqdmUpTo(
+                    unit="B",
+                    unit_scale=True,
+                    miniters=1,
+                    desc=os.path.basename(file_local),
+                    bar_format=" " * 20
+                    + "{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{rate_fmt}{postfix}]",
+                ) as t:
+                    t.update_to(offset, total_size)
+                    with self.get_sftp().open(file_remote, "rb") as f_remote, open(file_local, "ab") as f_local:
+                        f_remote.seek(offset)
+                        f_remote.prefetch(total_size)  # end offset of the file, not the remaining bytes
+                        for block in iter(lambda: f_remote.read(32768), b""):
+                            f_local.write(block)
+                            offset += len(block)
+                            t.update_to(offset, total_size)
+
+                if offset == total_size:
+                    return
+            except (paramiko.ssh_exception.SSHException, EOFError, ConnectionError, OSError) as e:
+                if attempt == self.transfer["retries"]:
+                    raise
+                print(
+                    f"\t\t- Download interrupted at {os.path.getsize(file_local) if os.path.exists(file_local) else 0} bytes ({e.__class__.__name__}), resuming in {wait_seconds}s",
+                    typeMsg="w",
                 )
+                time.sleep(wait_seconds)
+                wait_seconds *= 2
+                if not isinstance(e, paramiko.ssh_exception.ChannelException):
+                    self.reconnect()
+
+        raise Exception(f"[mitim] File {file_remote} could not be downloaded completely")
+
+    # --------------------------------------------------------------------
+    # Streaming transfers: a tar stream is piped into (or out of) tar in the
+    # other side, with no intermediate tarball files or extra commands
+    # --------------------------------------------------------------------
+
+    def send_stream(self):
+        compression, level = self.transfer["compression"], self.transfer["level"]
+
+        print(
+            f'\t\t- Streaming tar ({compression if compression is not None else "no"} compression) into {self.folderExecution}'
+        )
+
+        stream = self.open_stream(
+            f"tar -x{tar_compression_flags[compression]}f - -C {self.folderExecution}"
+        )
+
+        with compression_stream(stream.stdin, compression, level, "wb") as fileobj:
+            with tarfile.open(fileobj=fileobj, mode="w|") as tar:
+                for file in self.input_files + self.input_folders:
+                    tar.add(os.path.join(self.folder_local, file), arcname=file)
+
+        exit_status, error = stream.finish()
+        if exit_status != 0:
+            print(f"\t\t- Extraction of stream failed: {error}", typeMsg="w")
+
+    def retrieve_stream(self, items=None):
+        if items is None:
+            items = self.output_files + self.output_folders
+
+        compression, level = self.transfer["compression"], self.transfer["level"]
+
+        print(
+            f'\t\t- Streaming tar ({compression if compression is not None else "no"} compression) from {self.folderExecution}'
+        )
+
+        command = f'tar -cf - -C {self.folderExecution} {" ".join(items)}'
+        if compression is not None:
+            command += f" | {tar_compression_commands[compression]} -{level}"
+
+        stream = self.open_stream(command)
+
+        with compression_stream(stream.stdout, compression, level, "rb") as fileobj:
+            with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+                tar.extractall(path=self.folder_local)
+
+        # Files that do not exist are reported by tar but do not stop the transfer of the rest
+        _, error = stream.finish()
+        if error:
+            print(f"\t\t- {error}", verbose=verbose_level)
+
+    # --------------------------------------------------------------------
+    # Delta synchronization: files are stored by content hash in a cache folder
+    # of the remote machine, only the ones that are not there yet are sent, and
+    # the scratch folder is assembled from the cache in the remote side
+    # --------------------------------------------------------------------
+
+    def send_sync(self):
+        cache = self.transfer["cache"]
+
+        # Content hash of each file to send
+        files = {}
+        for item in self.input_files + self.input_folders:
+            path = os.path.join(self.folder_local, item)
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    for name in names:
+                        file = os.path.join(root, name)
+                        files[os.path.relpath(file, self.folder_local)] = file
+            else:
+                files[item] = path
+
+        hashes = {file: hash_file(files[file]) for file in files}
+
+        # Blobs that the remote cache does not have (known ones are not asked again)
+        manifest = sync_manifest.setdefault(
+            (self.machineSettings["machine"], self.machineSettings["user"], cache), set()
+        )
+        unknown = sorted(set(hashes.values()) - manifest)
+        if len(unknown) > 0:
+            output, _ = self.execute(
+                f"mkdir -p {cache} && cd {cache} && for h in {' '.join(unknown)}; do [ -f $h ] && echo $h; done"
+            )
+            manifest.update(output.decode().split() if output is not None else [])
+
+        missing = {hash_value: files[file] for file, hash_value in hashes.items() if hash_value not in manifest}
+
+        print(
+            f"\t\t- Syncing {len(files)} files: {len(files)-len(missing)} already in remote cache, sending {len(missing)} ({sum(os.path.getsize(f) for f in missing.values())/1E6:.2f}MB)"
+        )
+
+        # Send missing blobs, extracted first in a private folder so that no job sees a partial blob
+        if len(missing) > 0:
+            incoming = f"{cache}/.incoming_{socket.gethostname()}_{os.getpid()}_{time.time_ns()}"
+            compression, level = self.transfer["compression"], self.transfer["level"]
+
+            stream = self.open_stream(
+                f"mkdir -p {incoming} && tar -x{tar_compression_flags[compression]}f - -C {incoming} && mv -f {incoming}/* {cache}/ && rmdir {incoming}"
+            )
+            with compression_stream(stream.stdin, compression, level, "wb") as fileobj:
+                with tarfile.open(fileobj=fileobj, mode="w|") as tar:
+                    for hash_value, file in missing.items():
+                        tar.add(file, arcname=hash_value)
+
+            exit_status, error = stream.finish()
+            if exit_status != 0:
+                raise Exception(f"[mitim] Files could not be sent to cache {cache}: {error}")
+
+            manifest.update(missing.keys())
+
+        # Assemble scratch folder from the cache, in one remote command
+        command = "cp -p" if not self.transfer["hardlink"] else "ln -f"
+        script = ["set -e"]
+        for folder in sorted(set(os.path.dirname(file) for file in files)):
+            script.append(f'mkdir -p "{os.path.join(self.folderExecution, folder)}"')
+        for file, hash_value in hashes.items():
+            destination = os.path.join(self.folderExecution, file)
+            script.append(f'{command} {cache}/{hash_value} "{destination}"')
+            script.append(f'chmod {os.stat(files[file]).st_mode & 0o777:o} "{destination}"')
+
+        stream = self.open_stream("bash -s")
+        stream.stdin.write(("\n".join(script) + "\n").encode())
+        exit_status, error = stream.finish()
+
+        if exit_status != 0:
+            # Cache may have been cleaned in the remote machine, forget what is known and start over
+            print(f"\t\t- Assembling from cache failed ({error}), sending all files again", typeMsg="w")
+            sync_manifest.pop((self.machineSettings["machine"], self.machineSettings["user"], cache), None)
+            self.transfer["sync"] = False
+            self.send()
+            self.transfer["sync"] = True
+
+    def open_stream(self, command_str):
+        """
+        Start command_str (remotely or locally) with its stdin and stdout available as file objects
+        """
+
+        if self.ssh is not None:
+            stdin, stdout, stderr = self.ssh.exec_command(command_str)
+
+            def finish():
+                stdin.flush()
+                stdin.channel.shutdown_write()
+                exit_status = stdout.channel.recv_exit_status()
+                return exit_status, stderr.read().decode(errors="ignore").strip()
+
         else:
-            received = True
+            process = subprocess.Popen(
+                command_str,
+                shell=True,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            stdin, stdout = process.stdin, process.stdout
+
+            def finish():
+                if not process.stdin.closed:
+                    process.stdin.close()
+                error = process.stderr.read().decode(errors="ignore").strip()
+                return process.wait(), error
 
-        return received
+        return types.SimpleNamespace(stdin=stdin, stdout=stdout, finish=finish)
 
     def remove_scratch_folder(self):
         print(f'\t* Removing{" remote" if self.ssh is not None else ""} folder')
@@ -614,9 +1027,22 @@ class mitim_job:
             return self.close_ssh(*args, **kwargs)
 
     def close_ssh(self):
+        if self.sftp is not None:
+            try:
+                self.sftp.close()
+            except Exception:
+                pass
+            self.sftp = None
+
+        if getattr(self, "connection", None) is not None:
+            # The pooled connection stays open for other jobs
+            print("\t* Releasing connection to the pool")
+            ssh_pool.release(self.pool_key, self.connection)
+            self.connection = None
+            return
+
         print("\t* Closing connection")
 
-        self.sftp.close()
         self.ssh.close()
 
         if self.jump_client is not None:
@@ -624,7 +1050,7 @@ class mitim_job:
 
     # --------------------------------------------------------------------
 
-    def check(self):
+    def check(self, read_log=True):
         """
         Check job status slurm
 
@@ -633,90 +1059,101 @@ class mitim_job:
                 which the check command uses to check the status of the job.
             - If the class was initiated but not run, it will not have the jobid, so it will
                 try to find it from the job_name, which must match the submitted one.
+
+        The status is read directly from the output of squeue (and sacct, for jobs that already left the
+        queue), together with the slurm log of the job if read_log, in one command (see check_jobs).
         """
 
-        if self.jobid is not None:
-            txt_look = f"-j {self.jobid}"
-        else:
-            txt_look = f"-n {self.slurm_settings['name']}"
+        check_jobs([self], read_log=read_log)
 
-        command = f'cd {self.folderExecution} && squeue {txt_look} -o "%.15i %.24P %.18j %.10u %.10T %.10M %.10l %.5D %R" > squeue_output.dat'
+    def wait_until_finished(self, check_every_seconds=30, check_max_seconds=600, timeout=None):
+        """
+        Poll the status of the job until it is not in the queue anymore, with exponential backoff between checks
+        (starting in check_every_seconds and doubling up to check_max_seconds)
+        """
 
-        if "output_files" in self.__dict__:
-            output_files_backup = copy.deepcopy(self.output_files)
-            output_folders_backup = copy.deepcopy(self.output_folders)
-            wasThere = True
-        else:
-            wasThere = False
+        time_init = time.time()
+        wait_seconds = check_every_seconds
+        while True:
+            self.check(read_log=False)
+            if self.status == 2:
+                break
+            if timeout is not None and (time.time() - time_init) > timeout:
+                print(f"\t* Job still in the queue after {timeout}s, not waiting anymore", typeMsg="w")
+                break
+            time.sleep(wait_seconds)
+            wait_seconds = min(wait_seconds * 2, check_max_seconds)
+
+        # Read the log at the end
+        self.check()
+
+    def cancel(self):
+        """
+        Cancel the slurm job (by jobid or, if not known, by name)
+        """
 
-        self.output_files = [
-            "slurm_output.dat",  # The slurm results of the main job!
-            "squeue_output.dat",  # The output of the squeue command
-        ]
-        self.output_folders = []
+        if self.jobid is not None:
+            command = f"scancel {self.jobid}"
+        else:
+            command = f"scancel -u $(whoami) -n {self.slurm_settings['name']}"
 
         self.connect()
-        output, error = self.execute(command, printYN=True)
-        self.retrieve()
+        self.execute(command)
         self.close()
-        self.interpret_status()
 
-        # Back to original
-        if wasThere:
-            self.output_folders = output_folders_backup
-            self.output_files = output_files_backup
+        print(f"\t* Job {self.jobid if self.jobid is not None else self.slurm_settings['name']} was cancelled")
 
-    def interpret_status(self):
+    def interpret_status(self, info=None, final_state=None, log=None):
         """
         Status of job:
             0: Submitted/pending
             1: Running
             2: Not found / finished
+
+        info is the squeue information of the job (None if not in the queue), final_state the state reported
+        by sacct once the job left the queue (if available) and log the content of the slurm log of the job
         """
 
         # -----------------------------------------------
-        # Read output of squeue command -> self.infoSLURM
+        # squeue information -> self.infoSLURM
         # -----------------------------------------------
 
-        with open(self.folder_local + "/squeue_output.dat", "r") as f:
-            output_squeue = f.read()
-        output_squeue = str(output_squeue)[3:].split("\n")
-
-        if (len(output_squeue[0].split()) == 0) or (len(output_squeue[1]) == 0):
+        if info is None:
             self.infoSLURM = {"STATE": "NOT FOUND"}
             self.jobid_found = None
         else:
-            self.infoSLURM = {}
-            for i in range(len(output_squeue[0].split())):
-                self.infoSLURM[output_squeue[0].split()[i]] = output_squeue[1].split()[
-                    i
-                ]
-
+            self.infoSLURM = info
             self.jobid_found = self.infoSLURM["JOBID"]
 
+        if final_state is not None:
+            self.infoSLURM["FINAL_STATE"] = final_state
+
         # -----------------------------------------------
         # Interpret status
         # -----------------------------------------------
 
-        if self.infoSLURM["STATE"] == "PENDING":
+        if self.infoSLURM["STATE"] in slurm_states_pending:
             self.status = 0
-        elif (self.infoSLURM["STATE"] == "RUNNING") or (
-            self.infoSLURM["STATE"] == "COMPLETING"
-        ):
+        elif self.infoSLURM["STATE"] in slurm_states_running:
             self.status = 1
-        elif self.infoSLURM["STATE"] == "NOT FOUND":
+        elif self.infoSLURM["STATE"] in slurm_states_finished + ["NOT FOUND"]:
             self.status = 2
         else:
-            print("Unknown SLURM status, please check")
-            embed()
+            # Still in the queue, so it will be checked again
+            print(
+                f'\t* Unknown SLURM state "{self.infoSLURM["STATE"]}", considering the job as running',
+                typeMsg="w",
+            )
+            self.status = 1
 
         # ------------------------------------------------------------
-        # If it was available, read the status of the ACTUAL slurm job
+        # Slurm log of the ACTUAL job
         # ------------------------------------------------------------
 
-        if os.path.exists(self.folder_local + "/slurm_output.dat"):
-            with open(self.folder_local + "/slurm_output.dat", "r") as f:
-                self.log_file = f.readlines()
+        if log is not None:
+            self.log_file = log.splitlines(keepends=True)
+            with open(f"{self.folder_local}/slurm_output{self.label_log_files}.dat", "w") as f:
+                f.write(log)
         else:
             self.log_file = None
 
@@ -729,40 +1166,584 @@ class mitim_job:
             txt += f' (jobid {self.jobid_found}, found from name "{self.slurm_settings["name"]}")'
         elif self.jobid is not None:
             txt += f" (jobid {self.jobid})"
-        txt += f', is {self.infoSLURM["STATE"]} (job.infoSLURM)'
+        txt += f', is {self.infoSLURM["STATE"]}{f" ({final_state})" if final_state is not None else ""} (job.infoSLURM)'
         if self.log_file is not None:
             txt += f". Log file (job.log_file) was retrieved, and has {len(self.log_file)} lines"
         print(txt)
 
     def check_all_received(self, check_files_in_folder={}):
         print("\t* Checking if all expected files & folders were received")
-        received = True
 
-        # Check if all files were received
+        missing = self.missing_outputs(check_files_in_folder=check_files_in_folder)
+
+        for item in missing:
+            if item in self.output_files:
+                print(f"\t\t- File {item} not received", typeMsg="w")
+            elif item in self.output_folders:
+                print(f"\t\t- Folder {item} not received", typeMsg="w")
+            else:
+                folder = [folder for folder in self.output_folders if item.startswith(f"{folder}/")][0]
+                print(
+                    f"\t\t- File {item[len(folder) + 1:]} not received in folder {folder}",
+                    typeMsg="w",
+                )
+
+        # Whether each output file and folder (with all its files) was received
+        self.received = {}
+        for item in self.output_files + self.output_folders:
+            self.received[item] = not any(
+                [(i == item) or i.startswith(f"{item}/") for i in missing]
+            )
+
+        return len(missing) == 0
+
+    def missing_outputs(self, check_files_in_folder={}):
+        """
+        Output files, folders and files in folders (optional information provided at job execution) that are
+        not in the local folder
+        """
+
+        missing = []
         for file in self.output_files:
             if not os.path.exists(os.path.join(self.folder_local, file)):
-                print(f"\t\t- File {file} not received", typeMsg="w")
-                received = False
+                missing.append(file)
 
         for folder in self.output_folders:
-            # Check if all folders were received
             if not os.path.exists(os.path.join(self.folder_local, folder)):
-                print(f"\t\t- Folder {folder} not received", typeMsg="w")
-                received = False
-            # Check if all files in folder were received (optional information provided at job execution)
+                missing.append(folder)
+            elif folder in check_files_in_folder:
+                for file in check_files_in_folder[folder]:
+                    if not os.path.exists(os.path.join(self.folder_local, folder, file)):
+                        missing.append(f"{folder}/{file}")
+
+        return missing
+
+
+# --------------------------------------------------------------------
+# Concurrent execution of many jobs
+# --------------------------------------------------------------------
+
+
+class mitim_job_manager:
+    """
+    Runs many mitim_job (already defined with define_machine and prep) concurrently, with a limit of jobs at the
+    same time per machine, keeping track of their states in one place. Outputs of each job are retrieved as
+    soon as it finishes. Jobs run with waitYN=False in slurm are monitored (job.check) until they are not in
+    the queue anymore, and then their outputs are retrieved.
+
+    Example use:
+        manager = FARMINGtools.mitim_job_manager(max_per_machine={"eofe7.mit.edu": 4})
+        for i, job in enumerate(jobs):
+            manager.submit(job, label=f"job{i}")
+        manager.wait()
+
+        manager.states     -> {"job0": "done", "job1": "failed", ...}
+        manager.errors     -> {"job1": traceback string}
+
+    States: "queued" (waiting for a slot in its machine), "running", "monitoring" (in slurm, not waited for),
+    "retrieving", "done" and "failed"
+
+    Jobs run without interaction (partial retrieval, see mitim_job.run): a job whose outputs were not all received
+    is "failed", with the missing ones in errors and whether each output was received in manager.received.
+    Jobs being monitored are all checked together by one thread, with a single query per machine (check_jobs).
+    """
+
+    def __init__(
+        self,
+        max_per_machine={},  # Maximum concurrent jobs for each machine (as in machineSettings["machine"])
+        max_default=8,  # ... for machines not in max_per_machine
+        max_workers=32,  # Maximum jobs handled at the same time in total
+        check_every_seconds=60,  # Initial polling interval for jobs not waited for (grows x2, up to 10 minutes)
+        on_complete=None,  # Function (label, job) called when a job finishes successfully
+    ):
+        self.max_per_machine, self.max_default = max_per_machine, max_default
+        self.check_every_seconds = check_every_seconds
+        self.on_complete = on_complete
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+        self.jobs, self.futures, self.states, self.errors, self.received = {}, {}, {}, {}, {}
+
+        # Jobs in slurm not waited for: label -> [job, event set when it left the queue, error]
+        self.monitored = {}
+        self.monitor_thread = None
+        self.monitor_wakeup = threading.Event()
+
+    def _semaphore(self, machine):
+        with self.lock:
+            if machine not in self.semaphores:
+                self.semaphores[machine] = threading.Semaphore(
+                    self.max_per_machine.get(machine, self.max_default)
+                )
+            return self.semaphores[machine]
+
+    def _set_state(self, label, state):
+        with self.lock:
+            self.states[label] = state
+        print(f"\t* Job {label}: {state}", verbose=verbose_level)
+
+    def submit(self, job, label=None, **kwargs_run):
+        """
+        Submit job (kwargs_run are passed to job.run), returns its label
+        """
+
+        label = label or f"job{len(self.jobs)}"
+        if label in self.jobs:
+            raise Exception(f"[mitim] Job {label} already submitted to the manager")
+
+        self.jobs[label] = job
+        self._set_state(label, "queued")
+        self.futures[label] = self.executor.submit(self._process, label, job, kwargs_run)
+
+        return label
+
+    def _process(self, label, job, kwargs_run):
+        try:
+            with self._semaphore(job.machineSettings["machine"]):
+                self._set_state(label, "running")
+                job.run(**{"partial": True, **kwargs_run})
+
+                # Job was submitted to slurm without waiting for it: monitor it and retrieve when finished
+                if not kwargs_run.get("waitYN", True) and job.launchSlurm:
+                    self._set_state(label, "monitoring")
+                    self._monitor_until_finished(label, job)
+
+                    self._set_state(label, "retrieving")
+                    job.connect()
+                    job.retrieve(check_files_in_folder=job.check_files_in_folder, partial=True)
+                    job.close()
+
+            with self.lock:
+                self.received[label] = job.received
+            missing = [item for item in job.received if not job.received[item]]
+            if len(missing) > 0:
+                raise Exception(f"[mitim] Outputs not received: {missing}")
+
+            self._set_state(label, "done")
+
+            if self.on_complete is not None:
+                self.on_complete(label, job)
+
+        except Exception:
+            with self.lock:
+                self.errors[label] = traceback.format_exc()
+            self._set_state(label, "failed")
+            print(f"\t* Job {label} failed:\n{self.errors[label]}", typeMsg="w")
+
+    def _monitor_until_finished(self, label, job):
+        record = [job, threading.Event(), None]
+        with self.lock:
+            self.monitored[label] = record
+            if self.monitor_thread is None:
+                self.monitor_thread = threading.Thread(target=self._monitor, daemon=True)
+                self.monitor_thread.start()
+        self.monitor_wakeup.set()
+
+        record[1].wait()
+        if record[2] is not None:
+            raise record[2]
+
+    def _monitor(self):
+        """
+        Check all monitored jobs at once (check_jobs) until they leave the queue, with exponential backoff
+        (back to check_every_seconds when new jobs arrive)
+        """
+
+        wait_seconds, failures = self.check_every_seconds, 0
+        while True:
+            with self.lock:
+                if len(self.monitored) == 0:
+                    self.monitor_thread = None
+                    return
+                monitored = dict(self.monitored)
+
+            try:
+                check_jobs([record[0] for record in monitored.values()], read_log=False)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"\t* Checking the jobs failed ({e.__class__.__name__}: {e})", typeMsg="w")
+
+            for label, record in monitored.items():
+                if failures >= 3:
+                    record[2] = Exception(f"[mitim] Status of job {label} could not be checked")
+                elif getattr(record[0], "status", None) != 2:
+                    continue
+                with self.lock:
+                    del self.monitored[label]
+                record[1].set()
+
+            self.monitor_wakeup.clear()
+            if self.monitor_wakeup.wait(wait_seconds):
+                wait_seconds = self.check_every_seconds
+            else:
+                wait_seconds = min(wait_seconds * 2, 600)
+
+    def wait(self, labels=None, timeout=None):
+        """
+        Block until the jobs (all by default) are finished, returns their states
+        """
+
+        labels = labels or list(self.futures.keys())
+        concurrent.futures.wait([self.futures[label] for label in labels], timeout=timeout)
+
+        return {label: self.states[label] for label in labels}
+
+    def as_completed(self, labels=None):
+        """
+        Iterate over labels of jobs as they finish
+        """
+
+        labels = labels or list(self.futures.keys())
+        futures = {self.futures[label]: label for label in labels}
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future]
+
+    def summary(self):
+        with self.lock:
+            states = list(self.states.values())
+        return {state: states.count(state) for state in set(states)}
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+def run_jobs(jobs, max_per_machine={}, max_default=8, **kwargs_run):
+    """
+    Run a list of mitim_job concurrently and wait for all of them, returns the list of states
+    """
+
+    manager = mitim_job_manager(max_per_machine=max_per_machine, max_default=max_default)
+    labels = [manager.submit(job, **kwargs_run) for job in jobs]
+    states = manager.wait(labels)
+    manager.shutdown()
+
+    return [states[label] for label in labels]
+
+
+# --------------------------------------------------------------------
+# Pool of SSH connections, shared by all mitim_job instances
+# --------------------------------------------------------------------
+
+
+class SSHconnection:
+    """
+    One authenticated connection (and its jump host, if any) to a remote machine. Every command is executed in
+    its own channel of the same transport (paramiko handles that in a thread-safe way), and every job opens its
+    own SFTP session only while it transfers files, so that several jobs can use the connection at the same time.
+    """
+
+    def __init__(self, ssh, jump_client=None, keepalive=30):
+        self.ssh, self.jump_client = ssh, jump_client
+        self.users, self.last_used = 0, time.time()
+
+        self.ssh.get_transport().set_keepalive(keepalive)
+
+    def is_alive(self):
+        transport = self.ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+
+        # Cheap message that the server ignores, it fails if the connection was dropped
+        try:
+            transport.send_ignore()
+        except (paramiko.ssh_exception.SSHException, EOFError, OSError):
+            return False
+
+        return True
+
+    def open_sftp(self):
+        try:
+            return self.ssh.open_sftp()
+        except paramiko.sftp.SFTPError:
+            raise Exception(
+                "[mitim] SFTPError: Your bashrc on the server likely contains print statements"
+            )
+
+    def close(self):
+        self.ssh.close()
+        if self.jump_client is not None:
+            self.jump_client.close()
+
+
+class SSHpool:
+    """
+    Process-wide pool of SSHconnection, keyed on (machine, user, port, jump host, jump user, identity), so that
+    all the jobs sent to the same machine share authenticated connections:
+        - Each job uses at most channels_per_user channels at once (a command and an SFTP session), and servers
+          limit the channels of a connection (MaxSessions, 10 by default in OpenSSH), so a connection is shared
+          by up to max_channels // channels_per_user jobs. Another connection is opened when all are full.
+        - Connections are kept alive (keepalive packets) and health-checked before being handed out.
+        - Dead connections are dropped and re-opened automatically.
+        - Connections idle for more than max_idle seconds (and not in use) are closed.
+        - After a fork (e.g. multiprocessing pools), children do not reuse the sockets of the parent.
+    """
+
+    def __init__(self, keepalive=30, max_idle=600, max_channels=8, channels_per_user=2):
+        self.keepalive, self.max_idle = keepalive, max_idle
+        self.max_users = max(max_channels // channels_per_user, 1)
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def _check_process(self):
+        if os.getpid() != self.pid:
+            # Sockets belong to the parent process, do not close them from here
+            self.connections, self.lock, self.pid = {}, threading.Lock(), os.getpid()
+
+    def get(self, key, open_connection):
+        """
+        Connection for key with room for one more user, opened with open_connection() (which returns ssh,
+        jump_client) if needed
+        """
+
+        self._check_process()
+
+        with self.lock:
+            self._close_idle()
+
+            connections = self.connections.setdefault(key, [])
+            for connection in [c for c in connections if c.users == 0 and not c.is_alive()]:
+                print("\t\t- Pooled connection is not alive anymore, reconnecting", typeMsg="w")
+                connection.close()
+                connections.remove(connection)
+
+            available = [
+                c for c in connections if c.users < self.max_users and (c.users == 0 or c.is_alive())
+            ]
+            if len(available) > 0:
+                connection = min(available, key=lambda c: c.users)
+                print("\t\t- Reusing pooled connection", verbose=verbose_level)
             else:
-                if folder in check_files_in_folder:
-                    for file in check_files_in_folder[folder]:
-                        if not os.path.exists(
-                            os.path.join(self.folder_local, folder, file)
-                        ):
-                            print(
-                                f"\t\t- File {file} not received in folder {folder}",
-                                typeMsg="w",
-                            )
-                            received = False
+                ssh, jump_client = open_connection()
+                connection = SSHconnection(ssh, jump_client=jump_client, keepalive=self.keepalive)
+                connections.append(connection)
+
+            connection.users += 1
+            connection.last_used = time.time()
+
+        return connection
+
+    def release(self, key, connection):
+        """
+        The user of connection does not need it anymore. If it was dropped, it is closed when nobody uses it
+        """
+
+        with self.lock:
+            connection.users = max(connection.users - 1, 0)
+            connection.last_used = time.time()
+
+            if connection.users == 0 and not connection.is_alive():
+                connection.close()
+                if connection in self.connections.get(key, []):
+                    self.connections[key].remove(connection)
+
+    def _close_idle(self):
+        for key in list(self.connections.keys()):
+            for connection in list(self.connections[key]):
+                if connection.users == 0 and (time.time() - connection.last_used) > self.max_idle:
+                    connection.close()
+                    self.connections[key].remove(connection)
+            if len(self.connections[key]) == 0:
+                del self.connections[key]
+
+    def close_all(self):
+        self._check_process()
+        with self.lock:
+            for connections in self.connections.values():
+                for connection in connections:
+                    connection.close()
+            self.connections = {}
+
+
+ssh_pool = SSHpool()
+atexit.register(ssh_pool.close_all)
+
+
+# --------------------------------------------------------------------
+# Status of slurm jobs
+# --------------------------------------------------------------------
+
+slurm_states_pending = [
+    "PENDING",
+    "CONFIGURING",
+    "REQUEUED",
+    "REQUEUE_HOLD",
+    "REQUEUE_FED",
+    "RESV_DEL_HOLD",
+    "SUSPENDED",
+    "STOPPED",
+]
+slurm_states_running = ["RUNNING", "COMPLETING", "STAGE_OUT", "SIGNALING", "RESIZING"]
+slurm_states_finished = [
+    "COMPLETED",
+    "FAILED",
+    "CANCELLED",
+    "TIMEOUT",
+    "OUT_OF_MEMORY",
+    "NODE_FAIL",
+    "PREEMPTED",
+    "BOOT_FAIL",
+    "DEADLINE",
+    "SPECIAL_EXIT",
+    "REVOKED",
+]
+
+squeue_fields = [
+    "JOBID",
+    "PARTITION",
+    "NAME",
+    "USER",
+    "STATE",
+    "TIME",
+    "TIME_LIMIT",
+    "NODES",
+    "NODELIST(REASON)",
+]
+squeue_format = "%i|%P|%j|%u|%T|%M|%l|%D|%R"
+
+
+def array_tasks(job_array):
+    """
+    Task ids of a slurm job array specification, e.g. "0-9", "1,3,5-7", "0-15:4" or "0-9%2"
+    """
+
+    tasks = []
+    for item in job_array.split("%")[0].split(","):
+        item, _, step = item.partition(":")
+        first, _, last = item.partition("-")
+        tasks.extend(range(int(first), int(last or first) + 1, int(step or 1)))
+
+    return tasks
+
+
+def slurm_log_files(job_array=None, label_log_files=""):
+    """
+    Names of the slurm logs (output and error) that a job writes, one pair per task for job arrays
+    """
+
+    labels = [""] if job_array is None else [f"_{i}" for i in array_tasks(job_array)]
+    return [f"slurm_{kind}{label_log_files}{label}.dat" for label in labels for kind in ["output", "error"]]
+
+
+def check_jobs(jobs, read_log=True):
+    """
+    Check the slurm status of many mitim_job with a single command per machine, which lists the jobs of the
+    user in the queue (squeue), the final state of those that left it (sacct, if available) and, if read_log,
+    their slurm logs. Jobs are matched by jobid or, if not known, by name. Updates job.status, job.infoSLURM
+    and job.log_file of each job.
+    """
+
+    groups = {}
+    for job in jobs:
+        groups.setdefault((job.machineSettings["machine"], job.machineSettings["user"]), []).append(job)
+
+    for group in groups.values():
+        ids = [str(job.jobid) for job in group if job.jobid is not None]
+
+        command = f'squeue -h -u $(whoami) -o "{squeue_format}"; echo "@@mitim_sacct"'
+        if len(ids) > 0:
+            command += f' ; sacct -n -P -X -j {",".join(ids)} -o JobID,State 2>/dev/null'
+        if read_log:
+            for i, job in enumerate(group):
+                # Log of the job and, for job arrays, those of each task (slurm_output{label}_%a.dat)
+                log = f"{job.folderExecution}/slurm_output{job.label_log_files}"
+                command += f' ; for log in {log}.dat {log}_*.dat; do [ -f "$log" ] && echo "@@mitim_log {i}" && cat "$log"; done'
+
+        job0 = group[0]
+        job0.connect()
+        output, _ = job0.execute(command)
+        job0.close()
+
+        output = output.decode(errors="ignore") if output is not None else ""
+
+        # Split sections of the output
+        sections = output.split("@@mitim_log ")
+        queue_txt, _, sacct_txt = sections[0].partition("@@mitim_sacct")
+
+        queue = [
+            dict(zip(squeue_fields, line.split("|")))
+            for line in queue_txt.splitlines()
+            if line.count("|") == len(squeue_fields) - 1
+        ]
+
+        final_states = {}
+        for line in sacct_txt.splitlines():
+            if "|" in line:
+                jobid, state = line.split("|")[:2]
+                final_states[jobid.split("_")[0]] = state.split()[0] if state else state
+
+        logs = {}
+        for section in sections[1:]:
+            i, _, log = section.partition("\n")
+            logs[int(i)] = logs.get(int(i), "") + log
+
+        for i, job in enumerate(group):
+            if job.jobid is not None:
+                # Array jobs appear as jobid_task (several lines), the most advanced one is taken
+                entries = [e for e in queue if e["JOBID"].split("_")[0] == str(job.jobid)]
+            else:
+                entries = [e for e in queue if e["NAME"] == job.slurm_settings["name"]]
+
+            entries = sorted(entries, key=lambda e: e["STATE"] in slurm_states_running, reverse=True)
+
+            job.interpret_status(
+                info=entries[0] if len(entries) > 0 else None,
+                final_state=final_states.get(str(job.jobid)) if len(entries) == 0 else None,
+                log=logs.get(i) if read_log else None,
+            )
+
+
+# Hashes of blobs known to exist in each remote cache, keyed on (machine, user, cache folder)
+sync_manifest = {}
+
+# Content hashes of local files, keyed on path and reused while (mtime, size) do not change
+_file_hashes = {}
+
+
+def hash_file(file):
+    stat = os.stat(file)
+    if file in _file_hashes and _file_hashes[file][:2] == (stat.st_mtime_ns, stat.st_size):
+        return _file_hashes[file][2]
 
-        return received
+    sha = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+
+    _file_hashes[file] = (stat.st_mtime_ns, stat.st_size, sha.hexdigest())
+    return _file_hashes[file][2]
+
+
+tar_compression_flags = {None: "", "gz": "z", "bz2": "j", "xz": "J"}
+tar_compression_commands = {"gz": "gzip", "bz2": "bzip2", "xz": "xz"}
+
+
+@contextmanager
+def compression_stream(fileobj, compression, level, mode):
+    """
+    Wrap fileobj with a (de)compressor of the given codec (None, "gz", "bz2", "xz"), without closing fileobj
+    """
+
+    if compression is None:
+        yield fileobj
+        return
+
+    if compression == "gz":
+        stream = gzip.GzipFile(fileobj=fileobj, mode=mode, compresslevel=level)
+    elif compression == "bz2":
+        stream = bz2.BZ2File(fileobj, mode=mode, compresslevel=level)
+    elif compression == "xz":
+        stream = lzma.LZMAFile(fileobj, mode=mode, preset=level if "w" in mode else None)
+    else:
+        raise Exception(f"[mitim] Compression {compression} not available")
+
+    try:
+        yield stream
+    finally:
+        stream.close()
 
 
 class TqdmUpTo(tqdm):
@@ -844,18 +1825,29 @@ def run_subprocess(commandExecute, timeoutSecs=None, localRun=False):
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         executable=executable,
+        start_new_session=timeoutSecs is not None,
     )
 
+    # The timeout is handled by subprocess (not with SIGALRM, see timeout()), so that it works in any thread
+    if timeoutSecs is not None and timeoutSecs < 1e6:
+        print(
+            f'\t\t* Note: this process will be killed if time exceeds {int(timeoutSecs)}sec of execution ({datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")})',
+            typeMsg="i",
+        )
+
     result, error = None, None
-    if timeoutSecs is not None:
-        with timeout(timeoutSecs, proc=p):
-            result, error = p.communicate()
-            p.stdout.close()
-            p.stderr.close()
-    else:
-        result, error = p.communicate()
-        p.stdout.close()
-        p.stderr.close()
+    try:
+        result, error = p.communicate(timeout=timeoutSecs)
+    except subprocess.TimeoutExpired:
+        print(
+            f'\t\t\t* Killing process! ({datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")})',
+            typeMsg="w",
+        )
+        # The whole process group, as with shell=True the command runs in children of the shell
+        os.killpg(p.pid, signal.SIGKILL)
+        p.communicate()
+    p.stdout.close()
+    p.stderr.close()
 
     return result, error
 
@@ -894,38 +1886,460 @@ class PRF_ParallelClass_reduced(object):
         return self.Function(self.Params, cont)
 
 
-def ParallelProcedure(
-    Function, Params, parallel=8, howmany=8, array=True, on_dill=True
-):
-    if on_dill:
-        import multiprocessing_on_dill as multiprocessing
-    else:
-        import multiprocessing
+# --------------------------------------------------------------------
+# Reusable executors for parallel evaluations of Function(Params, cont)
+# --------------------------------------------------------------------
 
-    if UseCUDAifAvailable and torch.cuda.is_available():
-        multiprocessing.set_start_method("spawn")
 
+class mitim_executor:
     """
-	This way of pooling passes a lock when initializing every child class. It handles
-	a global lock, and then every child can call lock.acquire() and lock.release()
-	so that for instance not two at the same time open and write the same file.
-	"""
+    Pool of workers that survives between calls, to evaluate Function(Params, cont) for many values of cont.
+    Backends:
+        - "process": multiprocessing(_on_dill, if on_dill) pool, with tasks queued locally so that those not
+            started yet can be cancelled
+        - "thread": threads of this process (for functions that release the GIL or wait for I/O)
+        - "loky": loky's reusable executor (requires loky)
+
+    As in ParallelProcedure, a lock shared by all workers is available in Params["lock"].
+
+    For process backends, Function and Params are serialized once per call (not per task), and numpy arrays
+    in Params larger than shared_threshold bytes are passed through shared memory (read-only in the workers).
+
+    Example use:
+        executor = FARMINGtools.get_executor(workers=8)
+        results = executor.run(Function, Params, howmany)                  # Ordered list
+        for cont, result in executor.map(Function, Params, howmany, ordered=False):
+            ...                                                             # As they finish
+        executor.cancel()                                                   # Cancel tasks not started
+    """
+
+    def __init__(self, workers=8, backend="process", on_dill=True, shared_threshold=2**20):
+        self.workers = workers
+        self.backend = backend
+        self.on_dill = on_dill
+        self.shared_threshold = shared_threshold
+        self.pid = os.getpid()
+
+        self.calls = 0
+        self.futures = set()
+        self.lock = threading.Lock()
+        self.retired, self.closed = False, False
+
+        # Workers must share the resource tracker of this process, which is then the only one in charge of
+        # the shared memory blocks (otherwise each worker would try to clean them up when exiting)
+        if backend != "thread":
+            resource_tracker.ensure_running()
+
+        if backend == "process":
+            self.pool = dispatching_pool(workers, on_dill=on_dill)
+        elif backend == "thread":
+            self.pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers, initializer=init, initargs=(threading.Lock(),)
+            )
+        elif backend == "loky":
+            try:
+                from loky import get_reusable_executor
+            except ImportError:
+                raise Exception("[mitim] The loky backend requires the loky module (pip install loky)")
+
+            import multiprocessing
+
+            self.manager = multiprocessing.Manager()
+            self.pool = get_reusable_executor(
+                max_workers=workers, initializer=init, initargs=(self.manager.Lock(),)
+            )
+        else:
+            raise Exception(f"[mitim] Executor backend {backend} not available")
+
+    def submit(self, Function, Params, cont):
+        """
+        Single evaluation, returns a concurrent.futures.Future
+        """
+
+        return self.submit_many(Function, Params, [cont])[0]
+
+    def submit_many(self, Function, Params, conts, limit=None):
+        """
+        One evaluation per cont, returns a concurrent.futures.Future for each. At most limit of them (default,
+        the number of workers) are handed to the workers at the same time, the rest wait (and can be cancelled)
+        """
+
+        if self.backend == "thread":
+            task, args, shared = PRF_ParallelClass_reduced(Function, Params), (), []
+        else:
+            call_id, payload, shared = self.serialize(Function, Params)
+            task, args = run_serialized_task, (call_id, payload)
+
+        futures = [concurrent.futures.Future() for _ in conts]
+        queue = collections.deque(zip(futures, conts))
+        limit = min(limit, self.workers) if limit is not None else self.workers
+        running = [0]
+        feeder_lock = threading.RLock()
+
+        def feed():
+            with feeder_lock:
+                while len(queue) > 0 and running[0] < limit:
+                    future, cont = queue.popleft()
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    running[0] += 1
+                    self.pool.submit(task, *args, cont).add_done_callback(
+                        functools.partial(finish, future)
+                    )
+
+        def finish(future, task_future):
+            with feeder_lock:
+                running[0] -= 1
+            if task_future.cancelled():
+                future.set_exception(concurrent.futures.CancelledError())
+            elif task_future.exception() is not None:
+                future.set_exception(task_future.exception())
+            else:
+                future.set_result(task_future.result())
+            feed()
+
+        # Shared memory is released when all the tasks of this call are finished (or cancelled)
+        release_shared_memory(futures, shared)
+
+        with self.lock:
+            self.futures.update(futures)
+        for future in futures:
+            future.add_done_callback(self.forget)
+
+        feed()
+
+        return futures
+
+    def forget(self, future):
+        with self.lock:
+            self.futures.discard(future)
+        self.close_if_retired()
+
+    def retire(self):
+        """
+        The executor was replaced (see get_executor): it is shut down when the tasks submitted to it (also those
+        still queued, from calls running in other threads) have finished, instead of cancelling them
+        """
+
+        with self.lock:
+            self.retired = True
+        self.close_if_retired()
+
+    def close_if_retired(self):
+        with self.lock:
+            close = self.retired and (not self.closed) and len(self.futures) == 0
+            if close:
+                self.closed = True
 
-    l0 = multiprocessing.Lock()
-    pool = multiprocessing.Pool(initializer=init, initargs=(l0,), processes=parallel)
+        # Not from this thread, which may be one of the pool's own (e.g. running a done callback)
+        if close:
+            threading.Thread(target=self.shutdown, kwargs={"wait": False}, daemon=True).start()
+
+    def map(self, Function, Params, howmany, ordered=True, limit=None):
+        """
+        Yields the results in order of cont (ordered), or (cont, result) as they finish (not ordered).
+        Tasks not started yet are cancelled if the iteration is stopped
+        """
+
+        futures = self.submit_many(Function, Params, range(howmany), limit=limit)
+
+        try:
+            if ordered:
+                for future in futures:
+                    yield future.result()
+            else:
+                conts = {future: cont for cont, future in enumerate(futures)}
+                for future in concurrent.futures.as_completed(futures):
+                    yield conts[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def run(self, Function, Params, howmany, limit=None):
+        return list(self.map(Function, Params, howmany, limit=limit))
+
+    def cancel(self):
+        """
+        Cancel all the tasks that have not started yet, returns how many were cancelled
+        """
+
+        with self.lock:
+            futures = list(self.futures)
+        return sum([future.cancel() for future in futures])
+
+    def serialize(self, Function, Params):
+        """
+        Function and Params to bytes (large arrays to shared memory), to be sent with each task
+        """
+
+        self.calls += 1
+        call_id = f"{self.pid}-{id(self)}-{self.calls}"
+
+        shared = []
+        if isinstance(Params, dict):
+            Params_send = {}
+            for key, value in Params.items():
+                if isinstance(value, np.ndarray) and value.nbytes >= self.shared_threshold:
+                    shared.append(SharedArray(value))
+                    value = shared[-1]
+                Params_send[key] = value
+        else:
+            Params_send = Params
+
+        if self.on_dill:
+            import dill as pickler
+        else:
+            import pickle as pickler
+
+        payload = (self.on_dill, pickler.dumps((Function, Params_send)))
+
+        return call_id, payload, shared
+
+    def shutdown(self, wait=True, kill=False):
+        self.cancel()
+        if self.backend == "process":
+            self.pool.shutdown(wait=wait, kill=kill)
+        elif self.backend == "thread":
+            self.pool.shutdown(wait=wait)
+        else:
+            self.pool.shutdown(wait=wait, kill_workers=kill)
+            self.manager.shutdown()
+
+
+class dispatching_pool:
+    """
+    multiprocessing(_on_dill) pool behind a concurrent.futures-like submit(). Tasks are kept in a local queue and
+    handed to the pool only when there is room (twice the number of workers), so that the queued ones can be
+    cancelled with future.cancel()
+    """
+
+    def __init__(self, workers, on_dill=True):
+        if on_dill:
+            import multiprocessing_on_dill as multiprocessing
+        else:
+            import multiprocessing
+
+        if UseCUDAifAvailable and torch.cuda.is_available():
+            context = multiprocessing.get_context("spawn")
+        else:
+            context = multiprocessing.get_context()
+
+        """
+        This way of pooling passes a lock when initializing every child class. It handles
+        a global lock, and then every child can call lock.acquire() and lock.release()
+        so that for instance not two at the same time open and write the same file.
+        """
+
+        self.workers = workers
+        self.pool = context.Pool(
+            initializer=init, initargs=(context.Lock(),), processes=workers
+        )
+
+        self.queue = collections.deque()
+        self.in_pool = set()
+        self.mutex = threading.Lock()
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        with self.mutex:
+            self.queue.append((future, fn, args))
+        self.dispatch()
+        return future
+
+    def dispatch(self):
+        with self.mutex:
+            while len(self.in_pool) < 2 * self.workers and len(self.queue) > 0:
+                future, fn, args = self.queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.in_pool.add(future)
+                self.pool.apply_async(
+                    fn,
+                    args,
+                    callback=functools.partial(self.finish, future, False),
+                    error_callback=functools.partial(self.finish, future, True),
+                )
+
+    def finish(self, future, failed, result):
+        with self.mutex:
+            self.in_pool.discard(future)
+
+        if failed:
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+        self.dispatch()
+
+    def shutdown(self, wait=True, kill=False):
+        with self.mutex:
+            while len(self.queue) > 0:
+                self.queue.popleft()[0].cancel()
+
+        if kill:
+            self.pool.terminate()
+            with self.mutex:
+                futures, self.in_pool = list(self.in_pool), set()
+            for future in futures:
+                future.set_exception(Exception("[mitim] Executor was shut down"))
+        else:
+            self.pool.close()
+            if wait:
+                self.pool.join()
+            else:
+                # Reap the workers when they finish
+                threading.Thread(target=self.pool.join, daemon=True).start()
+
+
+class SharedArray:
+    """
+    Numpy array copied into a shared memory block, which is pickled as a reference to the block (so that
+    workers attach to it instead of receiving a copy)
+    """
+
+    def __init__(self, array):
+        self.shape, self.dtype = array.shape, array.dtype
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.name = self.shm.name
+        np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)[...] = array
+
+    def __getstate__(self):
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = None
+
+    def attach(self):
+        self.shm = shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        array.flags.writeable = False
+        return array
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # Arrays still pointing to it, it will be closed when they are garbage collected
+            pass
+
+    def release(self):
+        self.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def release_shared_memory(futures, shared):
+    if len(shared) == 0:
+        return
+    if len(futures) == 0:
+        for array in shared:
+            array.release()
+        return
+
+    remaining = [len(futures)]
+    counter_lock = threading.Lock()
+
+    def finished(future):
+        with counter_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for array in shared:
+                array.release()
+
+    for future in futures:
+        future.add_done_callback(finished)
+
+
+# Function and Params of the latest calls received by this worker, keyed on call id
+worker_calls = collections.OrderedDict()
+
+
+def run_serialized_task(call_id, payload, cont):
+    if call_id not in worker_calls:
+        on_dill, data = payload
+        if on_dill:
+            import dill as pickler
+        else:
+            import pickle as pickler
+        Function, Params = pickler.loads(data)
+
+        shared = []
+        if isinstance(Params, dict):
+            for key, value in Params.items():
+                if isinstance(value, SharedArray):
+                    shared.append(value)
+                    Params[key] = value.attach()
+
+        # Keep only this call (Params may be large, e.g. the whole optimization object), detaching from the
+        # shared memory of the others. A previous call that sends more tasks is deserialized again
+        while len(worker_calls) > 0:
+            _, (_, _, shared_old) = worker_calls.popitem(last=False)
+            for array in shared_old:
+                array.close()
+
+        worker_calls[call_id] = (Function, Params, shared)
+
+    Function, Params, _ = worker_calls[call_id]
+    Params["lock"] = lock
+
+    return Function(Params, cont)
+
+
+# Executors kept alive between calls, keyed on (backend, on_dill)
+executors = {}
+
+
+def get_executor(workers=8, backend="process", on_dill=True):
+    """
+    Executor of this backend, created the first time and reused afterwards (by this process). There is only one
+    per backend: if more workers are requested than it has, it is replaced by a larger one (calls that need
+    fewer workers limit their own concurrency, see mitim_executor.submit_many)
+    """
+
+    key = (backend, on_dill)
+    executor = executors.get(key)
+    if executor is None or executor.pid != os.getpid() or executor.workers < workers:
+        if executor is not None and executor.pid == os.getpid():
+            # Not handed out anymore, it finishes what was submitted to it (calls still running) and exits
+            executor.retire()
+        executors[key] = mitim_executor(workers=workers, backend=backend, on_dill=on_dill)
+    return executors[key]
+
+
+def shutdown_executors(kill=False):
+    for key in list(executors.keys()):
+        executor = executors.pop(key)
+        if executor.pid == os.getpid():
+            executor.shutdown(wait=not kill, kill=kill)
+
+
+atexit.register(shutdown_executors, kill=True)
+
+
+def ParallelProcedure(
+    Function, Params, parallel=8, howmany=8, array=True, on_dill=True, backend="process"
+):
+    """
+    Evaluate Function(Params, cont) for cont in range(howmany), with a reusable executor of parallel workers
+    (see mitim_executor), returns the results in order of cont
+    """
+
+    executor = get_executor(workers=parallel, backend=backend, on_dill=on_dill)
 
     if array:
         print(
             f'\n~~~~~~~~~~~~~~~~~~ Launching batch of {howmany} evaluations ({parallel} in parallel), {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")} ~~~~~~~~~~~~~~~~~~'
         )
-    res = pool.map(PRF_ParallelClass_reduced(Function, Params), np.arange(howmany))
+    res = executor.run(Function, Params, howmany, limit=parallel)
     if array:
         print(
             "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
         )
 
-    pool.close()
-
     if array:
         return np.array(res)
     else:
@@ -1001,11 +2415,13 @@ def create_slurm_execution_files(
     # ******* Basics
     commandSBATCH.append("#!/bin/bash -l")
     commandSBATCH.append(f"#SBATCH --job-name {nameJob}")
+    # Each task of an array writes its own log files
+    label_array = "_%a" if job_array is not None else ""
     commandSBATCH.append(
-        f"#SBATCH --output {folderExecution}/slurm_output{label_log_files}.dat"
+        f"#SBATCH --output {folderExecution}/slurm_output{label_log_files}{label_array}.dat"
     )
     commandSBATCH.append(
-        f"#SBATCH --error {folderExecution}/slurm_error{label_log_files}.dat"
+        f"#SBATCH --error {folderExecution}/slurm_error{label_log_files}{label_array}.dat"
     )
     if email is not None:
         commandSBATCH.append("#SBATCH --mail-user=" + email)
@@ -1050,6 +2466,10 @@ def create_slurm_execution_files(
     commandSBATCH.append(
         'echo "MITIM: Each of the $SLURM_NTASKS tasks allocated will run with $SLURM_CPUS_PER_TASK cores, allocating $SRUN_CPUS_PER_TASK CPUs per srun"'
     )
+    if job_array is not None:
+        commandSBATCH.append(
+            'echo "MITIM: This is task $SLURM_ARRAY_TASK_ID of job array $SLURM_ARRAY_JOB_ID"'
+        )
     commandSBATCH.append("")
 
     full_command = [modules_remote] if (modules_remote is not None) else []
@@ -1106,6 +2526,75 @@ def create_slurm_execution_files(
     return comm, fileSBTACH, fileSHELL
 
 
+def create_scheduled_commands(
+    commands,
+    cores_per_command,
+    labels=None,
+    total_cores=None,
+    log_file="mitim_scheduler.log",
+):
+    """
+    Bash lines that run a queue of independent commands in the machine where they are executed, packing them
+    onto its cores (total_cores, or all the cores given by nproc if None) with cores_per_command each.
+    Each completion is appended to log_file as soon as it happens ("label status seconds" per line), and can
+    be read with read_scheduler_log(). Note that log_file is written in the machine of execution, so (unless
+    it is read there) completions are only known locally once it is retrieved with the rest of the outputs.
+    """
+
+    if labels is None:
+        labels = [f"run{i}" for i in range(len(commands))]
+
+    cores_txt = f"{int(total_cores)}" if total_cores is not None else "$(nproc)"
+
+    lines = [
+        f"mitim_slots=$(( {cores_txt} / {int(cores_per_command)} ))",
+        "if [ $mitim_slots -lt 1 ]; then mitim_slots=1; fi",
+        f'echo "MITIM: Scheduling {len(commands)} runs of {int(cores_per_command)} cores, $mitim_slots at a time"',
+        f": > {log_file}",
+        'mitim_now() { if [ -n "$EPOCHREALTIME" ]; then echo ${EPOCHREALTIME/,/.}; else date +%s; fi; }',
+        # wait -n (return when any run finishes) requires bash >= 4.3, otherwise poll
+        "if (( BASH_VERSINFO[0] > 4 || (BASH_VERSINFO[0] == 4 && BASH_VERSINFO[1] >= 3) )); then",
+        "    mitim_wait() { wait -n; }",
+        "else",
+        "    mitim_wait() { sleep 0.5; }",
+        "fi",
+        "mitim_run() {",
+        "    local start=$(mitim_now)",
+        # In a subshell, so that an exit in the command does not skip the logging
+        '    ( eval "$2" )',
+        "    local status=$?",
+        "    local end=$(mitim_now)",
+        f'    echo "$1 $status $(awk -v a=$start -v b=$end \'BEGIN{{printf "%.2f", b-a}}\')" >> {log_file}',
+        "}",
+    ]
+
+    for label, command in zip(labels, commands):
+        lines.append(
+            "while [ $(jobs -rp | wc -l) -ge $mitim_slots ]; do mitim_wait; done"
+        )
+        lines.append(f"mitim_run {shlex.quote(label)} {shlex.quote(command)} &")
+
+    lines.append("wait")
+
+    return "\n".join(lines)
+
+
+def read_scheduler_log(file):
+    """
+    Returns dictionary with label -> (exit status, seconds) of the runs completed by create_scheduled_commands
+    """
+
+    runs = {}
+    if os.path.exists(file):
+        with open(file, "r") as f:
+            for line in f.readlines():
+                if len(line.split()) == 3:
+                    label, status, seconds = line.split()
+                    runs[label] = (int(status), float(seconds))
+
+    return runs
+
+
 def curateOutFiles(outputFiles):
     # Avoid repetitions, otherwise, e.g., they will fail to rename
 
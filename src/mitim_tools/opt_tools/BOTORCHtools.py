@@ -4,6 +4,7 @@ This set of tools are custom modifications to BOTORCH or GPYTORCH ones to satisf
 **************************************************************************************************************
 """
 
+import copy
 import torch
 import botorch
 import gpytorch
@@ -385,6 +386,225 @@ class ModifiedModelListGP(botorch.models.model_list_gp_regression.ModelListGP):
         return posterior
 
 
+# ----------------------------------------------------------------------------------------------------------------------------
+# When all outputs share the same training inputs, evaluate them with a single batched GP (batch over outputs)
+# ----------------------------------------------------------------------------------------------------------------------------
+
+
+class ModifiedBatchedModelGP(ModifiedModelListGP):
+    """
+    Same as ModifiedModelListGP (individual models are kept, and used for anything but the posterior), but the
+    noiseless posterior is evaluated with one batched ExactGP whose batch dimension runs over the outputs. This
+    way, a single kernel evaluation and a single (batched) Cholesky serve all outputs.
+    Use check_models_batchable() before creating it.
+    """
+
+    def __init__(self, *gp_models):
+        super().__init__(*gp_models)
+        self.batched_model = BatchedExactGP(gp_models)
+
+    def posterior(
+        self,
+        X,
+        output_indices=None,
+        observation_noise=False,
+        posterior_transform=None,
+        **kwargs,
+    ):
+        # Observation noise is not commonly requested, evaluate it with the individual models
+        if observation_noise is not False:
+            return super().posterior(
+                X,
+                output_indices=output_indices,
+                observation_noise=observation_noise,
+                posterior_transform=posterior_transform,
+                **kwargs,
+            )
+
+        self.eval()
+        self.prepareToGenerateCommons()
+
+        # All models share the same input transformation, so only the first one is needed
+        Xtr = self.models[0].transform_inputs(X)
+
+        with botorch.models.utils.gpt_posterior_settings():
+            Xtr, output_dim_idx = botorch.models.utils.add_output_dim(
+                X=Xtr, original_batch_shape=self.models[0]._input_batch_shape
+            )
+            mvn = self.batched_model(Xtr)
+
+        mean_x = mvn.mean
+        covar_x = mvn.lazy_covariance_matrix
+
+        # Each output is untransformed with its own outcome transformation (it needs X for physics)
+        mvns = []
+        for t in output_indices or range(len(self.models)):
+            posterior_t = botorch.posteriors.gpytorch.GPyTorchPosterior(
+                distribution=gpytorch.distributions.MultivariateNormal(
+                    mean_x.select(dim=output_dim_idx, index=t),
+                    covar_x[(slice(None),) * output_dim_idx + (t,)],
+                )
+            )
+            if hasattr(self.models[t], "outcome_transform"):
+                posterior_t = self.models[t].outcome_transform.untransform_posterior(
+                    X, posterior_t
+                )
+            mvns.append(posterior_t.distribution)
+
+        self.restartCommons()
+
+        mvn = (
+            mvns[0]
+            if len(mvns) == 1
+            else gpytorch.distributions.MultitaskMultivariateNormal.from_independent_mvns(
+                mvns=mvns
+            )
+        )
+        posterior = botorch.posteriors.gpytorch.GPyTorchPosterior(distribution=mvn)
+        if posterior_transform is not None:
+            return posterior_transform(posterior)
+        return posterior
+
+
+class BatchedExactGP(gpytorch.models.exact_gp.ExactGP):
+    """
+    ExactGP with batch_shape=[num_outputs], built by stacking the (already fitted) hyperparameters and
+    noises of single-output ExactGPcustom models. Inputs are received already transformed.
+    """
+
+    def __init__(self, gp_models):
+        batch_shape = torch.Size([len(gp_models)])
+
+        train_X = gp_models[0].train_inputs[0]
+        train_Y = torch.stack([gp.train_targets for gp in gp_models], dim=0)
+
+        likelihood = stack_gpytorch_modules([gp.likelihood for gp in gp_models], batch_shape)
+        if isinstance(
+            likelihood,
+            gpytorch.likelihoods.gaussian_likelihood.FixedNoiseGaussianLikelihood,
+        ):
+            # Per-output fixed noise
+            likelihood.noise_covar.noise = torch.stack(
+                [gp.likelihood.noise_covar.noise for gp in gp_models], dim=0
+            )
+
+        super().__init__(
+            train_inputs=train_X.unsqueeze(0).expand(len(gp_models), *train_X.shape),
+            train_targets=train_Y,
+            likelihood=likelihood,
+        )
+
+        self.mean_module = stack_gpytorch_modules(
+            [gp.mean_module for gp in gp_models], batch_shape
+        )
+        self.covar_module = stack_gpytorch_modules(
+            [gp.covar_module for gp in gp_models], batch_shape
+        )
+
+        self.eval()
+
+    def forward(self, x):
+        return gpytorch.distributions.MultivariateNormal(
+            self.mean_module(x), self.covar_module(x)
+        )
+
+
+def stack_gpytorch_modules(modules, batch_shape):
+    """
+    Copy the first module and replace its parameters by the stacked parameters of all modules (new leading batch dimension)
+    """
+
+    stacked = copy.deepcopy(modules[0])
+
+    parameters = [dict(module.named_parameters()) for module in modules]
+    for name in parameters[0]:
+        *path, attribute = name.split(".")
+        owner = stacked
+        for sub in path:
+            owner = getattr(owner, sub)
+        setattr(
+            owner,
+            attribute,
+            torch.nn.Parameter(
+                torch.stack([p[name].detach() for p in parameters], dim=0),
+                requires_grad=False,
+            ),
+        )
+
+    for module in stacked.modules():
+        if isinstance(module, gpytorch.kernels.Kernel):
+            module._batch_shape = batch_shape
+        elif isinstance(module, gpytorch.means.mean.Mean) and hasattr(
+            module, "batch_shape"
+        ):
+            module.batch_shape = batch_shape
+
+    return stacked
+
+
+def check_models_batchable(gp_models):
+    """
+    Individual models can be combined in a batched model if they have been trained on the same (transformed) inputs,
+    with the same input transformation, and with model components that allow batch evaluation
+    """
+
+    reason = None
+
+    if len(gp_models) < 2:
+        reason = "only one output"
+    elif not all(isinstance(gp, ExactGPcustom) for gp in gp_models):
+        reason = "not all models are ExactGPcustom"
+    elif any(
+        isinstance(gp.covar_module, PRF_NNKernel)
+        or isinstance(getattr(gp.covar_module, "base_kernel", None), PRF_NNKernel)
+        or isinstance(gp.mean_module, PRF_CriticalGradient)
+        for gp in gp_models
+    ):
+        reason = "kernel or mean do not allow batch evaluation"
+    else:
+        gp0 = gp_models[0]
+        for gp in gp_models[1:]:
+            if not torch.equal(gp.train_inputs[0], gp0.train_inputs[0]):
+                reason = "outputs have different training inputs"
+            elif not all(
+                type(getattr(gp, module)) == type(getattr(gp0, module))
+                for module in ["mean_module", "covar_module", "likelihood"]
+            ):
+                reason = "outputs have different model types"
+            elif [(n, p.shape) for n, p in gp.named_parameters()] != [
+                (n, p.shape) for n, p in gp0.named_parameters()
+            ]:
+                reason = "outputs have different hyperparameters"
+            elif not (
+                torch.equal(gp.input_transform["tf2"].offset, gp0.input_transform["tf2"].offset)
+                and torch.equal(gp.input_transform["tf2"].coefficient, gp0.input_transform["tf2"].coefficient)
+            ):
+                reason = "outputs have different input normalizations"
+            elif physics_variables(gp.input_transform["tf1"]) != physics_variables(
+                gp0.input_transform["tf1"]
+            ):
+                reason = "outputs have different physics-informed input transformations"
+
+            if reason is not None:
+                break
+
+    if reason is not None:
+        print(f"\t- Models cannot be combined in a batched model ({reason})", typeMsg="w")
+
+    return reason is None
+
+
+def physics_variables(input_transform_physics):
+    if (input_transform_physics.output is None) or (
+        input_transform_physics.surrogate_parameters.get("physicsInformedParams") is None
+    ):
+        return None
+    else:
+        return input_transform_physics.surrogate_parameters["physicsInformedParams"][
+            input_transform_physics.output
+        ]
+
+
 # ----------------------------------------------------------------------------------------------------------------------------
 # I need my own transformation based on physics
 # ----------------------------------------------------------------------------------------------------------------------------
@@ -1,5 +1,6 @@
 import copy
 import os
+import contextlib
 import datetime
 import torch
 import botorch
@@ -106,13 +107,15 @@ class OPTstep:
         # **** From standard deviation to variance
         self.train_Yvar = self.train_Ystd**2
 
-    def fit_step(self, avoidPoints=[], fitWithTrainingDataIfContains=None):
+    def fit_step(self, avoidPoints=[], fitWithTrainingDataIfContains=None, previous_models=None):
         """
         Notes:
             - Note that fitWithTrainingDataIfContains = 'Tar' would only use the train_X,Y,Yvar tensors
                     to fit those surrogate variables that contain 'Tar' in their names. This is useful when in
                     PORTALS I want to simply use the training in a file and not directly from train_X,Y,Yvar for
                     the fluxes but I do want *new* target calculation
+            - previous_models are the individual models of the previous step, used to warm-start the
+                    hyperparameters if surrogateOptions["WarmStart"] is enabled
         """
 
         """
@@ -170,9 +173,10 @@ class OPTstep:
 		"""
 
         self.GP = {"individual_models": [None] * self.y.shape[-1]}
-        fileTraining = f"{self.stepSettings['folderOutputs']}/surrogate_data.csv"
+        fileTraining = f"{self.stepSettings['folderOutputs']}/surrogate_data.{'parquet' if self.surrogateOptions.get('TrainingDataFormat', 'csv') == 'parquet' else 'csv'}"
         if os.path.exists(fileTraining):
             os.system(f'mv {fileTraining} {fileTraining}.bak')
+        writerTraining = SURROGATEtools.training_data_writer(fileTraining)
 
         print("--> Fitting multiple single-output models and creating composite model")
         time1 = datetime.datetime.now()
@@ -268,14 +272,16 @@ class OPTstep:
                 dfT=self.dfT,
                 surrogateOptions=surrogateOptions,
                 FixedValue=FixedValue,
-                fileTraining=fileTraining,
+                fileTraining=writerTraining,
             )
 
             # Fitting
-            GP.fit()
+            GP.fit(previous_model=self.find_previous_model(previous_models, outi))
 
             self.GP["individual_models"][i] = GP
 
+        writerTraining.flush()
+
         if os.path.exists(fileTraining+".bak"):
             os.remove(fileTraining+".bak")
 
@@ -299,7 +305,12 @@ class OPTstep:
         models = ()
         for GP in self.GP["individual_models"]:
             models += (GP.gpmodel,)
-        self.GP["combined_model"].gpmodel = BOTORCHtools.ModifiedModelListGP(*models)
+
+        if self.surrogateOptions.get("BatchedOutputs", False) and BOTORCHtools.check_models_batchable(models):
+            print("\t- All outputs share training inputs, combining them in a batched multi-output model")
+            self.GP["combined_model"].gpmodel = BOTORCHtools.ModifiedBatchedModelGP(*models)
+        else:
+            self.GP["combined_model"].gpmodel = BOTORCHtools.ModifiedModelListGP(*models)
 
         print(f"--> Fitting of all models took {IOtools.getTimeDifference(time1)}")
 
@@ -310,11 +321,15 @@ class OPTstep:
 		"""
 
         # Test (if test could not be launched is likely because a singular matrix for Choleski decomposition)
-        print("--> Launching tests to assure batch evaluation accuracy")
-        TESTtools.testBatchCapabilities(self.GP["combined_model"])
-        print("--> Launching tests to assure model combination accuracy")
-        TESTtools.testCombinationCapabilities(
-            self.GP["individual_models"], self.GP["combined_model"]
+        print("--> Launching tests to assure batch evaluation and model combination accuracy")
+        self.validation_results = TESTtools.validate_models(
+            self.GP["individual_models"],
+            self.GP["combined_model"],
+            policy=self.surrogateOptions.get("ValidationPolicy", "full"),
+            iteration=self.currentIteration,
+            every=self.surrogateOptions.get("ValidationEvery", 5),
+            samples=self.surrogateOptions.get("ValidationSamples", 10),
+            fileLog=f"{self.stepSettings['folderOutputs']}/model_validation.log",
         )
         print("--> Launching tests evaluate accuracy on training set (absolute units)")
         self.GP["combined_model"].testTraining()
@@ -329,6 +344,16 @@ class OPTstep:
             with open(self.fileOutputs, "a") as f:
                 f.write(f" (took total of {txt_time})")
 
+    def find_previous_model(self, previous_models, output):
+        if previous_models is None:
+            return None
+
+        for GP in previous_models:
+            if (GP is not None) and (GP.output == output):
+                return GP
+
+        return None
+
     def defineFunctions(self, lambdaSingleObjective):
         """
         I create this so that, upon reading a pickle, I re-call it. Otherwise, it is very heavy to store lambdas
@@ -450,17 +475,23 @@ class OPTstep:
             f'\n~~ Maximization of "{self.acquisition_type}" acquisition using "{self.optimizers}" methods to find {self.best_points_sequence} points\n'
         )
 
-        self.x_next, self.InfoOptimization = OPTtools.optAcq(
-            stepSettings=self.stepSettings,
-            evaluators=self.evaluators,
-            StrategyOptions=self.StrategyOptions,
-            best_points=int(self.best_points_sequence),
-            optimization_sequence=self.optimizers.split("-"),
-            it_number=self.currentIteration,
-            position_best_so_far=position_best_so_far,
-            seed=seed,
-            forceAllPointsInBounds=forceAllPointsInBounds,
-        )
+        # The surrogate does not change during the optimization, so it can be frozen
+        with (
+            SURROGATEtools.frozen_model_context(self.evaluators["GP"])
+            if self.stepSettings["optimization_options"].get("frozen_surrogate", False)
+            else contextlib.nullcontext()
+        ):
+            self.x_next, self.InfoOptimization = OPTtools.optAcq(
+                stepSettings=self.stepSettings,
+                evaluators=self.evaluators,
+                StrategyOptions=self.StrategyOptions,
+                best_points=int(self.best_points_sequence),
+                optimization_sequence=self.optimizers.split("-"),
+                it_number=self.currentIteration,
+                position_best_so_far=position_best_so_far,
+                seed=seed,
+                forceAllPointsInBounds=forceAllPointsInBounds,
+            )
 
         print(
             f"\n~~ Complete acquisition workflows found {self.x_next.shape[0]} points"
@@ -616,6 +616,9 @@ class PRF_BO:
                 - train_Ystd is in standard deviations (square root of the variance), not normalized and not relative
         """
 
+        if self.optimization_options.get("asynchronous", False):
+            return self.run_asynchronous()
+
         timeBeginning = datetime.datetime.now()
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -799,7 +802,14 @@ class PRF_BO:
                 self.avoidPoints = np.unique([int(j) for j in avoidPoints])
 
                 # ***** Fit
-                self.steps[-1].fit_step(avoidPoints=self.avoidPoints)
+                self.steps[-1].fit_step(
+                    avoidPoints=self.avoidPoints,
+                    previous_models=(
+                        self.steps[-2].GP["individual_models"]
+                        if (len(self.steps) > 1) and ("GP" in self.steps[-2].__dict__)
+                        else None
+                    ),
+                )
 
                 # Store class with the model fitted
                 if self.storeClass:
@@ -830,6 +840,229 @@ class PRF_BO:
 
             _, _ = self.updateSet(self.StrategyOptions, ForceNotApplyCorrections=True)
 
+        # Wait for model validations in separate processes (if any)
+        TESTtools.run_pending_validations()
+
+        self.save()
+
+        print(
+            f"- Complete MITIM workflow took {IOtools.getTimeDifference(timeBeginning)} ~~"
+        )
+        print("********************************************************\n")
+
+    def run_asynchronous(self):
+        """
+        Asynchronous version of run(): a new BO step is performed as soon as enough workers are free, without
+        waiting for the rest of evaluations to finish.
+        Evaluations that are still running are included in the surrogate fit with fantasized values
+        (optimization_options["asynchronous_liar"]):
+                - "believer": prediction of the last surrogate at the pending points (kriging believer)
+                - "mean": mean of the evaluated outputs (constant liar)
+        Notes:
+                - Each BO step proposes best_points points, launched when that many workers are free
+                - Rows of the training set are reserved (with nans) when evaluations are launched, so that row i
+                  is always Evaluation.i regardless of the order in which evaluations finish
+                - Workers are given by parallel_evaluations (-1: as many as CPUs)
+                - Restarting from a previous optimization is not supported in this mode
+        """
+
+        timeBeginning = datetime.datetime.now()
+
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # ~~~~~~~~ Initialization
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        self.initializeOptimization()
+
+        if not self.restartYN:
+            print(
+                "--> Restarting from previous is not supported in asynchronous mode, all steps will be run",
+                typeMsg="w",
+            )
+            self.restartYN = True
+        self.optimization_data.removePointsAfter(len(self.train_X) - 1)
+
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # ~~~~~~~~ Iterative workflow
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+        self.StrategyOptions_use = self.StrategyOptions
+
+        evaluator = EVALUATORtools.asynchronous_evaluator(
+            self.optimization_object,
+            self.folderExecution,
+            self.outputs,
+            workers=self.parallel_evaluations,
+            numEval=self.numEval,
+        )
+        points_required = np.min([self.best_points, evaluator.workers])
+
+        # Step, row in its x_next and row in the training set of each of the running evaluations
+        origin = {}
+
+        self.steps, self.resultsSet = [], []
+        try:
+            for self.currentIteration in range(self.numIterations + 1):
+                timeBeginningThis = datetime.datetime.now()
+
+                print("\n------------------------------------------------------------")
+                print(
+                    f'\tMITIM Step {self.currentIteration}, asynchronous ({timeBeginningThis.strftime("%Y-%m-%d %H:%M:%S")})'
+                )
+                print("------------------------------------------------------------")
+
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                # ~~~~~~~~ Update training population with finished evaluations, until enough workers are free
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+                self.incorporate_asynchronous(evaluator.collect(), origin, evaluator)
+                while (evaluator.free_workers() < points_required) and (
+                    not self.hard_finish
+                ):
+                    self.incorporate_asynchronous(
+                        evaluator.collect(wait=True), origin, evaluator
+                    )
+
+                if self.hard_finish:
+                    print("- Hard finish has been requested", typeMsg="i")
+
+                    # Removing those spaces in the metrics that were not filled up
+                    for ikey in self.keys_metrics:
+                        for i in range(
+                            self.currentIteration + 1,
+                            self.optimization_options["BO_iterations"] + 1,
+                        ):
+                            del self.BOmetrics[ikey][i]
+
+                    break
+
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                # ~~~~~~~~ Perform BO step, with fantasized values at the running evaluations
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+                rows_pending = [origin[numEval][2] for numEval in evaluator.pending]
+                y_pending, ystd_pending = self.fantasize_pending(
+                    self.train_X[rows_pending]
+                )
+
+                if len(rows_pending) > 0:
+                    print(
+                        f"--> {len(rows_pending)} evaluations still running, included in the surrogate with fantasized values ({self.optimization_options.get('asynchronous_liar', 'believer')})"
+                    )
+
+                train_Y = copy.deepcopy(self.train_Y)
+                train_Y[rows_pending] = y_pending
+
+                if self.optimization_options["train_Ystd"] is None:
+                    train_Ystd = copy.deepcopy(self.train_Ystd)
+                    train_Ystd[rows_pending] = ystd_pending
+                else:
+                    train_Ystd = self.optimization_options["train_Ystd"]
+
+                # Making copy because it changes per step ---- ---- ---- ---- ----
+                surrogate_parameters = copy.deepcopy(self.surrogate_parameters)
+                # ---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ----
+
+                current_step = STEPtools.OPTstep(
+                    self.train_X,
+                    train_Y,
+                    train_Ystd,
+                    bounds=self.bounds,
+                    stepSettings=self.stepSettings,
+                    currentIteration=self.currentIteration,
+                    StrategyOptions=self.StrategyOptions_use,
+                    BOmetrics=self.BOmetrics,
+                    surrogate_parameters=surrogate_parameters,
+                )
+
+                current_step.StrategyOptions_use = copy.deepcopy(
+                    self.StrategyOptions_use
+                )
+
+                self.steps.append(current_step)
+
+                # Avoid points
+                avoidPoints = np.append(
+                    self.avoidPoints_failed, self.avoidPoints_outside
+                )
+                self.avoidPoints = np.unique([int(j) for j in avoidPoints])
+
+                # ***** Fit
+                self.steps[-1].fit_step(
+                    avoidPoints=self.avoidPoints,
+                    previous_models=(
+                        self.steps[-2].GP["individual_models"]
+                        if (len(self.steps) > 1) and ("GP" in self.steps[-2].__dict__)
+                        else None
+                    ),
+                )
+
+                # ***** Optimize
+                self.steps[-1].optimize(
+                    self.lambdaSingleObjective,
+                    position_best_so_far=self.BOmetrics["overall"]["indBest"],
+                    seed=self.seed,
+                )
+
+                self.x_next = self.steps[-1].x_next
+
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                # ~~~~~~~~ Launch evaluation of next points (do not wait)
+                # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+                self.steps[-1].y_next = np.ones((len(self.x_next), len(self.outputs))) * np.nan
+                self.steps[-1].ystd_next = np.ones((len(self.x_next), len(self.outputs))) * np.nan
+
+                evaluator.numEval = self.numEval
+                numEvals = evaluator.submit(self.x_next.cpu().numpy(), self.bounds)
+                self.numEval = evaluator.numEval
+
+                # Reserve the rows of the training set (Evaluation.i is row i), filled when collected
+                self.steps[-1].rows_next = list(
+                    range(len(self.train_X), len(self.train_X) + len(numEvals))
+                )
+                self.train_X = np.append(self.train_X, self.x_next.cpu(), axis=0)
+                self.train_Y = np.append(self.train_Y, self.steps[-1].y_next, axis=0)
+                self.train_Ystd = np.append(
+                    self.train_Ystd, self.steps[-1].ystd_next, axis=0
+                )
+                for row, numEval in enumerate(numEvals):
+                    origin[numEval] = (
+                        len(self.steps) - 1,
+                        row,
+                        self.steps[-1].rows_next[row],
+                    )
+
+                if self.storeClass:
+                    self.save()
+
+            # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+            # ~~~~~~~~ Collect evaluations that are still running
+            # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+            if not self.hard_finish:
+                print("\n\n------------------------------------------------------------")
+                print(" Final collection of evaluations launched asynchronously")
+                print("------------------------------------------------------------\n\n")
+
+                while len(evaluator.pending) > 0:
+                    self.incorporate_asynchronous(
+                        evaluator.collect(wait=True), origin, evaluator
+                    )
+
+        finally:
+            evaluator.close()
+
+        # Evaluations not collected (hard finish) are not used
+        for _, _, row in origin.values():
+            self.train_Y[row] = np.inf
+            self.train_Ystd[row] = np.inf
+            if row not in self.avoidPoints_failed:
+                self.avoidPoints_failed.append(row)
+
+        # Wait for model validations in separate processes (if any)
+        TESTtools.run_pending_validations()
+
         self.save()
 
         print(
@@ -837,6 +1070,70 @@ class PRF_BO:
         )
         print("********************************************************\n")
 
+    def incorporate_asynchronous(self, completed, origin, evaluator):
+        """
+        Fill the rows of the training set reserved for the evaluations collected by the asynchronous evaluator.
+        Evaluations are grouped by the step that proposed them, so that metrics are stored for that iteration.
+        Evaluations run synchronously meanwhile (e.g. after trust region operations) advance numEval, which is
+        kept in sync with the evaluator to avoid launching two evaluations in the same folder.
+        """
+
+        x, y, ystd, numEvals = completed
+
+        if len(numEvals) == 0:
+            return
+
+        groups = {}
+        for i, numEval in enumerate(numEvals):
+            step, row, row_train = origin.pop(numEval)
+
+            # Store the evaluations also in the step that proposed them
+            self.steps[step].y_next[row] = y[i]
+            self.steps[step].ystd_next[row] = ystd[i]
+
+            groups.setdefault(step, []).append((i, row_train))
+
+        for step in sorted(groups):
+            indices = [i for i, _ in groups[step]]
+            rows = [row_train for _, row_train in groups[step]]
+
+            self.numEval = evaluator.numEval
+            self.x_next = torch.from_numpy(x[indices]).to(self.dfT)
+            _, _ = self.updateSet(
+                self.StrategyOptions_use,
+                evaluations=(y[indices], ystd[indices]),
+                rows=rows,
+                position=step,
+            )
+            evaluator.numEval = self.numEval
+
+    def fantasize_pending(self, x_pending):
+        """
+        Fantasized outputs (and their standard deviations) to use for the evaluations that are still running
+        """
+
+        Y = np.where(np.isfinite(self.train_Y), self.train_Y, np.nan)
+        Ystd = np.where(np.isfinite(self.train_Ystd), self.train_Ystd, np.nan)
+
+        y_pending = np.repeat(np.atleast_2d(np.nanmean(Y, axis=0)), len(x_pending), axis=0)
+        ystd_pending = np.repeat(np.atleast_2d(np.nanmean(Ystd, axis=0)), len(x_pending), axis=0)
+
+        liar = self.optimization_options.get("asynchronous_liar", "believer")
+
+        if (liar == "believer") and (len(x_pending) > 0) and (len(self.steps) > 0):
+            y_pending = (
+                self.steps[-1]
+                .GP["combined_model"]
+                .predict(torch.from_numpy(x_pending).to(self.dfT))[0]
+                .detach()
+                .cpu()
+                .numpy()
+            )
+        elif liar not in ["believer", "mean"]:
+            raise Exception(f"[MITIM] Asynchronous liar {liar} not recognized")
+
+        return y_pending, ystd_pending
+
     def prepare_for_save_PRFBO(self, copyClass):
         """
         Downselect what elements to store
@@ -958,13 +1255,32 @@ class PRF_BO:
         return aux if provideFullClass else step
 
     def updateSet(
-        self, StrategyOptions_use, isThisCorrected=False, ForceNotApplyCorrections=False
+        self,
+        StrategyOptions_use,
+        isThisCorrected=False,
+        ForceNotApplyCorrections=False,
+        evaluations=None,
+        rows=None,
+        position=None,
     ):
+        """
+        If evaluations=(y_next,ystd_next) are provided (e.g. already run asynchronously), do not evaluate x_next
+        If rows are provided, x_next are already in the training set at those rows (asynchronous mode, where rows
+        are reserved when evaluations are launched, so that row i is always Evaluation.i) and are filled here.
+        position is where metrics are stored (iteration that proposed x_next, by default the current one)
+        """
+
+        if position is None:
+            position = self.currentIteration
+
+        # In asynchronous mode, steps are indexed by iteration and x_next may come from an earlier one
+        step = self.steps[-1] if rows is None else self.steps[position]
+
         # ~~~~~~~~~~~~~~~~~~
         # What's the expected value of the next points?
         # ~~~~~~~~~~~~~~~~~~
 
-        y, u, l, _ = self.steps[-1].GP["combined_model"].predict(self.x_next)
+        y, u, l, _ = step.GP["combined_model"].predict(self.x_next)
         self.y_next_pred = y.detach()
         self.y_next_pred_u = u.detach()
         self.y_next_pred_l = l.detach()
@@ -974,7 +1290,10 @@ class PRF_BO:
         # ~~~~~~~~~~~~~~~~~~
 
         # Update the train_X
-        self.train_X = np.append(self.train_X, self.x_next.cpu(), axis=0)
+        reserved = rows is not None
+        if not reserved:
+            self.train_X = np.append(self.train_X, self.x_next.cpu(), axis=0)
+            rows = list(range(len(self.train_X) - len(self.x_next), len(self.train_X)))
 
         # Update optimization_data with nans
         _,_,objective = self.optimization_object.scalarized_objective(torch.from_numpy(self.train_Y))
@@ -983,41 +1302,46 @@ class PRF_BO:
         # Update optimization_results only as "predicted"
         if not isThisCorrected:
             self.optimization_results.addPoints(
-                includePoints=[
-                    len(self.train_X) - len(self.x_next),
-                    len(self.train_X) - len(self.x_next) + 1,
-                ],
+                includePoints=[rows[0], rows[0] + 1],
                 executed=False,
                 predicted=True,
                 Best=True,
             )
             self.optimization_results.addPoints(
-                includePoints=[len(self.train_X) - len(self.x_next), len(self.train_X)],
+                includePoints=[rows[0], rows[-1] + 1],
+                positions=rows,
                 executed=False,
                 predicted=True,
-                Name=f"Evaluating points from iteration {self.currentIteration}, comprised of {len(self.x_next)} points",
+                Name=f"Evaluating points from iteration {position}, comprised of {len(self.x_next)} points",
             )
 
         # --- Evaluation
         time1 = datetime.datetime.now()
-        y_next, ystd_next, self.numEval = EVALUATORtools.fun(
-            self.optimization_object,
-            self.x_next,
-            self.folderExecution,
-            self.bounds,
-            self.outputs,
-            self.optimization_data,
-            parallel=self.parallel_evaluations,
-            restartYN=self.restartYN,
-            numEval=self.numEval,
-        )
+        if evaluations is None:
+            y_next, ystd_next, self.numEval = EVALUATORtools.fun(
+                self.optimization_object,
+                self.x_next,
+                self.folderExecution,
+                self.bounds,
+                self.outputs,
+                self.optimization_data,
+                parallel=self.parallel_evaluations,
+                restartYN=self.restartYN,
+                numEval=self.numEval,
+            )
+        else:
+            y_next, ystd_next = evaluations
         txt_time = IOtools.getTimeDifference(time1)
         print(f"\t- Complete model update took {txt_time}")
         # ------------------
 
         # Update the train_Y
-        self.train_Y = np.append(self.train_Y, y_next, axis=0)
-        self.train_Ystd = np.append(self.train_Ystd, ystd_next, axis=0)
+        if reserved:
+            self.train_Y[rows] = y_next
+            self.train_Ystd[rows] = ystd_next
+        else:
+            self.train_Y = np.append(self.train_Y, y_next, axis=0)
+            self.train_Ystd = np.append(self.train_Ystd, ystd_next, axis=0)
 
         # --- If problem in evaluation don't use this point -------------------------------------------------------------------
         for i in range(self.train_Y.shape[0]):
@@ -1038,13 +1362,14 @@ class PRF_BO:
 
         # Update optimization_results with the actual evaluations
         if not isThisCorrected:
-            txt = f"Evaluating points from iteration {self.currentIteration}, comprised of {len(self.x_next)} points"
+            txt = f"Evaluating points from iteration {position}, comprised of {len(self.x_next)} points"
             predicted, forceWrite, addheader = True, True, True
         else:
             txt = f"Evaluating further points after trust region operation... batch comprised of {len(self.x_next)} points"
             predicted, forceWrite, addheader = False, False, False
         self.optimization_results.addPoints(
-            includePoints=[len(self.train_X) - len(self.x_next), len(self.train_X)],
+            includePoints=[rows[0], rows[-1] + 1],
+            positions=rows,
             executed=True,
             predicted=predicted,
             Name=txt,
@@ -1073,10 +1398,18 @@ class PRF_BO:
         # ~~~~~~~~~~~~~~~~~~
 
         if not isThisCorrected:
+            # Metrics of the iteration with all its evaluations so far (asynchronous ones may arrive in several sets)
+            rows_metrics = (
+                None
+                if not reserved
+                else [row for row in step.rows_next if not np.isnan(self.train_Y[row]).all()]
+            )
+
             SBOcorrections.updateMetrics(
                 self,
                 evaluatedPoints=self.x_next.shape[0],
-                position=self.currentIteration,
+                position=position,
+                rows=rows_metrics,
             )
 
             changesMade = 0
@@ -1085,7 +1418,7 @@ class PRF_BO:
                 changesMade = SBOcorrections.TURBOupdate(
                     self,
                     StrategyOptions_use,
-                    position=self.currentIteration,
+                    position=position,
                     seed=self.seed,
                 )
             # Apply some corrections
@@ -1102,7 +1435,8 @@ class PRF_BO:
                     self,
                     IsThisAFreshIteration=False,
                     evaluatedPoints=self.x_next.shape[0],
-                    position=self.currentIteration,
+                    position=position,
+                    rows=rows_metrics,
                 )
 
         # ~~~~~~~~~~~~~~~~~~
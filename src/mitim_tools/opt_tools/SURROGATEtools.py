@@ -141,7 +141,7 @@ class surrogate_model:
                 f"\t* Requested extension of training set by points in file {self.surrogateOptions['extrapointsFile']}"
             )
 
-            df = pd.read_csv(self.surrogateOptions["extrapointsFile"])
+            df = read_training_data(self.surrogateOptions["extrapointsFile"])
             df_model = df[df['Model'] == self.output]
 
             # Check 1: Do the points for this output share the same x_names?
@@ -316,7 +316,12 @@ class surrogate_model:
         outcome_transform_normalization.training = False
         outcome_transform_normalization._is_trained = torch.tensor(True)
 
-    def fit(self):
+    def fit(self, previous_model=None):
+        """
+        previous_model is the surrogate_model fitted for this same output in the previous step. If provided
+        and surrogateOptions["WarmStart"] is enabled, its hyperparameters are used as initial guess.
+        """
+
         print(
             f"\t- Fitting model to {self.train_X.shape[0]+self.train_X_added.shape[0]} points"
         )
@@ -341,6 +346,16 @@ class surrogate_model:
             self.gpmodel = self.gpmodel.cuda()
             self.gpmodel.likelihood = self.gpmodel.likelihood.cuda()
 
+        # ---------------------------------------------------------------------------------------------------
+        # Warm-start hyperparameters from previous step
+        # ---------------------------------------------------------------------------------------------------
+
+        warm_started = (
+            self.surrogateOptions.get("WarmStart", False)
+            and (previous_model is not None)
+            and self.warm_start(previous_model)
+        )
+
         """
 		---------------------------------------------------------------------------------------------------
 			TRAINING
@@ -349,7 +364,17 @@ class surrogate_model:
 
         # Train always in physics-transformed space, to enable mitim re-use training from file
         with fundamental_model_context(self):
-            track_fval = self.perform_model_fit(mll)
+            track_fval = self.perform_model_fit(
+                mll,
+                warm_started=warm_started,
+                previous_loss=(
+                    previous_model.losses.get(
+                        "loss_reference", previous_model.losses["loss_final"]
+                    )
+                    if (warm_started and hasattr(previous_model, "losses"))
+                    else None
+                ),
+            )
 
         # ---------------------------------------------------------------------------------------------------
         # Asses optimization
@@ -367,7 +392,42 @@ class surrogate_model:
             self.gpmodel.outcome_transform["tf2"],
         )
 
-    def perform_model_fit(self, mll):
+    def warm_start(self, previous_model):
+        """
+        Initialize the hyperparameters with those of the fitted model from the previous step.
+        Only parameters with the same name and shape are copied (e.g. lengthscales are not if the number of
+        physics-informed inputs changed). Returns True only if all of them could be copied.
+        """
+
+        previous_parameters = dict(previous_model.gpmodel.named_parameters())
+
+        copied, total = 0, 0
+        with torch.no_grad():
+            for name, param in self.gpmodel.named_parameters():
+                total += 1
+                if (name in previous_parameters) and (
+                    previous_parameters[name].shape == param.shape
+                ):
+                    param.copy_(previous_parameters[name].to(param))
+                    copied += 1
+
+        print(
+            f"\t- Warm-starting {copied}/{total} hyperparameters from previous step",
+            verbose=verbose_level,
+        )
+
+        return (copied == total) and (total > 0)
+
+    def perform_model_fit(self, mll, warm_started=False, previous_loss=None):
+        """
+        previous_loss is the loss of the last actual fit of this output (steps whose fit was skipped carry it
+        forward in self.loss_reference), so that skipping (surrogateOptions["WarmStartSkipTolerance"]) cannot
+        degrade the model step after step.
+        A warm-started fit that fails is tried again from the warm-started hyperparameters, up to
+        surrogateOptions["WarmStartAttempts"] times in total, and then with the standard fit (whose retries
+        re-sample hyperparameters from the priors).
+        """
+
         self.gpmodel.train()
         self.gpmodel.likelihood.train()
         mll.train()
@@ -393,20 +453,59 @@ class surrogate_model:
             .item()
         ]
 
+        # Warm-started model that is still good enough for the new data does not need to be refitted
+        tolerance = self.surrogateOptions.get("WarmStartSkipTolerance", None)
+        if (
+            warm_started
+            and (tolerance is not None)
+            and (previous_loss is not None)
+            and (track_fval[0] - previous_loss < tolerance)
+        ):
+            print(
+                f"\t- Warm-started marginal log likelihood ({track_fval[0]:.3f}) within {tolerance:.1e} of previous step ({previous_loss:.3f}), skipping fit"
+            )
+
+            self.gpmodel.eval()
+            self.gpmodel.likelihood.eval()
+            mll.eval()
+
+            self.loss_reference = previous_loss
+
+            return track_fval
+
         def callback(x, y, mll=mll):
             track_fval.append(y.fval)
 
-        mll = botorch.fit.fit_gpytorch_mll(
-            mll,
-            max_attempts=20,
-            kwargs={"track_iterations": True, "approx_mll": approx_mll},
-            optimizer_kwargs={
+        fit_kwargs = {
+            "kwargs": {"track_iterations": True, "approx_mll": approx_mll},
+            "optimizer_kwargs": {
                 "method": "L-BFGS-B",
                 "bounds": None,
                 "options": {"disp": verbose_level == 5},
                 "callback": callback,
             },
-        )
+        }
+
+        fitted = False
+        if warm_started:
+            warm_state = {key: value.clone() for key, value in mll.state_dict().items()}
+            attempts = self.surrogateOptions.get("WarmStartAttempts", 1)
+            for attempt in range(attempts):
+                try:
+                    mll = botorch.fit.fit_gpytorch_mll(mll, max_attempts=1, **fit_kwargs)
+                    fitted = True
+                    break
+                except botorch.exceptions.errors.ModelFittingError:
+                    mll.load_state_dict(warm_state)
+                    del track_fval[1:]
+            if not fitted:
+                print(
+                    f"\t- Fit from warm-started hyperparameters failed {attempts} times, fitting with standard initialization",
+                    typeMsg="w",
+                )
+
+        if not fitted:
+            mll = botorch.fit.fit_gpytorch_mll(mll, max_attempts=20, **fit_kwargs)
 
         self.gpmodel.eval()
         self.gpmodel.likelihood.eval()
@@ -416,6 +515,8 @@ class surrogate_model:
             f"\n\t- Marginal log likelihood went from {track_fval[0]:.3f} to {track_fval[-1]:.3f}"
         )
 
+        self.loss_reference = track_fval[-1]
+
         return track_fval
 
     def predict(self, X, produceFundamental=False, nSamples=None):
@@ -532,6 +633,11 @@ class surrogate_model:
 
         new_df = create_df_portals(x,y,yvar,dv_names_Complete,self.output)
 
+        # Buffered writer: all outputs are written together at the end of the step
+        if isinstance(self.fileTraining, training_data_writer):
+            self.fileTraining.add(new_df)
+            return
+
         if os.path.exists(self.fileTraining):
 
             # Load the existing DataFrame from the HDF5 file
@@ -805,6 +911,7 @@ class surrogate_model:
             "losses": track_fval,
             "loss_ini": track_fval[0],
             "loss_final": track_fval[-1],
+            "loss_reference": getattr(self, "loss_reference", track_fval[-1]),
         }
 
         print("\t- Fitting summary:", verbose=verbose_level)
@@ -848,6 +955,39 @@ class fundamental_model_context(object):
         self.surrogate_model.gpmodel.input_transform.tf1.flag_to_evaluate = True
         self.surrogate_model.gpmodel.outcome_transform.tf1.flag_to_evaluate = True
 
+
+# Class to evaluate a surrogate that does not change (e.g. during the optimization of the acquisition function)
+class frozen_model_context(object):
+    """
+    Inside this context:
+        - Hyperparameters do not track gradients (gradients are only taken with respect to the inputs)
+        - Prediction caches are computed once at the entrance and reused by all evaluations
+    Predictive variances are already computed with LOVE (fast_pred_var) by botorch posteriors, not changed here.
+    """
+
+    def __init__(self, surrogate_model):
+        self.surrogate_model = surrogate_model
+
+    def __enter__(self):
+        self.requires_grad = {}
+        for name, param in self.surrogate_model.gpmodel.named_parameters():
+            self.requires_grad[name] = param.requires_grad
+            param.requires_grad_(False)
+
+        # Populate the caches of the prediction strategies
+        if self.surrogate_model.train_X.shape[0] > 0:
+            with torch.no_grad():
+                self.surrogate_model.predict(self.surrogate_model.train_X[:1, :])
+
+        print("\t- Surrogate frozen for evaluations", verbose=verbose_level)
+
+        return self.surrogate_model
+
+    def __exit__(self, *args):
+        for name, param in self.surrogate_model.gpmodel.named_parameters():
+            param.requires_grad_(self.requires_grad.get(name, True))
+
+
 def create_df_portals(x, y, yvar, x_names, output, max_x = 20):
 
     new_data = []
@@ -867,3 +1007,59 @@ def create_df_portals(x, y, yvar, x_names, output, max_x = 20):
 
     return new_df
 
+
+class training_data_writer:
+    """
+    Collects the training data of all outputs during a step and writes them as one consolidated block
+    (instead of reading and re-writing the whole file for each output).
+    Format is given by the file extension: .csv (appended) or .parquet (columnar, requires pyarrow)
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.blocks = []
+
+        if self.file.endswith(".parquet"):
+            try:
+                import pyarrow
+            except ImportError:
+                raise Exception(
+                    '[mitim] TrainingDataFormat="parquet" requires the pyarrow module (pip install pyarrow, or MITIM[parquet])'
+                )
+
+    def add(self, df):
+        self.blocks.append(df)
+
+    def flush(self):
+        if len(self.blocks) == 0:
+            return
+
+        new_df = pd.concat(self.blocks, ignore_index=True)
+        self.blocks = []
+
+        if self.file.endswith(".parquet"):
+            # Lists cannot be mixed with strings in the column, store them as in csv
+            new_df["x_names"] = new_df["x_names"].astype(str)
+            if os.path.exists(self.file):
+                new_df = pd.concat([pd.read_parquet(self.file), new_df], ignore_index=True)
+            new_df.to_parquet(self.file, index=False)
+
+        else:
+            # Append block, unless existing columns are different (e.g. more input dimensions)
+            if os.path.exists(self.file):
+                existing_columns = pd.read_csv(self.file, nrows=0).columns.tolist()
+                if existing_columns != new_df.columns.tolist():
+                    new_df = pd.concat([pd.read_csv(self.file), new_df], ignore_index=True)
+                    new_df.to_csv(self.file, index=False)
+                    return
+
+            new_df.to_csv(
+                self.file, mode="a", header=not os.path.exists(self.file), index=False
+            )
+
+
+def read_training_data(file):
+    if file.endswith(".parquet"):
+        return pd.read_parquet(file)
+    else:
+        return pd.read_csv(file)
@@ -38,7 +38,13 @@ def findOptima(fun, writeTrajectory=False):
         f"\t- Initialization of {txtConstr}GA to solve problem with {fun.dimDVs} DVs, {fun.dimOFs} OFs"
     )
 
-    if parallel_evaluations_inner == -1:
+    # Vectorized GA: population kept as a tensor, one acquisition call per generation
+    vectorized = fun.stepSettings["optimization_options"].get("ga_vectorized", False)
+
+    if vectorized:
+        parallel_evaluations_inner = 1
+        print("\t- Running with vectorized (tensor) population, no inner processors")
+    elif parallel_evaluations_inner == -1:
         parallel_evaluations_inner = multiprocessing.cpu_count()
         print(f"\t- Running with {parallel_evaluations_inner} inner processors")
 
@@ -64,6 +70,7 @@ def findOptima(fun, writeTrajectory=False):
         seed=fun.seed,
         stepSettings=fun.stepSettings,
         writeTrajectory=writeTrajectory,
+        vectorized=vectorized,
     )
 
     GA.executeGA()
@@ -160,9 +167,12 @@ class PRF_GA:
         seed=0,
         stepSettings={},
         writeTrajectory=False,
+        vectorized=False,
     ):
         """
         If residual_function gives y to be maximized (should be in MITIM), then weights must be positive
+        If vectorized, the evolution (variation, evaluation and selection) is performed on torch tensors
+        for the whole population at once (single objective only), instead of per-individual deap operators
         """
 
         if weights is None:
@@ -180,6 +190,18 @@ class PRF_GA:
 
         self.runType = "eaMuPlusLambda"
 
+        if vectorized and numOFs > 1:
+            print(
+                "\t- Vectorized GA only available for single-objective problems, using deap operators",
+                typeMsg="w",
+            )
+            vectorized = False
+        if vectorized:
+            self.runType = "eaMuPlusLambda_tensor"
+
+        self.seed = seed
+        self.dfT = stepSettings.get("dfT", torch.randn((2, 2), dtype=torch.double))
+
         # ~~~~ Define fitness of individuals
 
         creator.create("FitnessMin", deap.base.Fitness, weights=weights)
@@ -215,6 +237,16 @@ class PRF_GA:
 
         toolbox.register("evaluate", fun_opt)
 
+        # Tensor version of the evaluation (input is (pop,dim) tensor, output is (pop) tensor)
+        def fun_opt_tensor(X, v=self.acq_evaluated):
+            with torch.no_grad():
+                f = evaluators["acq_function"](X.unsqueeze(1))
+            if writeTrajectory:
+                v.append(f.max().item())
+            return f
+
+        self.evaluate_tensor = fun_opt_tensor
+
         self.toolboxes = list([toolbox for _ in range(len(pop_sizes))])
 
         # Define several experiments
@@ -234,6 +266,7 @@ class PRF_GA:
             )
             cont += 1
 
+        self.xGuesses = xGuesses
         self.pop_sizes = pop_sizes
         self.max_gens = max_gens
         self.mut_probs = mut_probs
@@ -268,9 +301,20 @@ class PRF_GA:
 
             time1 = datetime.datetime.now()
 
-            fronts, members, result, logbook, hof = run_ea(
-                toolbox, runType=self.runType
-            )
+            if self.runType == "eaMuPlusLambda_tensor":
+                fronts, members, result, logbook, hof = run_ea_tensor(
+                    toolbox,
+                    self.evaluate_tensor,
+                    self.lower,
+                    self.upper,
+                    xGuesses=self.xGuesses,
+                    seed=self.seed + i,
+                    dfT=self.dfT,
+                )
+            else:
+                fronts, members, result, logbook, hof = run_ea(
+                    toolbox, runType=self.runType
+                )
 
             print(
                 f"\t\t- Run #{i+1} was completed in {IOtools.getTimeDifference(time1)}"
@@ -339,6 +383,7 @@ class PRF_GA:
             indpb=1.0 / self.dim,
         )
         toolbox.register("select", deap.tools.selNSGA2)
+        toolbox.eta = eta
 
         toolbox.pop_size, toolbox.max_gen = pop_size, max_gen
         toolbox.mut_prob, toolbox.co_prob = mut_prob, co_prob
@@ -472,6 +517,60 @@ def run_ea(toolbox, runType="eaMuPlusLambda"):
     return np.array(fronts), np.array(allpoints), population, info, hof
 
 
+def run_ea_tensor(
+    toolbox, evaluate, lower, upper, xGuesses=[], seed=0, dfT=torch.randn((2, 2), dtype=torch.double)
+):
+    """
+    Same (mu+lambda) evolution as run_ea, but the population lives in a (pop,dim) tensor and
+    variation, evaluation and selection are performed for the entire population at once.
+    Outputs are formatted as in run_ea so that the rest of the workflow is unaffected.
+    """
+
+    generator = torch.Generator().manual_seed(seed)
+
+    lower = torch.from_numpy(np.array(lower)).to(dfT)
+    upper = torch.from_numpy(np.array(upper)).to(dfT)
+
+    # ~~~~ Initial population
+    pop_guess = torch.from_numpy(np.atleast_2d(xGuesses)).to(dfT) if len(xGuesses) > 0 else torch.zeros((0, lower.shape[0])).to(dfT)
+    pop_random = lower + (upper - lower) * torch.rand(
+        (toolbox.pop_size - pop_guess.shape[0], lower.shape[0]), generator=generator
+    ).to(dfT)
+    pop = torch.cat((pop_random, pop_guess), dim=0)
+
+    print(
+        f"\t\t\t- From a total of {pop.shape[0]}, {pop_guess.shape[0]} members were guessed & {pop_random.shape[0]} random"
+    )
+
+    # ---------------------------------
+    # Running algorithm
+    # ---------------------------------
+
+    population, fitness, info, hof = eaMuPlusLambda_tensor(
+        pop,
+        evaluate,
+        lower,
+        upper,
+        mu=toolbox.pop_size,
+        ngen=toolbox.max_gen,
+        lambda_=toolbox.pop_size // 2,
+        cxpb=toolbox.co_prob,
+        mutpb=toolbox.mut_prob,
+        eta=toolbox.eta,
+        generator=generator,
+    )
+
+    # ---------------------------------------------------------
+    # Population is sorted by fitness, so the best one is first
+    # ---------------------------------------------------------
+
+    print("\t\t\t~~~~ Getting best case at last generation")
+    population = population.cpu().numpy()
+    fronts = [population[0]]
+
+    return np.array(fronts), population, population, info, [hof.cpu().numpy()]
+
+
 def getFinalFronts(population, logbook, toolbox, getAll=False):
     """
     population is the entire set of points at the last evaluation
@@ -754,3 +853,161 @@ def eaMuPlusLambda(
         print_summary(gen, ngen, population[0].fitness.values[0], len(population))
 
     return population, logbook
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# Vectorized (tensor) version of eaMuPlusLambda, for single-objective problems
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+def eaMuPlusLambda_tensor(
+    population,
+    evaluate,
+    lower,
+    upper,
+    mu,
+    lambda_,
+    cxpb,
+    mutpb,
+    ngen,
+    eta=10.0,
+    generator=None,
+):
+    """
+    population is a (pop,dim) tensor and evaluate returns a (pop) tensor of fitness to maximize.
+    Selection is a truncation of (population + offspring) to the mu best, which for a single objective
+    is what selNSGA2 does (the crowding distance only breaks ties).
+    Returns the final population (sorted, best first), its fitness, the logbook info and the hall of fame
+    """
+
+    info = {"gen": [], "avg": [], "min": [], "max": []}
+
+    def record(gen, fitness):
+        info["gen"].append(gen)
+        info["avg"].append(fitness.mean().item())
+        info["min"].append(fitness.min().item())
+        info["max"].append(fitness.max().item())
+
+    fitness = evaluate(population)
+    print_summary(0, ngen, fitness.max().item(), fitness.shape[0])
+
+    hof, hof_fitness = population[fitness.argmax()].clone(), fitness.max()
+    record(0, fitness)
+
+    # Begin the generational process
+    for gen in range(1, ngen + 1):
+        # Vary the population
+        offspring, parents, invalid = varOr_tensor(
+            population, lambda_, cxpb, mutpb, lower, upper, eta=eta, generator=generator
+        )
+
+        # Evaluate only the individuals that changed (reproduced ones keep the fitness of their parent)
+        fitness_offspring = fitness[parents].clone()
+        if invalid.any():
+            fitness_offspring[invalid] = evaluate(offspring[invalid])
+
+        # Update the hall of fame with the generated individuals
+        if fitness_offspring.max() > hof_fitness:
+            hof, hof_fitness = offspring[fitness_offspring.argmax()].clone(), fitness_offspring.max()
+
+        # Select the next generation population
+        fitness_all = torch.cat((fitness, fitness_offspring), dim=0)
+        fitness, indices = torch.topk(fitness_all, mu, sorted=True)
+        population = torch.cat((population, offspring), dim=0)[indices]
+
+        record(gen, fitness)
+
+        print_summary(gen, ngen, fitness[0].item(), population.shape[0])
+
+    info = {key: np.array(info[key]) for key in info}
+
+    return population, fitness, info, hof
+
+
+def varOr_tensor(population, lambda_, cxpb, mutpb, lower, upper, eta=10.0, generator=None):
+    """
+    Tensor version of deap.algorithms.varOr: each of the lambda_ offspring is produced by crossover (first child
+    of cxSimulatedBinaryBounded), by mutation (mutPolynomialBounded) or by reproduction.
+    Returns the offspring, the index of their (first) parent and the mask of offspring that need evaluation
+    """
+
+    pop_size, dim = population.shape
+
+    op_choice = torch.rand(lambda_, generator=generator).to(population.device)
+    mask_cx = op_choice < cxpb
+    mask_mut = (op_choice >= cxpb) & (op_choice < cxpb + mutpb)
+
+    # Two different parents, as in random.sample(population, 2)
+    parents1 = torch.randint(pop_size, (lambda_,), generator=generator).to(population.device)
+    parents2 = (parents1 + torch.randint(1, max(pop_size, 2), (lambda_,), generator=generator).to(population.device)) % pop_size
+
+    offspring = population[parents1].clone()
+
+    if mask_cx.any():
+        offspring[mask_cx] = cxSimulatedBinaryBounded_tensor(
+            population[parents1[mask_cx]], population[parents2[mask_cx]], lower, upper, eta=eta, generator=generator
+        )
+    if mask_mut.any():
+        offspring[mask_mut] = mutPolynomialBounded_tensor(
+            population[parents1[mask_mut]], lower, upper, eta=eta, indpb=1.0 / dim, generator=generator
+        )
+
+    return offspring, parents1, mask_cx | mask_mut
+
+
+def cxSimulatedBinaryBounded_tensor(ind1, ind2, lower, upper, eta=10.0, generator=None):
+    """
+    Tensor version of deap.tools.cxSimulatedBinaryBounded, returning only the first child
+    """
+
+    def rand():
+        return torch.rand(ind1.shape, generator=generator).to(ind1)
+
+    apply = (rand() <= 0.5) & ((ind1 - ind2).abs() > 1e-14)
+
+    x1, x2 = torch.min(ind1, ind2), torch.max(ind1, ind2)
+    dx = torch.where(apply, x2 - x1, torch.ones_like(x1))
+    r = rand()
+
+    def beta_q(beta):
+        alpha = 2.0 - beta ** -(eta + 1)
+        return torch.where(
+            r <= 1.0 / alpha,
+            (r * alpha) ** (1.0 / (eta + 1)),
+            (1.0 / (2.0 - r * alpha)) ** (1.0 / (eta + 1)),
+        )
+
+    c1 = 0.5 * (x1 + x2 - beta_q(1.0 + (2.0 * (x1 - lower) / dx)) * dx)
+    c2 = 0.5 * (x1 + x2 + beta_q(1.0 + (2.0 * (upper - x2) / dx)) * dx)
+
+    c1 = torch.min(torch.max(c1, lower), upper)
+    c2 = torch.min(torch.max(c2, lower), upper)
+
+    child = torch.where(rand() <= 0.5, c2, c1)
+
+    return torch.where(apply, child, ind1)
+
+
+def mutPolynomialBounded_tensor(individuals, lower, upper, eta=10.0, indpb=0.1, generator=None):
+    """
+    Tensor version of deap.tools.mutPolynomialBounded
+    """
+
+    def rand():
+        return torch.rand(individuals.shape, generator=generator).to(individuals)
+
+    apply = rand() <= indpb
+
+    x = torch.min(torch.max(individuals, lower), upper)
+    delta_1 = (x - lower) / (upper - lower)
+    delta_2 = (upper - x) / (upper - lower)
+    r = rand()
+    mut_pow = 1.0 / (eta + 1.0)
+
+    val_low = 2.0 * r + (1.0 - 2.0 * r) * (1.0 - delta_1) ** (eta + 1)
+    val_up = 2.0 * (1.0 - r) + 2.0 * (r - 0.5) * (1.0 - delta_2) ** (eta + 1)
+    delta_q = torch.where(r < 0.5, val_low**mut_pow - 1.0, 1.0 - val_up**mut_pow)
+
+    x = torch.min(torch.max(x + delta_q * (upper - lower), lower), upper)
+
+    return torch.where(apply, x, individuals)
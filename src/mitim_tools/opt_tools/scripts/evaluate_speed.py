@@ -1,10 +1,16 @@
 import torch
 import argparse
+import contextlib
 from mitim_tools.misc_tools import IOtools
-from mitim_tools.opt_tools import STRATEGYtools
+from mitim_tools.opt_tools import STRATEGYtools, SURROGATEtools
 
 """
 speed_tester.py --folder run1/ --num 1000 --name test1
+speed_tester.py --folder run1/ --num 1000 --name test1 --frozen [--repeats 10]
+
+With --frozen, the throughput is measured with the surrogate in the "frozen" mode used during the optimization
+of the acquisition (caches precomputed and hyperparameters not tracking gradients), for comparison with
+the standard mode.
 """
 
 
@@ -12,6 +18,8 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--folder", required=True, type=str)
 parser.add_argument("--num", type=int, required=False, default=10000)
 parser.add_argument("--name", type=str, required=False, default="")
+parser.add_argument("--frozen", required=False, default=False, action="store_true")
+parser.add_argument("--repeats", type=int, required=False, default=1)
 args = parser.parse_args()
 
 folder = IOtools.expandPath(args.folder) + "/"
@@ -24,10 +32,21 @@ step = opt_fun.prfs_model.steps[-1]
 
 x = torch.rand(cases, step.train_X.shape[-1])
 
-with IOtools.speeder(f"profiler{name}.prof") as s:
-    with torch.no_grad():
-        mean, upper, lower, _ = step.GP["combined_model"].predict(x)
-
-print(
-    f"\nIt took {s.timeDiff:.3f}s to run {x.shape[0]:.1e} parallel evaluations (i.e. {s.timeDiff*1E6/cases:.3f}micro-s/member) of {mean.shape[-1]} GPs with {x.shape[-1]} raw input dimensions"
-)
+modes = {"standard": False}
+if args.frozen:
+    modes["frozen"] = True
+
+for mode in modes:
+    with (
+        SURROGATEtools.frozen_model_context(step.GP["combined_model"])
+        if modes[mode]
+        else contextlib.nullcontext()
+    ):
+        with IOtools.speeder(f"profiler{name}_{mode}.prof") as s:
+            with torch.no_grad():
+                for _ in range(args.repeats):
+                    mean, upper, lower, _ = step.GP["combined_model"].predict(x)
+
+    print(
+        f"\n[{mode}] It took {s.timeDiff:.3f}s to run {args.repeats}x{x.shape[0]:.1e} parallel evaluations (i.e. {s.timeDiff*1E6/(cases*args.repeats):.3f}micro-s/member) of {mean.shape[-1]} GPs with {x.shape[-1]} raw input dimensions"
+    )
@@ -0,0 +1,83 @@
+import copy
+import datetime
+import tempfile
+import argparse
+import numpy as np
+from mitim_tools.misc_tools import IOtools
+from mitim_tools.opt_tools import STRATEGYtools
+
+"""
+This script benchmarks the warm-starting of hyperparameters (surrogateOptions["WarmStart"]) by re-fitting
+one step of a MITIM folder from scratch and from the models fitted at the previous step.
+It reports fitting time and model quality (final loss and error on the training set).
+e.g.
+	evaluate_warm_start.py --folder run1/ [--step -1] [--attempts 1] [--tolerance 1E-2]
+"""
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--folder", required=True, type=str)
+parser.add_argument("--step", required=False, type=int, default=-1)
+parser.add_argument("--attempts", required=False, type=int, default=1)
+parser.add_argument("--tolerance", required=False, type=float, default=None)
+args = parser.parse_args()
+
+folder = IOtools.expandPath(args.folder) + "/"
+
+# ***************** Read
+
+opt_fun = STRATEGYtools.opt_evaluator(folder)
+opt_fun.read_optimization_results(analysis_level=4)
+steps = opt_fun.prfs_model.steps
+
+step_num = args.step % len(steps)
+if step_num == 0:
+    raise Exception("[MITIM] Warm-starting requires a previous step to be available")
+
+previous_models = steps[step_num - 1].GP["individual_models"]
+
+# ***************** Re-fit (cold and warm)
+
+results = {}
+for label, warm in [("cold", False), ("warm", True)]:
+    step = copy.deepcopy(steps[step_num])
+
+    # Do not touch the files of the original optimization
+    step.fileOutputs = None
+    step.stepSettings = copy.deepcopy(step.stepSettings)
+    step.stepSettings["folderOutputs"] = tempfile.mkdtemp()
+
+    step.surrogateOptions["WarmStart"] = warm
+    step.surrogateOptions["WarmStartAttempts"] = args.attempts
+    step.surrogateOptions["WarmStartSkipTolerance"] = args.tolerance
+
+    time1 = datetime.datetime.now()
+    step.fit_step(avoidPoints=steps[step_num].avoidPoints, previous_models=previous_models)
+    timeFit = IOtools.getTimeDifference(time1, niceText=False)
+
+    GP = step.GP["combined_model"]
+    y = GP.train_Y.cpu().numpy()
+    yPredicted = GP.predict(GP.train_X)[0].detach().cpu().numpy()
+    err = np.abs(yPredicted - y) / np.abs(y).clip(1e-10) * 100.0
+
+    results[label] = {
+        "time": timeFit,
+        "loss": np.array([gp.losses["loss_final"] for gp in step.GP["individual_models"]]),
+        "iterations": np.array([len(gp.losses["losses"]) for gp in step.GP["individual_models"]]),
+        "error": err.max(axis=0),
+    }
+
+# ***************** Summary
+
+print(f"\n>> Warm-start benchmark for step #{step_num} ({len(previous_models)} models)")
+for label in results:
+    print(
+        f"\t- {label}: fitting took {results[label]['time']:.2f}s, {results[label]['iterations'].sum()} optimizer iterations, mean final loss {results[label]['loss'].mean():.3f}, max training error {results[label]['error'].max():.2f}%"
+    )
+
+print(f"\n\t{'output':>20} {'loss cold':>10} {'loss warm':>10} {'err cold':>10} {'err warm':>10}")
+for i, gp in enumerate(steps[step_num].GP["individual_models"]):
+    print(
+        f"\t{str(gp.output):>20} {results['cold']['loss'][i]:>10.3f} {results['warm']['loss'][i]:>10.3f} {results['cold']['error'][i]:>9.2f}% {results['warm']['error'][i]:>9.2f}%"
+    )
+
+print(f"\n>> Speed-up of warm-starting: x{results['cold']['time']/results['warm']['time']:.2f}")
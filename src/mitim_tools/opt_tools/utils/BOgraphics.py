@@ -1345,7 +1345,15 @@ class optimization_results:
         Name="",
         forceWrite=False,
         addheader=True,
+        positions=None,
     ):
+        """
+        Points in rows [includePoints[0], includePoints[1]) of the training set, or in the rows given by positions
+        """
+
+        if positions is None:
+            positions = range(includePoints[0], includePoints[1])
+
         linesBatch = f"\n\n* {Name}"
 
         if addheader:
@@ -1354,13 +1362,13 @@ class optimization_results:
                 linesBatch += "\nPredicted optimum point as of this iteration"
             else:
                 linesBatch += (
-                    f"\nRunning high-fidelity evaluations for {includePoints[1] - includePoints[0]} points..."
+                    f"\nRunning high-fidelity evaluations for {len(positions)} points..."
                 )
                 if timingString is not None:
                     linesBatch += f" (took total of {timingString})"
             linesBatch += "\n~~~~~~~~~~~~~~~~~~~~"
 
-        for i in range(includePoints[0], includePoints[1]):
+        for cont, i in enumerate(positions):
             linesBatch += self.produceDVlines(position=i, Best=Best)
 
             if executed:
@@ -1373,8 +1381,7 @@ class optimization_results:
             linesBatch += f"\n\t\t\tL2-norm = {l2:.5f}"
 
             if predicted:
-                position = i - includePoints[0]
-                lin, l2, yP = self.produceOFlines(position=position, predicted=True)
+                lin, l2, yP = self.produceOFlines(position=cont, predicted=True)
             else:
                 lin, l2, yP = self.produceOFlines(position=i, predicted=True, zero=True)
             linesBatch += lin
@@ -1,4 +1,5 @@
 import os
+import time
 import torch
 import numpy as np
 from collections import OrderedDict
@@ -112,6 +113,128 @@ def fun(
     return ynew, yEnew, numEval_new
 
 
+class asynchronous_evaluator:
+    """
+    Pool of worker processes where single evaluations (mitimRun) are launched as soon as they are submitted,
+    and collected as they finish (in any order). This is used by the asynchronous mode of PRF_BO, so that
+    new points can be proposed while other evaluations are still running.
+
+    Notes:
+        - optimization_data is not passed to the workers (to avoid several processes writing the same file),
+          the main process is in charge of updating it with the collected evaluations
+        - workers < 1 means as many workers as CPUs available
+    """
+
+    def __init__(
+        self,
+        optimization_object,
+        folderExecution,
+        outputs,
+        workers=1,
+        numEval=0,
+    ):
+        import multiprocessing_on_dill as multiprocessing
+
+        self.optimization_object = optimization_object
+        self.folderExecution = folderExecution
+        self.outputs = outputs
+        self.numEval = numEval
+
+        self.workers = workers if workers > 0 else multiprocessing.cpu_count()
+
+        if not os.path.exists(folderExecution + "/Execution/"):
+            os.mkdir(folderExecution + "/Execution/")
+
+        self.pool = multiprocessing.Pool(processes=self.workers)
+
+        # numEval -> (x, AsyncResult)
+        self.pending = OrderedDict()
+
+        print(f"\t- Asynchronous evaluator initialized with {self.workers} workers")
+
+    def free_workers(self):
+        return self.workers - len(self.pending)
+
+    def submit(self, x, bounds):
+        """
+        Launch the evaluation of every row of x, returning the evaluation numbers assigned to them
+        """
+
+        numEvals = []
+        for xi in np.atleast_2d(x):
+            print(f"\t- Launching evaluation #{self.numEval} asynchronously")
+            self.pending[self.numEval] = (
+                xi,
+                self.pool.apply_async(
+                    mitimRun,
+                    (
+                        self.optimization_object,
+                        xi,
+                        self.numEval,
+                        self.folderExecution,
+                        bounds,
+                        self.outputs,
+                        None,
+                    ),
+                    {"restartYN": True},
+                ),
+            )
+            numEvals.append(self.numEval)
+            self.numEval += 1
+
+        return numEvals
+
+    def collect(self, wait=False, poll_seconds=1.0):
+        """
+        Grab the evaluations that have finished. If wait, block until at least one has finished.
+        Returns x, y, yE (evaluations in rows) and the evaluation numbers
+        """
+
+        numEvals, x, y, yE = [], [], [], []
+        while True:
+            for numEval in list(self.pending.keys()):
+                xi, result = self.pending[numEval]
+                if result.ready():
+                    try:
+                        yi, yEi = result.get()
+                    except Exception as e:
+                        print(
+                            f"--> Evaluation #{numEval} failed ({e}), it will not be considered",
+                            typeMsg="w",
+                        )
+                        yi = yEi = np.ones(len(self.outputs)) * np.inf
+
+                    del self.pending[numEval]
+
+                    numEvals.append(numEval)
+                    x.append(xi)
+                    y.append(yi)
+                    yE.append(yEi)
+
+            if (len(numEvals) > 0) or (not wait) or (len(self.pending) == 0):
+                break
+
+            time.sleep(poll_seconds)
+
+        if len(numEvals) > 0:
+            print(
+                f"--> Asynchronous evaluator collected evaluations {numEvals} ({len(self.pending)} still running)"
+            )
+
+        return np.array(x), np.array(y), np.array(yE), numEvals
+
+    def close(self):
+        if len(self.pending) > 0:
+            print(
+                f"\t- Terminating {len(self.pending)} evaluations that are still running",
+                typeMsg="w",
+            )
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
+
+
 def mitimRun(
     optimization_object,
     x,
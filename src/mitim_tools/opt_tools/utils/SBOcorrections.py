@@ -503,9 +503,10 @@ def correctInfs(train_X, train_Y):
     return train_X, train_Y
 
 
-def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=0):
+def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=0, rows=None):
     """
     The logic here is that the residuals are for minimization
+    The evaluations of this iteration are the last evaluatedPoints of the training set, or those in rows
 
     Bring from GPU to CPU
     """
@@ -541,6 +542,11 @@ def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=
     resi = self.BOmetrics["overall"]["Residual"]
     resiM = self.BOmetrics["overall"]["ResidualModeledLast"]
 
+    if rows is None:
+        rows = np.arange(X.shape[0] - evaluatedPoints, X.shape[0])
+    rows = np.array(rows)
+    rows_previous = np.setdiff1d(np.arange(X.shape[0]), rows)
+
     # Absolute best
     zA_abs = np.nanmin(resi, axis=0)
     self.BOmetrics["overall"]["indBest"] = np.nanargmin(resi, axis=0)
@@ -557,13 +563,13 @@ def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=
     )
 
     # Best from last iteration
-    zA = np.nanmin(resi[-evaluatedPoints:], axis=0)
+    zA = np.nanmin(resi[rows], axis=0)
     self.BOmetrics["overall"]["indBestLast"] = np.nanargmin(
-        resi[-evaluatedPoints:], axis=0
+        resi[rows], axis=0
     )
-    zM = np.nanmin(resiM[-evaluatedPoints:], axis=0)
+    zM = np.nanmin(resiM[rows], axis=0)
     self.BOmetrics["overall"]["indBestModelLast"] = np.nanargmin(
-        resiM[-evaluatedPoints:], axis=0
+        resiM[rows], axis=0
     )
 
     self.BOmetrics["overall"]["xBestLast"] = X[
@@ -582,13 +588,13 @@ def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=
         ratio, metric = np.inf, 0.0
         label = "\t(Initial batch only)"
     else:
-        zA_prev = np.nanmin(resi[:-evaluatedPoints], axis=0)
+        zA_prev = np.nanmin(resi[rows_previous], axis=0)
         self.BOmetrics["overall"]["indBestExceptLast"] = np.nanargmin(
-            resi[:-evaluatedPoints], axis=0
+            resi[rows_previous], axis=0
         )
-        zM_prev = np.nanmin(resiM[:-evaluatedPoints], axis=0)
+        zM_prev = np.nanmin(resiM[rows_previous], axis=0)
         self.BOmetrics["overall"]["indBestModelExceptLast"] = np.nanargmin(
-            resiM[:-evaluatedPoints], axis=0
+            resiM[rows_previous], axis=0
         )
 
         ratio, metric, label = constructMetricsTR(zA, zM, zA_prev, zM_prev)
@@ -633,8 +639,8 @@ def updateMetrics(self, evaluatedPoints=1, IsThisAFreshIteration=True, position=
             "yVarBest"
         ]
 
-        self.BOmetrics["BOmetric_it"][position] = (
-            X.shape[0] - 1
+        self.BOmetrics["BOmetric_it"][position] = int(
+            rows.max()
         )  # Evaluation position until now
 
 
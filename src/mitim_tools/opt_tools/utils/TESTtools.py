@@ -1,7 +1,9 @@
-import torch, copy
+import os, torch, copy, json, datetime
 import numpy as np
 import matplotlib.pyplot as plt
 from IPython import embed
+from mitim_tools.misc_tools import FARMINGtools
+from mitim_tools.opt_tools import BOTORCHtools
 from mitim_tools.misc_tools.IOtools import printMsg as print
 from mitim_tools.misc_tools.CONFIGread import read_verbose_level
 
@@ -45,12 +47,142 @@ def checkSolutionIsWithinBounds(x, bounds, maxExtrapolation=[0.0, 0.0]):
     return insideBounds
 
 
+def validate_models(
+    GPs,
+    GP,
+    policy="full",
+    iteration=0,
+    every=1,
+    samples=10,
+    fileLog=None,
+    seed=0,
+):
+    """
+    Validation of the fitted models (batch evaluation, model combination and batched outputs accuracy), according to policy:
+        - "full":       all tests, on all training points (every iteration)
+        - "sampled":    tests on a random subset of "samples" training points
+        - "every":      full tests, but only every "every" iterations
+        - "async":      full tests in a separate process, while the optimization goes on (the new points are
+                        evaluated); run_pending_validations() waits for them to finish
+        - "none":       skip
+    Structured pass/fail results are appended to fileLog (one json record per line) and returned (except for async)
+    """
+
+    if (policy == "none") or ((policy == "every") and (iteration % every != 0)):
+        print(f"\t- Model validation skipped at iteration {iteration} (policy: {policy})")
+        return []
+
+    if policy == "async":
+        # In another process, as gpytorch and botorch settings are global to the process (models are serialized
+        # now, so they can keep changing here)
+        pending_validations.append(
+            validation_executor().submit(
+                run_validation_process,
+                {"GPs": GPs, "GP": GP, "iteration": iteration, "fileLog": fileLog, "policy": policy},
+                0,
+            )
+        )
+        print(f"\t- Model validation launched in a separate process (results to {fileLog})")
+        return []
+
+    if policy == "sampled":
+        indeces = np.random.default_rng(seed + iteration).choice(
+            GP.train_X.shape[0], size=min(samples, GP.train_X.shape[0]), replace=False
+        )
+        return run_validation(
+            GPs,
+            GP,
+            x=GP.train_X[np.sort(indeces), :],
+            combinations=[2, samples],
+            iteration=iteration,
+            fileLog=fileLog,
+            policy=policy,
+        )
+
+    return run_validation(GPs, GP, iteration=iteration, fileLog=fileLog, policy=policy)
+
+
+pending_validations = []
+
+
+def validation_executor():
+    # One worker of its own, not to take workers from the evaluations
+    global executor_validations
+    if executor_validations is None or executor_validations.pid != os.getpid():
+        executor_validations = FARMINGtools.mitim_executor(workers=1)
+    return executor_validations
+
+
+executor_validations = None
+
+
+def run_validation_process(Params, cont):
+    return run_validation(
+        Params["GPs"],
+        Params["GP"],
+        iteration=Params["iteration"],
+        fileLog=Params["fileLog"],
+        policy=Params["policy"],
+    )
+
+
+def run_pending_validations():
+    while len(pending_validations) > 0:
+        future = pending_validations.pop(0)
+        try:
+            future.result()
+        except Exception as e:
+            print(f"\t- Model validation in a separate process could not run ({e})", typeMsg="w")
+
+
+def run_validation(
+    GPs,
+    GP,
+    x=None,
+    combinations=[2, 100, 1000],
+    iteration=0,
+    fileLog=None,
+    policy="full",
+):
+    results = []
+    try:
+        results.extend(testBatchCapabilities(GP, combinations=combinations))
+        results.extend(
+            testCombinationCapabilities(GPs, GP, x=x, interactive=(policy != "async"))
+        )
+        results.extend(
+            testBatchedCombination(GP, x=x, interactive=(policy != "async"))
+        )
+    except Exception as e:
+        # Likely a singular matrix for the Cholesky decomposition
+        results.append({"test": "exception", "passed": False, "max_error": np.nan, "error": str(e)})
+
+    for result in results:
+        result["iteration"] = iteration
+        result["policy"] = policy
+        result["time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if fileLog is not None:
+        with open(fileLog, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    failed = [result["test"] for result in results if not result["passed"]]
+    if len(failed) > 0:
+        print(f"\t- Model validation at iteration {iteration} failed for: {failed}", typeMsg="w")
+    else:
+        print(f"\t- Model validation at iteration {iteration} passed ({len(results)} tests)", verbose=verbose_level)
+
+    return results
+
+
 def testBatchCapabilities(GPs, combinations=[2, 100, 1000]):
     """
     This assesses the relative error in cases where y_Normalized> thrImportance
     It stops running if the error gets larger than thrPercent in those cases
     """
 
+    results = []
     for i in combinations:
         x = GPs.train_X[0:1, :].repeat(i, 1)
 
@@ -64,9 +196,15 @@ def testBatchCapabilities(GPs, combinations=[2, 100, 1000]):
             y1, y2, labels=[f"{i} SAMPLES", "1 SAMPLE"]
         )
 
+        results.append(
+            {"test": f"batch_{i}", "passed": not trouble, "max_error": float(np.nanmax(maxPercent))}
+        )
+
+    return results
 
-def testCombinationCapabilities(GPs, GP):
-    x = GP.train_X
+
+def testCombinationCapabilities(GPs, GP, x=None, interactive=True):
+    x = GP.train_X if x is None else x
 
     # Combined
     y, _, _, _ = GP.predict(x)
@@ -81,11 +219,55 @@ def testCombinationCapabilities(GPs, GP):
     y, ys = y.detach(), ys.detach()
     err = ((y - ys).abs() / ys * 100).cpu().numpy()
 
-    if np.nanmax(err) > 1e-5:
+    passed = not (np.nanmax(err) > 1e-5)
+
+    if not passed:
         print(
             f"\t Max error of combination (check!): {np.nanmax(err):.2f}%", typeMsg="w"
         )
-        embed()
+        if interactive:
+            embed()
+
+    return [{"test": "combination", "passed": passed, "max_error": float(np.nanmax(err))}]
+
+
+def testBatchedCombination(GP, x=None, interactive=True):
+    """
+    If outputs are combined in a batched multi-output model (surrogateOptions["BatchedOutputs"]), its posterior
+    (mean and variance) must be the same as the ModelListGP posterior of the individual models
+    """
+
+    if not isinstance(GP.gpmodel, BOTORCHtools.ModifiedBatchedModelGP):
+        return []
+
+    x = GP.train_X if x is None else x
+
+    posterior_batched = GP.gpmodel.posterior(x)
+    posterior_list = BOTORCHtools.ModifiedModelListGP.posterior(GP.gpmodel, x)
+
+    results = []
+    for moment in ["mean", "variance"]:
+        y = getattr(posterior_batched, moment).detach()
+        ys = getattr(posterior_list, moment).detach()
+
+        # Relative to the magnitude of each output (variances at training points may be almost zero)
+        err = ((y - ys).abs() / ys.abs().amax(dim=0) * 100).cpu().numpy()
+
+        passed = not (np.nanmax(err) > 1e-3)
+
+        if not passed:
+            print(
+                f"\t Max error of batched outputs {moment} (check!): {np.nanmax(err):.2e}%",
+                typeMsg="w",
+            )
+            if interactive:
+                embed()
+
+        results.append(
+            {"test": f"batched_{moment}", "passed": passed, "max_error": float(np.nanmax(err))}
+        )
+
+    return results
 
 
 def isOutlier(y0, y, stds_outside=5, stds_outside_checker=1):
@@ -0,0 +1,93 @@
+"""
+This example follows a (synthetic) CGYRO simulation while it runs, reading only the new time slices of its
+binary outputs with CGYROtools.CGYROstream.
+It uses the CGYRO stub in $MITIM_PATH/tests/fake_gacode, so it does not require GACODE.
+To run: python3  $MITIM_PATH/tests/CGYROstream_workflow.py
+"""
+
+import os
+import time
+import subprocess
+import numpy as np
+from mitim_tools.misc_tools import IOtools
+from mitim_tools.gacode_tools import CGYROtools
+
+restart = True
+
+folder = IOtools.expandPath("$MITIM_PATH/tests/scratch/cgyro_stream_test/")
+stub = IOtools.expandPath("$MITIM_PATH/tests/fake_gacode/cgyro")
+
+if restart and os.path.exists(folder):
+    os.system(f"rm -r {folder}")
+
+if not os.path.exists(folder):
+    os.system(f"mkdir -p {folder}")
+
+# Launch synthetic simulation in the background
+simulation = subprocess.Popen(
+    [stub, "-e", folder, "-n", "1", "-nomp", "1"],
+    env=dict(os.environ, MITIM_STUB_STEPS="500", MITIM_STUB_SECONDS="20"),
+)
+
+cgyro = CGYROtools.CGYRO()
+
+# Wait for the grids to be written
+while not os.path.exists(f"{folder}/out.cgyro.grids"):
+    time.sleep(0.5)
+
+while simulation.poll() is None:
+    time.sleep(2)
+    stream = cgyro.read_stream(label="cgyro1", folder=folder)
+    if len(stream.t) == 0:
+        continue
+
+    t, phi = stream.tail("bin.cgyro.kxky_phi", n=1)
+    Qe, Qe_std = stream.flux_average(moment="e", ispec=0, tmin=stream.t[-1] * 0.5)
+    print(f"t = {t[-1]:.1f}, <Qe> (last half) = {Qe:.3f} +- {Qe_std:.3f}")
+
+# Time-average over the saturated phase
+stream = cgyro.read_stream(label="cgyro1", folder=folder)
+for moment in ["n", "e", "v"]:
+    for ispec in range(stream.grids["n_species"]):
+        mean, std = stream.flux_average(moment=moment, ispec=ispec, tmin=100.0)
+        print(f"Species {ispec}, moment {moment}: {mean:.3f} +- {std:.3f}")
+
+# --------------------------------------------------------------------------------------------
+# Binary files ahead of out.cgyro.time: 2 slices of ky_flux (3 moments) written, 1 time line
+# --------------------------------------------------------------------------------------------
+
+folder_ahead = f"{folder}/ahead/"
+os.system(f"mkdir -p {folder_ahead} && cp {folder}/out.cgyro.grids {folder_ahead}")
+
+g = stream.grids
+np.zeros(2 * g["n_species"] * 3 * g["n_field"] * g["n_n"], dtype=np.float32).tofile(
+    f"{folder_ahead}/bin.cgyro.ky_flux"
+)
+with open(f"{folder_ahead}/out.cgyro.time", "w") as f:
+    f.write("1.0 0.0\n")
+
+stream = CGYROtools.CGYROstream(folder_ahead)
+stream.update_fluxes()
+n_flux = stream.shape("bin.cgyro.ky_flux")[1]
+print(f"Moments in ky_flux with binary ahead of time: {n_flux} (cached: {os.path.exists(f'{folder_ahead}/{stream.cache_file}')})")
+assert n_flux == 3
+
+# --------------------------------------------------------------------------------------------
+# Simulation restarted from scratch in the same folder: out.cgyro.time is rewritten (shorter)
+# --------------------------------------------------------------------------------------------
+
+np.ones(7 * g["n_species"] * 3 * g["n_field"] * g["n_n"], dtype=np.float32).tofile(
+    f"{folder_ahead}/bin.cgyro.ky_flux"
+)
+with open(f"{folder_ahead}/out.cgyro.time", "w") as f:
+    f.write("".join(f"{i}.0 0.0\n" for i in range(1, 8)))
+stream.update_fluxes()
+
+np.zeros(2 * g["n_species"] * 3 * g["n_field"] * g["n_n"], dtype=np.float32).tofile(
+    f"{folder_ahead}/bin.cgyro.ky_flux"
+)
+with open(f"{folder_ahead}/out.cgyro.time", "w") as f:
+    f.write("0.5 0.0\n0.6 0.0\n")
+fluxes = stream.update_fluxes()
+print(f"After restart: {len(stream.t)} times (first {stream.t[0]}), {fluxes.shape[-1]} reduced slices")
+assert len(stream.t) == 2 and stream.t[0] == 0.5 and fluxes.shape[-1] == 2 and np.all(fluxes == 0)
@@ -0,0 +1,74 @@
+"""
+This example runs mitim_job through the local test harness, without a cluster: the loopback SSH server of
+$MITIM_PATH/tests/fake_ssh (with a simulated transport) and the fake SLURM of $MITIM_PATH/tests/fake_slurm
+(with simulated queue delays and failures). Timings are deterministic, so it can be used to benchmark
+job orchestration.
+It requires the "loopback" machine of config_user_example.json in config_user.json.
+To run: python3  $MITIM_PATH/tests/FARMING_workflow.py
+"""
+
+import os
+import sys
+import time
+from mitim_tools.misc_tools import IOtools, FARMINGtools
+
+sys.path.insert(0, IOtools.expandPath("$MITIM_PATH/tests/fake_ssh/"))
+import server
+
+restart = True
+
+folder = IOtools.expandPath("$MITIM_PATH/tests/scratch/farming_test/")
+
+if restart and os.path.exists(folder):
+    os.system(f"rm -r {folder}")
+
+if not os.path.exists(folder):
+    os.system(f"mkdir -p {folder}")
+
+# Simulated cluster: 50ms per command, 10MB/s and tasks pending for 2s (MITIM_FAKE_SLURM_FAIL makes some fail)
+os.environ["MITIM_FAKE_SLURM"] = f"{folder}/slurm_state"
+os.environ["MITIM_FAKE_SLURM_DELAY"] = "2"
+os.environ["MITIM_FAKE_SLURM_FAIL"] = "0"
+sock = server.start_server(port=2222, latency=0.05, bandwidth=10e6)
+
+# --------------------------------------------------------------------------------------------
+# Batch of jobs, run concurrently
+# --------------------------------------------------------------------------------------------
+
+jobs = []
+for i in range(10):
+    folder_job = f"{folder}/job{i}/"
+    os.system(f"mkdir -p {folder_job}")
+    with open(f"{folder_job}/input.txt", "w") as f:
+        f.write(f"{i}\n")
+
+    job = FARMINGtools.mitim_job(folder_job)
+    job.define_machine("loopback", f"mitim_farming_test{i}/", slurm_settings={"name": f"mitim_farming_test{i}"})
+    job.prep(
+        "sleep 1 && cat input.txt > output.txt",
+        input_files=[f"{folder_job}/input.txt"],
+        output_files=["output.txt"],
+    )
+    jobs.append(job)
+
+time_init = time.time()
+states = FARMINGtools.run_jobs(jobs, max_default=4)
+print(f"Batch of {len(jobs)} jobs took {time.time() - time_init:.1f}s: {states}")
+
+# --------------------------------------------------------------------------------------------
+# Job launched without waiting, then checked and cancelled
+# --------------------------------------------------------------------------------------------
+
+job = FARMINGtools.mitim_job(f"{folder}/job_cancel/")
+os.system(f"mkdir -p {folder}/job_cancel/")
+job.define_machine("loopback", "mitim_farming_cancel/", slurm_settings={"name": "mitim_farming_cancel"})
+job.prep("sleep 60")
+job.run(waitYN=False)
+
+job.check()
+job.cancel()
+job.check()
+
+print(f"Transport statistics: {server.statistics}")
+
+sock.close()
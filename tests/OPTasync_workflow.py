@@ -0,0 +1,107 @@
+"""
+This example runs the asynchronous MITIM optimization algorithm on a simple test function whose evaluations
+take a random (heterogeneous) amount of time, mimicking remote simulations. Evaluations are run by a local pool of
+processes and new points are proposed as soon as a worker is free.
+To run: python3  $MITIM_PATH/tests/OPTasync_workflow.py
+"""
+
+import os
+import time
+import torch
+import numpy as np
+from mitim_tools.misc_tools import IOtools
+from mitim_tools.opt_tools import STRATEGYtools
+
+restart = True
+
+if not os.path.exists(IOtools.expandPath("$MITIM_PATH/tests/scratch/")):
+    os.system("mkdir " + IOtools.expandPath("$MITIM_PATH/tests/scratch/"))
+
+# -----------------------------------------------------------------------------------------------------
+# ----- Inputs (stand-in function to optimize, with random evaluation time)
+# -----------------------------------------------------------------------------------------------------
+
+
+class opt_class(STRATEGYtools.opt_evaluator):
+    def __init__(self, folder, namelist, max_seconds=10.0):
+        # Store folder, namelist. Read namelist
+        super().__init__(folder, namelist=namelist)
+        # ----------------------------------------
+
+        self.max_seconds = max_seconds
+
+        # Problem description (rest of problem parameters are taken from namelist)
+        self.optimization_options["dvs"] = ["x"]
+        self.optimization_options["dvs_min"] = [0.0]
+        self.optimization_options["dvs_max"] = [20.0]
+
+        self.optimization_options["ofs"] = ["z", "zval"]
+        self.name_objectives = ["zval_match"]
+
+    def run(self, paramsfile, resultsfile):
+        # Read stuff
+        folderEvaluation, numEval, dictDVs, dictOFs = self.read(paramsfile, resultsfile)
+
+        # Heterogeneous duration of evaluations
+        time.sleep(np.random.default_rng(int(numEval)).uniform(0.0, self.max_seconds))
+
+        # Operations
+        dictOFs["z"]["value"] = dictDVs["x"]["value"] ** 2
+        dictOFs["z"]["error"] = dictOFs["z"]["value"] * 2e-2
+
+        dictOFs["zval"]["value"] = 15.0
+        dictOFs["zval"]["error"] = 0.0
+
+        # Write stuff
+        self.write(dictOFs, resultsfile)
+
+    def scalarized_objective(self, Y):
+        ofs_ordered_names = np.array(self.optimization_options["ofs"])
+
+        of = Y[..., ofs_ordered_names == "z"]
+        cal = Y[..., ofs_ordered_names == "zval"]
+
+        # Residual is defined as the negative (bc it's maximization) normalized (1/N) norm of radial & channel residuals -> L1
+        res = -1 / of.shape[-1] * torch.norm((of - cal), p=1, dim=-1)
+
+        return of, cal, res
+
+
+# -----------------------------------------------------------------------------------------------------
+# ----- Inputs
+# -----------------------------------------------------------------------------------------------------
+
+namelist = IOtools.expandPath("$MITIM_PATH/templates/main.namelist.json")
+folderWork = IOtools.expandPath("$MITIM_PATH/tests/scratch/opt_async_test/")
+
+if restart and os.path.exists(folderWork):
+    os.system(f"rm -r {folderWork}")
+
+# -----------------------------------------------------------------------------------------------------
+# ----- Workflow
+# -----------------------------------------------------------------------------------------------------
+
+# Initialize class
+opt_fun1D = opt_class(folderWork, namelist)
+
+# Changes to namelist in MITIM_PATH/templates/main.namelist.json
+opt_fun1D.optimization_options["initial_training"] = 2
+opt_fun1D.optimization_options["BO_iterations"] = 8
+opt_fun1D.optimization_options["parallel_evaluations"] = 3
+opt_fun1D.optimization_options["asynchronous"] = True
+opt_fun1D.optimization_options["asynchronous_liar"] = "believer"
+
+# Initialize BO framework
+PRF_BO = STRATEGYtools.PRF_BO(opt_fun1D, restartYN=restart, askQuestions=False)
+
+# Run BO framework
+PRF_BO.run()
+
+# -----------------------------------------------------------------------------------------------------
+# ----- Plotting
+# -----------------------------------------------------------------------------------------------------
+
+opt_fun1D.plot_optimization_results(analysis_level=2)
+
+# Required if running in non-interactive mode
+opt_fun1D.fn.show()
@@ -0,0 +1,103 @@
+"""
+This example exercises the local cache of TGLF results (GACODErun.TGLFcache): storing, retrieving (also for
+equivalent inputs written differently), concurrent stores of the same entry, runs with missing outputs and
+eviction of the least recently used entries.
+It does not require TGLF (output files are placeholders).
+To run: python3  $MITIM_PATH/tests/TGLFcache_workflow.py
+"""
+
+import os
+import time
+from mitim_tools.misc_tools import IOtools
+from mitim_tools.gacode_tools.utils import GACODErun
+
+restart = True
+
+folder = IOtools.expandPath("$MITIM_PATH/tests/scratch/tglfcache_test/")
+
+if restart and os.path.exists(folder):
+    os.system(f"rm -r {folder}")
+
+for subfolder in ["cache", "run", "retrieved"]:
+    os.system(f"mkdir -p {folder}/{subfolder}")
+
+files = ["out.tglf.gbflux", "out.tglf.run"]
+
+
+def write_outputs(rho, content, files=files):
+    for file in files:
+        with open(f"{folder}/run/{file}_{rho:.4f}", "w") as f:
+            f.write(content)
+
+
+cache = GACODErun.TGLFcache(f"{folder}/cache", max_size_gb=1e-6, identity="test")
+
+inputs = ["RLTS_1 = 2.0\nRLTS_2 = 3.0\n", "RLTS_1 = 2.5\nRLTS_2 = 3.0\n", "RLTS_1 = 3.0\nRLTS_2 = 3.0\n"]
+
+# --------------------------------------------------------------------------------------------
+# Store and retrieve (equivalent input, written differently)
+# --------------------------------------------------------------------------------------------
+
+write_outputs(0.5, "run0")
+cache.store(inputs[0], files, f"{folder}/run", 0.5)
+
+assert cache.retrieve("# Comment\nrlts_2=3.0d0\nRLTS_1= 2.\n", files, f"{folder}/retrieved", 0.6)
+with open(f"{folder}/retrieved/out.tglf.gbflux_0.6000", "r") as f:
+    assert f.read() == "run0"
+
+# Different identity (e.g. other TGLF build) does not share entries
+assert not GACODErun.TGLFcache(f"{folder}/cache", identity="other").retrieve(inputs[0], files, f"{folder}/retrieved", 0.6)
+
+# --------------------------------------------------------------------------------------------
+# Runs with missing outputs are not stored
+# --------------------------------------------------------------------------------------------
+
+write_outputs(0.7, "run1", files=files[:1])
+cache.store(inputs[1], files, f"{folder}/run", 0.7)
+assert not cache.retrieve(inputs[1], files, f"{folder}/retrieved", 0.7)
+
+# --------------------------------------------------------------------------------------------
+# Store of an entry that another process creates meanwhile
+# --------------------------------------------------------------------------------------------
+
+write_outputs(0.7, "run1")
+entry = f"{folder}/cache/{cache.key(inputs[1])}"
+rename = os.rename
+
+
+def rename_concurrent(src, dst):
+    # Another process completes the same entry between the removal of the old one and the rename
+    os.makedirs(dst, exist_ok=True)
+    for file in files:
+        with open(f"{dst}/{file}", "w") as f:
+            f.write("run1")
+    rename(src, dst)
+
+
+os.rename = rename_concurrent
+cache.store(inputs[1], files, f"{folder}/run", 0.7)
+os.rename = rename
+assert cache.retrieve(inputs[1], files, f"{folder}/retrieved", 0.7)
+assert len([i for i in os.listdir(f"{folder}/cache") if ".tmp" in i]) == 0
+
+# --------------------------------------------------------------------------------------------
+# Eviction of least recently used entries (cache fits two entries)
+# --------------------------------------------------------------------------------------------
+
+cache.max_size_gb = 2 * len(files) * len("runX") / 1e9
+
+os.system(f"rm -r {entry}")
+write_outputs(0.7, "run1")
+cache.store(inputs[1], files, f"{folder}/run", 0.7)
+time.sleep(0.1)
+cache.retrieve(inputs[0], files, f"{folder}/retrieved", 0.5)  # Makes entry 0 the most recently used
+time.sleep(0.1)
+write_outputs(0.9, "run2")
+cache.store(inputs[2], files, f"{folder}/run", 0.9)
+cache.enforce_size()
+
+assert cache.retrieve(inputs[0], files, f"{folder}/retrieved", 0.5)
+assert not cache.retrieve(inputs[1], files, f"{folder}/retrieved", 0.7)
+assert cache.retrieve(inputs[2], files, f"{folder}/retrieved", 0.9)
+
+print("TGLF cache: store, retrieve and eviction work as expected")
@@ -0,0 +1,345 @@
+"""
+Loopback SSH/SFTP server (paramiko) to test MITIM's remote execution paths (FARMINGtools.mitim_job, SSHpool)
+without a real cluster. Commands are executed with bash on this machine and SFTP works on the local filesystem.
+Any public key is accepted. The fake SLURM commands of $MITIM_PATH/tests/fake_slurm are first in the PATH of
+the commands, so that slurm jobs run as local processes.
+
+To use it, launch the server:
+        python3 $MITIM_PATH/tests/fake_ssh/server.py --port 2222
+and define a machine in config_user.json that points to it, with the client key printed by the server
+(as the "loopback" machine of config_user_example.json), whose scratch is a local folder:
+        "loopback": {
+            "machine": "127.0.0.1",
+            "username": "mitim",
+            "port": 2222,
+            "identity": "/tmp/mitim_fake_ssh/id_rsa",
+            "scratch": "/tmp/mitim_fake_ssh/scratch",
+            "slurm": {"partition": "local"}
+        }
+
+The transport can be degraded to reproduce a distant cluster (--latency, --bandwidth, --drop-every):
+    - latency: seconds added to each command and to each SFTP file opening
+    - bandwidth: bytes/s of the data going through commands and SFTP files
+    - drop_every: the connection is dropped at every drop_every-th command (as a network drop would)
+    - max_sessions: channels (commands and SFTP sessions) open at once per connection, as MaxSessions of OpenSSH
+
+It can also be started from python (e.g. in a workflow script) with start_server(port, ...), and all connections
+can be dropped with drop_connections() to test reconnections. Usage is counted in statistics.
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import paramiko
+
+state_folder = os.environ.get("MITIM_FAKE_SSH", "/tmp/mitim_fake_ssh")
+fake_slurm = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fake_slurm")
+
+transports = []
+statistics = {
+    "connections": 0,
+    "commands": 0,
+    "sftp_sessions": 0,
+    "drops": 0,
+    "refused_channels": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+}
+conditions = {"latency": 0.0, "bandwidth": None, "drop_every": None, "max_sessions": 10, "slurm": True}
+
+
+def throttle(nbytes):
+    """
+    Time that nbytes take through the simulated transport
+    """
+
+    if conditions["bandwidth"] is not None:
+        time.sleep(nbytes / conditions["bandwidth"])
+
+# ---------------------------------------------------------------------------
+# SSH server: authentication and command execution
+# ---------------------------------------------------------------------------
+
+
+class LoopbackServer(paramiko.ServerInterface):
+    def __init__(self, transport):
+        self.transport = transport
+
+    def get_allowed_auths(self, username):
+        return "publickey,password"
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            open_channels = [c for c in self.transport._channels.values() if not c.closed]
+            if conditions["max_sessions"] is not None and len(open_channels) >= conditions["max_sessions"]:
+                statistics["refused_channels"] += 1
+                return paramiko.OPEN_FAILED_RESOURCE_SHORTAGE
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_FAILED
+
+    def check_channel_exec_request(self, channel, command):
+        statistics["commands"] += 1
+
+        if conditions["drop_every"] is not None and statistics["commands"] % conditions["drop_every"] == 0:
+            statistics["drops"] += 1
+            threading.Thread(target=self.transport.close, daemon=True).start()
+            return False
+
+        threading.Thread(target=execute, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+def execute(channel, command):
+    """
+    Run command streaming the channel input into its stdin and its stdout/stderr back into the channel
+    """
+
+    time.sleep(conditions["latency"])
+
+    env = dict(os.environ)
+    if conditions["slurm"]:
+        env["PATH"] = f"{fake_slurm}:{env['PATH']}"
+
+    process = subprocess.Popen(
+        ["bash", "-c", command],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+
+    def forward_stdin():
+        try:
+            while True:
+                data = channel.recv(32768)
+                if not data:
+                    break
+                statistics["bytes_in"] += len(data)
+                throttle(len(data))
+                process.stdin.write(data)
+                process.stdin.flush()
+        except (OSError, EOFError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def forward_output(pipe, send):
+        for data in iter(lambda: pipe.read1(32768), b""):
+            statistics["bytes_out"] += len(data)
+            throttle(len(data))
+            send(data)
+
+    threads = [
+        threading.Thread(target=forward_stdin, daemon=True),
+        threading.Thread(target=forward_output, args=(process.stdout, channel.sendall)),
+        threading.Thread(target=forward_output, args=(process.stderr, channel.sendall_stderr)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads[1:]:
+        thread.join()
+
+    channel.send_exit_status(process.wait())
+    channel.close()
+
+
+# ---------------------------------------------------------------------------
+# SFTP server on the local filesystem
+# ---------------------------------------------------------------------------
+
+
+class LocalHandle(paramiko.SFTPHandle):
+    def read(self, offset, length):
+        data = super().read(offset, length)
+        if isinstance(data, bytes):
+            statistics["bytes_out"] += len(data)
+            throttle(len(data))
+        return data
+
+    def write(self, offset, data):
+        statistics["bytes_in"] += len(data)
+        throttle(len(data))
+        return super().write(offset, data)
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class LocalSFTPServer(paramiko.SFTPServerInterface):
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        statistics["sftp_sessions"] += 1
+
+    def _call(self, function, *args):
+        try:
+            return function(*args)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def list_folder(self, path):
+        def _list(path):
+            return [
+                paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, f)), f)
+                for f in os.listdir(path)
+            ]
+
+        return self._call(_list, path)
+
+    def stat(self, path):
+        return self._call(lambda p: paramiko.SFTPAttributes.from_stat(os.stat(p)), path)
+
+    def lstat(self, path):
+        return self._call(lambda p: paramiko.SFTPAttributes.from_stat(os.lstat(p)), path)
+
+    def open(self, path, flags, attr):
+        time.sleep(conditions["latency"])
+
+        def _open(path):
+            fd = os.open(path, flags, 0o666)
+            if flags & os.O_WRONLY:
+                mode = "ab" if flags & os.O_APPEND else "wb"
+            elif flags & os.O_RDWR:
+                mode = "a+b" if flags & os.O_APPEND else "r+b"
+            else:
+                mode = "rb"
+
+            handle = LocalHandle(flags)
+            handle.filename = path
+            handle.readfile = handle.writefile = os.fdopen(fd, mode)
+            return handle
+
+        return self._call(_open, path)
+
+    def remove(self, path):
+        return self._call(lambda p: os.remove(p) or paramiko.SFTP_OK, path)
+
+    def rename(self, oldpath, newpath):
+        return self._call(lambda o, n: os.rename(o, n) or paramiko.SFTP_OK, oldpath, newpath)
+
+    def posix_rename(self, oldpath, newpath):
+        return self._call(lambda o, n: os.replace(o, n) or paramiko.SFTP_OK, oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        return self._call(lambda p: os.mkdir(p) or paramiko.SFTP_OK, path)
+
+    def rmdir(self, path):
+        return self._call(lambda p: os.rmdir(p) or paramiko.SFTP_OK, path)
+
+    def chattr(self, path, attr):
+        return paramiko.SFTP_OK
+
+
+# ---------------------------------------------------------------------------
+# Server loop
+# ---------------------------------------------------------------------------
+
+
+def client_key():
+    """
+    Key for clients to authenticate with (any key is accepted, but paramiko clients need one)
+    """
+
+    file = f"{state_folder}/id_rsa"
+    if not os.path.exists(file):
+        os.makedirs(state_folder, exist_ok=True)
+        paramiko.RSAKey.generate(2048).write_private_key_file(file)
+    return file
+
+
+def serve(sock, host_key):
+    while True:
+        try:
+            client, _ = sock.accept()
+        except OSError:
+            break
+
+        statistics["connections"] += 1
+
+        transport = paramiko.Transport(client)
+        transport.add_server_key(host_key)
+        transport.set_subsystem_handler("sftp", paramiko.SFTPServer, LocalSFTPServer)
+        transport.start_server(server=LoopbackServer(transport))
+        transports.append(transport)
+
+
+def start_server(
+    port=2222, host="127.0.0.1", latency=0.0, bandwidth=None, drop_every=None, max_sessions=10, slurm=True
+):
+    """
+    Start the server in a background thread, returns the listening socket (close it to stop).
+    Transport conditions (see module docstring) can be changed later in conditions
+    """
+
+    conditions.update(
+        {
+            "latency": latency,
+            "bandwidth": bandwidth,
+            "drop_every": drop_every,
+            "max_sessions": max_sessions,
+            "slurm": slurm,
+        }
+    )
+
+    host_key = paramiko.RSAKey.generate(2048)
+    client_key()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(100)
+
+    threading.Thread(target=serve, args=(sock, host_key), daemon=True).start()
+
+    return sock
+
+
+def drop_connections():
+    """
+    Close all open connections from the server side (as a network drop or a server restart would)
+    """
+
+    while transports:
+        transports.pop().close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=2222)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=None)
+    parser.add_argument("--drop-every", type=int, default=None)
+    parser.add_argument("--max-sessions", type=int, default=10)
+    parser.add_argument("--no-slurm", action="store_true")
+    args = parser.parse_args()
+
+    start_server(
+        port=args.port,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        drop_every=args.drop_every,
+        max_sessions=args.max_sessions,
+        slurm=not args.no_slurm,
+    )
+    print(f"Loopback SSH server listening on 127.0.0.1:{args.port}, client key in {client_key()}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sys.exit(0)